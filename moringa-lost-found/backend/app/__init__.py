@@ -1,6 +1,6 @@
 from flask import Flask
 from flask_cors import CORS
-from app.extensions import db, jwt
+from app.extensions import db, jwt, cache, pubsub, query_counter, metrics, images, mpesa
 from flask_migrate import Migrate
 from app.routes.auth_routes import auth_bp
 from app.routes.user_routes import user_bp
@@ -8,10 +8,14 @@ from app.routes.item_routes import item_bp
 from app.routes.report_routes import report_bp
 from app.routes.admin_routes import admin_bp
 from app.routes.notification_routes import notification_bp
+from app.routes.image_routes import image_bp
+from app.routes.reward_routes import reward_bp
+from app.routes.report_reward_routes import report_reward_bp
+from app.commands import notifications_cli, images_cli, payouts_cli, rewards_cli
 
-def create_app():
+def create_app(config_object='config.Config'):
     app = Flask(__name__)
-    app.config.from_object('config.Config')
+    app.config.from_object(config_object)
 
     # Configure CORS - allow all origins for development
     CORS(app, origins=[
@@ -27,6 +31,12 @@ def create_app():
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
+    cache.init_app(app)
+    pubsub.init_app(app)
+    query_counter.init_app(app)
+    metrics.init_app(app)
+    images.init_app(app)
+    mpesa.init_app(app)
     Migrate(app, db)  # <-- Migration setup
 
     # Register blueprints
@@ -36,5 +46,14 @@ def create_app():
     app.register_blueprint(report_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(notification_bp)
+    app.register_blueprint(image_bp)
+    app.register_blueprint(reward_bp)
+    app.register_blueprint(report_reward_bp)
+
+    # CLI commands (flask notifications ..., flask images ..., flask payouts ..., flask rewards ...)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(payouts_cli)
+    app.cli.add_command(rewards_cli)
 
     return app
@@ -0,0 +1,65 @@
+import signal
+import threading
+import click
+from flask.cli import AppGroup
+from app.extensions import db, images
+from app.models.item import Item
+from app.services import notification_counters, payouts, reconciliation
+from app.utils.images import difference_hash
+
+notifications_cli = AppGroup('notifications', help='Notification maintenance commands.')
+images_cli = AppGroup('images', help='Image store maintenance commands.')
+payouts_cli = AppGroup('payouts', help='M-Pesa payout worker.')
+rewards_cli = AppGroup('rewards', help='Reward reconciliation and reporting.')
+
+@notifications_cli.command('recount')
+@click.option('--user-id', type=int, default=None, help='Only recount this user.')
+def recount_unread(user_id):
+    """Rebuild unread-notification counters from the notifications table."""
+    drifted = notification_counters.recount(user_id)
+    click.echo(f"Repaired {drifted} unread counter(s)")
+
+@images_cli.command('rehash')
+def rehash_images():
+    """Compute missing perceptual hashes of uploaded item images."""
+    hashed = missing = 0
+    for item in Item.query.filter(Item.image_key.isnot(None), Item.image_hash.is_(None)):
+        try:
+            with open(images.original_path(item.image_key), 'rb') as f:
+                item.image_hash = difference_hash(f.read())
+            hashed += 1
+        except OSError:
+            missing += 1
+    db.session.commit()
+    click.echo(f"Hashed {hashed} image(s), {missing} original(s) missing")
+
+@payouts_cli.command('work')
+@click.option('--once', is_flag=True, help='Exit once no payout jobs are due.')
+def work_payouts(once):
+    """Send queued M-Pesa payouts until stopped."""
+    stop = threading.Event()
+    # Finish the current batch on SIGTERM rather than leaving its jobs leased
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    attempts = payouts.work(once=once, stop=stop)
+    click.echo(f"Made {attempts} payout attempt(s)")
+
+@rewards_cli.command('reconcile')
+@click.argument('statement', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--partitions', type=click.IntRange(1, 1024), default=reconciliation.PARTITIONS,
+              help='Temporary files the join is split over; raise it for very large statements.')
+def reconcile_rewards(statement, partitions):
+    """Match rewards against an M-Pesa statement CSV and store the mismatches."""
+    try:
+        result = reconciliation.reconcile(statement, partitions=partitions)
+    except reconciliation.StatementError as e:
+        raise click.BadParameter(str(e), param_hint='STATEMENT')
+    reconciliation.refresh_daily_totals()
+    mismatches = ', '.join(f"{kind}: {count}" for kind, count in sorted(result['mismatches'].items()))
+    click.echo(f"Run {result['run_id']}: {result['rewards']} reward(s), {result['statement_rows']} statement row(s), "
+               f"{result['matched']} matched; mismatches {mismatches or 'none'}")
+
+@rewards_cli.command('summarize')
+def summarize_rewards():
+    """Rebuild the per-day reward totals behind /admin/rewards/summary."""
+    rows = reconciliation.refresh_daily_totals()
+    click.echo(f"Stored {rows} daily total(s)")
@@ -1,8 +1,9 @@
 from flask import request, jsonify
 from werkzeug.security import check_password_hash, generate_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.user import User
 from app.extensions import db
+from app.utils.auth import issue_access_token, revoke_tokens, admin_required
 
 def signup():
     try:
@@ -55,8 +56,8 @@ def login():
         if not user or not user.check_password(password):
             return jsonify({"message": "Invalid credentials"}), 401
         
-        # Use string identity instead of integer
-        access_token = create_access_token(identity=str(user.id))
+        # String identity, with the role and token version as claims
+        access_token = issue_access_token(user)
         user_data = {
             "id": user.id,
             "username": user.username,
@@ -78,8 +79,8 @@ def admin_login():
     if not admin or not admin.check_password(password):
         return jsonify({"message": "Invalid credentials"}), 401
 
-    # Use string identity instead of integer
-    access_token = create_access_token(identity=str(admin.id))
+    # String identity, with the role and token version as claims
+    access_token = issue_access_token(admin)
     return jsonify(access_token=access_token), 200
 
 def admin_signup():
@@ -103,7 +104,7 @@ def admin_signup():
     return jsonify({"message": "Admin account created successfully"}), 201
 
 
-@jwt_required()
+@admin_required
 def protected_admin_route():
     return jsonify({"message": "This is a protected admin route"})
 
@@ -113,6 +114,8 @@ def make_admin(username):
         return jsonify({"message": "User not found"}), 404
     
     user.role = "admin"
+    # Tokens still claiming the old role stop working
+    revoke_tokens(user)
     db.session.commit()
     return jsonify({"message": f"User {username} is now an admin"}), 200
 
@@ -0,0 +1,73 @@
+import mimetypes
+import os
+from flask import Blueprint, current_app, redirect, request, send_file, abort
+from app.extensions import images
+from app.utils.images import URL_PREFIX, VARIANT_FILES, FORMATS, split_key
+
+image_bp = Blueprint('images', __name__, url_prefix=URL_PREFIX)
+
+ORIGINAL_EXTENSIONS = set(FORMATS.values())
+
+# Content-addressed URLs never change meaning, so caches may keep them for good
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def is_digest(value):
+    return len(value) == 64 and all(c in '0123456789abcdef' for c in value)
+
+def serve_stored_file(path, etag, keep_hot=False):
+    """
+    Response for a stored image file: conditional on If-None-Match, with
+    byte ranges, and never read through Python when a front-end server
+    can send it instead
+    """
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if images.accel_redirect:
+        # nginx serves the body (including ranges) from an internal location over the store
+        response = current_app.response_class(mimetype=mimetype)
+        response.set_etag(etag)
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+        else:
+            response.headers['X-Accel-Redirect'] = (
+                f"{images.accel_redirect.rstrip('/')}/{os.path.relpath(path, images.root)}"
+            )
+    elif keep_hot and images.hot is not None:
+        data = images.hot.get(path)
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            images.hot.put(path, data)
+        response = current_app.response_class(data, mimetype=mimetype)
+        response.set_etag(etag)
+        response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+    else:
+        response = send_file(path, mimetype=mimetype, etag=etag, conditional=True)
+
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+@image_bp.route('/<image_key>', methods=['GET'])
+def get_original(image_key):
+    digest, extension = split_key(image_key)
+    if not is_digest(digest) or extension not in ORIGINAL_EXTENSIONS:
+        abort(404)
+    path = images.original_path(image_key)
+    if not os.path.exists(path):
+        abort(404)
+    return serve_stored_file(path, digest)
+
+@image_bp.route('/<digest>/<file_name>', methods=['GET'])
+def get_variant(digest, file_name):
+    if not is_digest(digest) or file_name not in VARIANT_FILES:
+        abort(404)
+    path = images.variant_path(digest, file_name)
+    if (images.hot is not None and images.hot.get(path) is not None) or os.path.exists(path):
+        return serve_stored_file(path, f"{digest}-{file_name}", keep_hot=True)
+
+    # Not rendered yet: send the client to the original for now (not cached)
+    for extension in ORIGINAL_EXTENSIONS:
+        image_key = f"{digest}.{extension}"
+        if os.path.exists(images.original_path(image_key)):
+            return redirect(f"{URL_PREFIX}/{image_key}", code=307)
+    abort(404)
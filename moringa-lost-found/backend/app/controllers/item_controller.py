@@ -1,28 +1,39 @@
+import logging
 from flask import request, jsonify, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.item import Item
-from app.models.user import User
 from app.models.report import Claim, Comment
 from app.models.reward import Reward
+from app.models.item_match import ItemMatch
 from app.models.notification import Notification
-from app.extensions import db
+from sqlalchemy import update, or_
+from sqlalchemy.orm import selectinload
+from app.extensions import db, cache, images
+from app.utils.auth import admin_required, user_required, current_user, is_admin
+from app.utils.images import InvalidImage, image_urls, difference_hash
+from app.utils.pagination import paginate, wants_page, InvalidPageRequest, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services import search, matching, notification_outbox, notification_events, item_purge, duplicates
+from datetime import datetime, timedelta
 
 item_bp = Blueprint('items', __name__, url_prefix='/items')
 
-def create_notification(user_id, title, message, notification_type='info', item_id=None):
+logger = logging.getLogger(__name__)
+
+# Public responses may be stored anywhere but must be revalidated (cheaply, via ETag) before reuse
+PUBLIC_CACHE_CONTROL = 'public, no-cache'
+
+def paged_items_response(query, serialize=Item.to_dict):
     """
-    Helper function to create a notification for a user
+    Helper that returns one keyset page of items with the cursor for the next page
     """
-    notification = Notification(
-        user_id=user_id,
-        title=title,
-        message=message,
-        type=notification_type,
-        item_id=item_id
-    )
-    db.session.add(notification)
-    db.session.commit()
-    return notification
+    try:
+        page = paginate(query, Item)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "items": [serialize(item) for item in page.items],
+        "next_cursor": page.next_cursor
+    }), 200
 
 @item_bp.route('', methods=['OPTIONS'])
 def options_add_item():
@@ -49,37 +60,27 @@ def add_item():
 
     db.session.add(item)
     db.session.commit()
+    cache.invalidate('items')
     return jsonify({"message": "Item added successfully."}), 201
 
 @item_bp.route('/<int:item_id>', methods=['GET'])
+@cache.conditional('items', cache_control=PUBLIC_CACHE_CONTROL)
+@cache.cached('items')
 def get_item(item_id):
     item = Item.query.get_or_404(item_id)
-    return jsonify({
-        "id": item.id,
-        "name": item.name,
-        "status": item.status,
-        "approval_status": item.approval_status,
-        "description": item.description,
-        "location_found": item.location_found,
-        "reported_by": item.reported_by,
-        "created_at": item.created_at.isoformat() if item.created_at else None,
-        "image_url": item.image_url,
-        "category": item.category
-    }), 200
+    return jsonify(item.to_dict()), 200
 
 @item_bp.route('/<int:item_id>', methods=['OPTIONS'])
 def options_update_item(item_id):
     return '', 200
 
 @item_bp.route('/<int:item_id>', methods=['PUT'])
-@jwt_required()
+@user_required
 def update_item(item_id):
     item = Item.query.get_or_404(item_id)
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
 
     # Allow update if the user is the owner OR an admin
-    if item.reported_by != current_user_id and (not current_user or current_user.role != 'admin'):
+    if item.reported_by != current_user().id and not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
 
     data = request.get_json()
@@ -89,10 +90,15 @@ def update_item(item_id):
     item.name = data.get('name', item.name)
     item.description = data.get('description', item.description)
     item.status = data.get('status', item.status)
-    item.image_url = data.get('image_url', item.image_url)
+    if 'image_url' in data and data['image_url'] != item.image_url:
+        # An external URL replaces any uploaded image
+        item.image_url = data['image_url']
+        item.image_key = None
+        item.image_hash = None
     item.location_found = data.get('location_found', item.location_found)
 
     db.session.commit()
+    cache.invalidate('items')
     return jsonify({"message": "Item updated successfully."}), 200
 
 @item_bp.route('/<int:item_id>', methods=['OPTIONS'])
@@ -100,37 +106,98 @@ def options_delete_item(item_id):
     return '', 200
 
 @item_bp.route('/<int:item_id>', methods=['DELETE'])
-@jwt_required()
+@user_required
 def delete_item(item_id):
     item = Item.query.get_or_404(item_id)
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
 
     # Allow delete if the user is the owner OR an admin
-    if item.reported_by != current_user_id and (not current_user or current_user.role != 'admin'):
+    if item.reported_by != current_user().id and not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
 
+    # Notifications about the item stay, but lose their item_id (ON DELETE SET NULL)
+    notified_user_ids = [user_id for user_id, in db.session.query(Notification.user_id).filter(
+        Notification.item_id == item_id
+    ).distinct()]
     db.session.delete(item)
     db.session.commit()
+    cache.invalidate(
+        'items',
+        f"comments:{item_id}",
+        *(f"notifications:{user_id}" for user_id in notified_user_ids)
+    )
     return jsonify({"message": "Item deleted."}), 200
 
+@item_bp.route('/<int:item_id>/image', methods=['OPTIONS'])
+def options_upload_item_image(item_id):
+    return '', 200
+
+@item_bp.route('/<int:item_id>/image', methods=['POST'])
+@user_required
+def upload_item_image(item_id):
+    """
+    Upload the item's image as multipart field `image`. The original is
+    stored by content hash; thumbnails and WebP variants are rendered in the
+    background and listed under `images` in the item.
+    """
+    item = Item.query.get_or_404(item_id)
+    if item.reported_by != current_user().id and not is_admin():
+        return jsonify({"error": "Unauthorized"}), 403
+
+    if request.content_length and request.content_length > images.max_bytes:
+        return jsonify({"error": f"Image must be at most {images.max_bytes} bytes"}), 413
+    upload = request.files.get('image')
+    if upload is None:
+        return jsonify({"error": "image file is required"}), 400
+    data = upload.read(images.max_bytes + 1)
+    if len(data) > images.max_bytes:
+        return jsonify({"error": f"Image must be at most {images.max_bytes} bytes"}), 413
+
+    try:
+        image_key = images.save(data)
+    except InvalidImage as e:
+        return jsonify({"error": str(e)}), 400
+
+    item.image_key = image_key
+    item.image_hash = difference_hash(data)
+    item.image_url = image_urls(image_key)['original']
+    db.session.commit()
+    cache.invalidate('items')
+    images.schedule_variants(image_key)
+
+    return jsonify({"message": "Image uploaded successfully", "item": item.to_dict()}), 201
+
 @item_bp.route('', methods=['GET'])
+@cache.conditional('items', cache_control=PUBLIC_CACHE_CONTROL)
+@cache.cached('items')
 def get_all_items():
     # Only show approved items to regular users
-    items = Item.query.filter_by(approval_status='approved').all()
-    result = [{
-        "id": item.id,
-        "name": item.name,
-        "status": item.status,
-        "approval_status": item.approval_status,
-        "description": item.description,
-        "location_found": item.location_found,
-        "reported_by": item.reported_by,
-        "created_at": item.created_at.isoformat() if item.created_at else None,
-        "image_url": item.image_url,
-        "category": item.category
-    } for item in items]
-    return jsonify(result), 200
+    query = Item.query.filter_by(approval_status='approved')
+    if wants_page():
+        return paged_items_response(query)
+
+    items = query.all()
+    return jsonify([item.to_dict() for item in items]), 200
+
+@item_bp.route('/search', methods=['GET'])
+def search_items():
+    """
+    Full-text search over approved items' name, description and location
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+
+    limit = min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    items = search.search_items(
+        q,
+        status=request.args.get('status'),
+        category=request.args.get('category'),
+        limit=limit
+    )
+    return jsonify({"items": [item.to_dict() for item in items]}), 200
 
 @item_bp.route('/my-items', methods=['OPTIONS'])
 def options_get_my_items():
@@ -148,57 +215,22 @@ def get_my_items():
         return jsonify({"error": "Invalid user identity"}), 401
     
     # Get all items reported by the current user
-    items = Item.query.filter_by(reported_by=current_user_id).all()
-    
-    result = [{
-        "id": item.id,
-        "name": item.name,
-        "status": item.status,
-        "approval_status": item.approval_status,
-        "description": item.description,
-        "location_found": item.location_found,
-        "reported_by": item.reported_by,
-        "created_at": item.created_at.isoformat() if item.created_at else None,
-        "image_url": item.image_url,
-        "category": item.category
-    } for item in items]
-    
-    return jsonify(result), 200
+    query = Item.query.filter_by(reported_by=current_user_id)
+    if wants_page():
+        return paged_items_response(query)
+
+    items = query.all()
+    return jsonify([item.to_dict() for item in items]), 200
 
 @item_bp.route('/admin/pending', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_pending_items():
     """
     Get all items pending approval (admin only)
     """
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     # Get all pending items
     items = Item.query.filter_by(approval_status='pending').all()
-    result = [{
-        "id": item.id,
-        "name": item.name,
-        "status": item.status,
-        "approval_status": item.approval_status,
-        "description": item.description,
-        "location_found": item.location_found,
-        "reported_by": item.reported_by,
-        "created_at": item.created_at.isoformat() if item.created_at else None,
-        "image_url": item.image_url,
-        "category": item.category
-    } for item in items]
-    return jsonify(result), 200
+    return jsonify([item.to_dict() for item in items]), 200
 
 @item_bp.route('/<int:item_id>/claim', methods=['OPTIONS'])
 def options_claim_item(item_id):
@@ -273,6 +305,7 @@ def comment_item(item_id):
     
     db.session.add(comment)
     db.session.commit()
+    cache.invalidate(f"comments:{item_id}")
     
     return jsonify({
         "message": "Comment added successfully",
@@ -286,6 +319,7 @@ def comment_item(item_id):
     }), 201
 
 @item_bp.route('/<int:item_id>/comments', methods=['GET'])
+@cache.conditional(lambda item_id: f"comments:{item_id}", cache_control=PUBLIC_CACHE_CONTROL)
 def get_item_comments(item_id):
     comments = Comment.query.filter_by(item_id=item_id).all()
     return jsonify([{
@@ -295,6 +329,20 @@ def get_item_comments(item_id):
         "created_at": comment.created_at.isoformat()
     } for comment in comments]), 200
 
+@item_bp.route('/<int:item_id>/matches', methods=['GET'])
+@user_required
+def get_item_matches(item_id):
+    """
+    Get suggested lost/found matches for an item (its reporter or an admin only)
+    """
+    item = Item.query.get_or_404(item_id)
+    if item.reported_by != current_user().id and not is_admin():
+        return jsonify({"error": "Unauthorized"}), 403
+
+    column = ItemMatch.lost_item_id if item.status == 'lost' else ItemMatch.found_item_id
+    matches = ItemMatch.query.filter(column == item_id).order_by(ItemMatch.score.desc()).all()
+    return jsonify([match.to_dict() for match in matches]), 200
+
 @item_bp.route('/<int:item_id>/rewards', methods=['OPTIONS'])
 def options_offer_reward(item_id):
     return '', 200
@@ -355,22 +403,8 @@ def options_admin_add_item_to_inventory(item_id):
     return '', 200
 
 @item_bp.route('/admin/add/<int:item_id>', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_add_item_to_inventory(item_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     # Get the item that needs to be added to inventory
     item = Item.query.get_or_404(item_id)
     
@@ -385,6 +419,7 @@ def admin_add_item_to_inventory(item_id):
     # Update item status to 'found' (in inventory)
     item.status = 'found'
     db.session.commit()
+    cache.invalidate('items')
     
     return jsonify({
         "message": "Item successfully added to inventory",
@@ -405,22 +440,8 @@ def options_admin_update_item(item_id):
     return '', 200
 
 @item_bp.route('/admin/<int:item_id>/update', methods=['PUT'])
-@jwt_required()
+@admin_required
 def admin_update_item(item_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     item = Item.query.get_or_404(item_id)
     data = request.get_json()
     
@@ -436,10 +457,14 @@ def admin_update_item(item_id):
         item.status = data['status']
     if 'location_found' in data:
         item.location_found = data['location_found']
-    if 'image_url' in data:
+    if 'image_url' in data and data['image_url'] != item.image_url:
+        # An external URL replaces any uploaded image
         item.image_url = data['image_url']
+        item.image_key = None
+        item.image_hash = None
 
     db.session.commit()
+    cache.invalidate('items')
     
     return jsonify({
         "message": "Item updated successfully",
@@ -460,22 +485,8 @@ def options_admin_remove_item(item_id):
     return '', 200
 
 @item_bp.route('/admin/<int:item_id>/remove', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def admin_remove_item(item_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     item = Item.query.get_or_404(item_id)
     
     # Store item info before deletion for response
@@ -487,108 +498,163 @@ def admin_remove_item(item_id):
         "location_found": item.location_found
     }
     
-    # Delete related records first to avoid foreign key constraint violations
-    # Delete rewards associated with this item
-    Reward.query.filter_by(item_id=item_id).delete()
-    
-    # Delete claims associated with this item
-    Claim.query.filter_by(item_id=item_id).delete()
-    
-    # Delete comments associated with this item
-    Comment.query.filter_by(item_id=item_id).delete()
-    
-    # Delete reports associated with this item
-    from app.models.report import Report
-    Report.query.filter_by(item_id=item_id).delete()
-    
-    # Now delete the item
-    db.session.delete(item)
-    db.session.commit()
+    # Claims, comments, rewards and reports go with the item (ON DELETE CASCADE)
+    announce_purge(item_purge.purge_items(Item.id == item_id))
     
     return jsonify({
         "message": "Item removed from inventory successfully",
         "removed_item": item_info
     }), 200
 
+# Upper bound on ids per purge request
+MAX_PURGE_IDS = 10000
+
+def announce_purge(result):
+    """
+    Commit a purge, then drop cached responses and update live unread counts
+    """
+    db.session.commit()
+    cache.invalidate(
+        'items',
+        *(f"comments:{item_id}" for item_id in result.item_ids),
+        *(f"notifications:{user_id}" for user_id in result.notified_user_ids)
+    )
+    for user_id, count in result.unread_counts.items():
+        notification_events.publish_unread_count(user_id, count)
+
+@item_bp.route('/admin/purge', methods=['OPTIONS'])
+def options_admin_purge_items():
+    return '', 200
+
+@item_bp.route('/admin/purge', methods=['POST'])
+@admin_required
+def admin_purge_items():
+    """
+    Permanently delete many items with their claims, comments, rewards,
+    reports, matches and notifications (admin only). Items are chosen by
+    `item_ids`, or by `older_than_days` optionally narrowed by `status` and
+    `approval_status`. Runs as a handful of statements in one transaction.
+    """
+    data = request.get_json(silent=True) or {}
+    criteria = []
+
+    item_ids = data.get('item_ids')
+    if item_ids is not None:
+        if (not isinstance(item_ids, list) or not item_ids
+                or not all(isinstance(item_id, int) and not isinstance(item_id, bool) for item_id in item_ids)):
+            return jsonify({"error": "item_ids must be a non-empty list of integers"}), 400
+        item_ids = list(dict.fromkeys(item_ids))
+        if len(item_ids) > MAX_PURGE_IDS:
+            return jsonify({"error": f"At most {MAX_PURGE_IDS} items can be purged at once"}), 400
+        criteria.append(Item.id.in_(item_ids))
+
+    older_than_days = data.get('older_than_days')
+    if older_than_days is not None:
+        if not isinstance(older_than_days, int) or isinstance(older_than_days, bool) or older_than_days < 1:
+            return jsonify({"error": "older_than_days must be a positive integer"}), 400
+        criteria.append(Item.created_at < datetime.utcnow() - timedelta(days=older_than_days))
+
+    if not criteria:
+        return jsonify({"error": "Provide item_ids or older_than_days"}), 400
+    for field in ('status', 'approval_status'):
+        if data.get(field):
+            criteria.append(getattr(Item, field) == data[field])
+
+    result = item_purge.purge_items(*criteria)
+    announce_purge(result)
+
+    response = {
+        "message": f"Purged {len(result.item_ids)} items",
+        "purged_count": len(result.item_ids),
+        "purged_ids": sorted(result.item_ids)
+    }
+    if item_ids is not None:
+        purged = set(result.item_ids)
+        response["not_found"] = [item_id for item_id in item_ids if item_id not in purged]
+    return jsonify(response), 200
+
 @item_bp.route('/admin/found-items', methods=['OPTIONS'])
 def options_admin_view_found_items():
     return '', 200
 
+def load_admin_items(status, with_claimants=False):
+    """
+    Load items with their claims, comments, rewards and reporter in a fixed
+    number of queries (one IN-query per relationship) instead of one per item
+    """
+    claims_loader = selectinload(Item.claims)
+    if with_claimants:
+        claims_loader = claims_loader.selectinload(Claim.claimant)
+    return Item.query.options(
+        claims_loader,
+        selectinload(Item.comments),
+        selectinload(Item.rewards),
+        selectinload(Item.reporter)
+    ).filter_by(status=status).all()
+
+def serialize_user_summary(user):
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email
+    } if user else None
+
+def serialize_admin_item(item, include_claimant=False):
+    """
+    Helper that serializes an eagerly loaded item for the admin inventory views
+    """
+    claims_data = [{
+        "id": claim.id,
+        "claimant_id": claim.claimant_id,
+        "status": claim.status,
+        "created_at": claim.created_at.isoformat()
+    } for claim in item.claims]
+
+    comments_data = [{
+        "id": comment.id,
+        "author_id": comment.author_id,
+        "comment_text": comment.comment_text,
+        "created_at": comment.created_at.isoformat()
+    } for comment in item.comments]
+
+    rewards_data = [{
+        "id": reward.id,
+        "owner_user_id": reward.owner_user_id,
+        "finder_user_id": reward.finder_user_id,
+        "amount": reward.amount,
+        "status": reward.status,
+        "created_at": reward.created_at.isoformat()
+    } for reward in item.rewards]
+
+    item_data = {
+        "id": item.id,
+        "name": item.name,
+        "description": item.description,
+        "status": item.status,
+        "location_found": item.location_found,
+        "image_url": item.image_url,
+        "reported_by": serialize_user_summary(item.reporter),
+        "created_at": item.created_at.isoformat(),
+        "claims": claims_data,
+        "comments": comments_data,
+        "rewards": rewards_data,
+        "total_claims": len(claims_data),
+        "total_comments": len(comments_data),
+        "total_rewards": len(rewards_data)
+    }
+
+    if include_claimant:
+        # The person who claimed the item is the one with the approved claim
+        approved_claim = next((claim for claim in item.claims if claim.status == 'approved'), None)
+        item_data["claimed_by"] = serialize_user_summary(approved_claim.claimant) if approved_claim else None
+
+    return item_data
+
 @item_bp.route('/admin/found-items', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_view_found_items():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     # Get all found items with detailed information
-    found_items = Item.query.filter_by(status='found').all()
-    
-    items_data = []
-    for item in found_items:
-        # Get associated claims for this item
-        claims = Claim.query.filter_by(item_id=item.id).all()
-        claims_data = [{
-            "id": claim.id,
-            "claimant_id": claim.claimant_id,
-            "status": claim.status,
-            "created_at": claim.created_at.isoformat()
-        } for claim in claims]
-        
-        # Get associated comments for this item
-        comments = Comment.query.filter_by(item_id=item.id).all()
-        comments_data = [{
-            "id": comment.id,
-            "author_id": comment.author_id,
-            "comment_text": comment.comment_text,
-            "created_at": comment.created_at.isoformat()
-        } for comment in comments]
-        
-        # Get associated rewards for this item
-        rewards = Reward.query.filter_by(item_id=item.id).all()
-        rewards_data = [{
-            "id": reward.id,
-            "owner_user_id": reward.owner_user_id,
-            "amount": reward.amount,
-            "status": reward.status,
-            "created_at": reward.created_at.isoformat()
-        } for reward in rewards]
-        
-        # Get reporter information
-        reporter = User.query.get(item.reported_by)
-        reporter_info = {
-            "id": reporter.id,
-            "username": reporter.username,
-            "email": reporter.email
-        } if reporter else None
-        
-        item_data = {
-            "id": item.id,
-            "name": item.name,
-            "description": item.description,
-            "status": item.status,
-            "location_found": item.location_found,
-            "image_url": item.image_url,
-            "reported_by": reporter_info,
-            "created_at": item.created_at.isoformat(),
-            "claims": claims_data,
-            "comments": comments_data,
-            "rewards": rewards_data,
-            "total_claims": len(claims_data),
-            "total_comments": len(comments_data),
-            "total_rewards": len(rewards_data)
-        }
-        items_data.append(item_data)
+    items_data = [serialize_admin_item(item) for item in load_admin_items('found')]
     
     return jsonify({
         "message": f"Found {len(items_data)} items",
@@ -601,81 +667,10 @@ def options_admin_view_inventory():
     return '', 200
 
 @item_bp.route('/admin/inventory', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_view_inventory():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     # Get all items in inventory (status = 'found')
-    inventory_items = Item.query.filter_by(status='found').all()
-    
-    items_data = []
-    for item in inventory_items:
-        # Get associated claims for this item
-        claims = Claim.query.filter_by(item_id=item.id).all()
-        claims_data = [{
-            "id": claim.id,
-            "claimant_id": claim.claimant_id,
-            "status": claim.status,
-            "created_at": claim.created_at.isoformat()
-        } for claim in claims]
-        
-        # Get associated comments for this item
-        comments = Comment.query.filter_by(item_id=item.id).all()
-        comments_data = [{
-            "id": comment.id,
-            "author_id": comment.author_id,
-            "comment_text": comment.comment_text,
-            "created_at": comment.created_at.isoformat()
-        } for comment in comments]
-        
-        # Get associated rewards for this item
-        rewards = Reward.query.filter_by(item_id=item.id).all()
-        rewards_data = [{
-            "id": reward.id,
-            "offered_by_id": reward.offered_by_id,
-            "paid_to_id": reward.paid_to_id,
-            "amount": reward.amount,
-            "status": reward.status,
-            "created_at": reward.created_at.isoformat()
-        } for reward in rewards]
-        
-        # Get reporter information
-        reporter = User.query.get(item.reported_by)
-        reporter_info = {
-            "id": reporter.id,
-            "username": reporter.username,
-            "email": reporter.email
-        } if reporter else None
-        
-        item_data = {
-            "id": item.id,
-            "name": item.name,
-            "description": item.description,
-            "status": item.status,
-            "location_found": item.location_found,
-            "image_url": item.image_url,
-            "reported_by": reporter_info,
-            "created_at": item.created_at.isoformat(),
-            "claims": claims_data,
-            "comments": comments_data,
-            "rewards": rewards_data,
-            "total_claims": len(claims_data),
-            "total_comments": len(comments_data),
-            "total_rewards": len(rewards_data)
-        }
-        items_data.append(item_data)
+    items_data = [serialize_admin_item(item) for item in load_admin_items('found')]
     
     return jsonify({
         "message": f"Inventory contains {len(items_data)} items",
@@ -688,94 +683,11 @@ def options_admin_view_claimed_items():
     return '', 200
 
 @item_bp.route('/admin/claimed-items', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_view_claimed_items():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     # Get all claimed items with detailed information
-    claimed_items = Item.query.filter_by(status='claimed').all()
-    
-    items_data = []
-    for item in claimed_items:
-        # Get associated claims for this item
-        claims = Claim.query.filter_by(item_id=item.id).all()
-        claims_data = [{
-            "id": claim.id,
-            "claimant_id": claim.claimant_id,
-            "status": claim.status,
-            "created_at": claim.created_at.isoformat()
-        } for claim in claims]
-        
-        # Get associated comments for this item
-        comments = Comment.query.filter_by(item_id=item.id).all()
-        comments_data = [{
-            "id": comment.id,
-            "author_id": comment.author_id,
-            "comment_text": comment.comment_text,
-            "created_at": comment.created_at.isoformat()
-        } for comment in comments]
-        
-        # Get associated rewards for this item
-        rewards = Reward.query.filter_by(item_id=item.id).all()
-        rewards_data = [{
-            "id": reward.id,
-            "owner_user_id": reward.owner_user_id,
-            "amount": reward.amount,
-            "status": reward.status,
-            "created_at": reward.created_at.isoformat()
-        } for reward in rewards]
-        
-        # Get reporter information
-        reporter = User.query.get(item.reported_by)
-        reporter_info = {
-            "id": reporter.id,
-            "username": reporter.username,
-            "email": reporter.email
-        } if reporter else None
-        
-        # Get claimant information (the person who claimed the item)
-        claimant_info = None
-        if claims_data:
-            # Get the approved claim
-            approved_claim = next((claim for claim in claims if claim.status == 'approved'), None)
-            if approved_claim:
-                claimant = User.query.get(approved_claim.claimant_id)
-                claimant_info = {
-                    "id": claimant.id,
-                    "username": claimant.username,
-                    "email": claimant.email
-                } if claimant else None
-        
-        item_data = {
-            "id": item.id,
-            "name": item.name,
-            "description": item.description,
-            "status": item.status,
-            "location_found": item.location_found,
-            "image_url": item.image_url,
-            "reported_by": reporter_info,
-            "claimed_by": claimant_info,
-            "created_at": item.created_at.isoformat(),
-            "claims": claims_data,
-            "comments": comments_data,
-            "rewards": rewards_data,
-            "total_claims": len(claims_data),
-            "total_comments": len(comments_data),
-            "total_rewards": len(rewards_data)
-        }
-        items_data.append(item_data)
+    claimed_items = load_admin_items('claimed', with_claimants=True)
+    items_data = [serialize_admin_item(item, include_claimant=True) for item in claimed_items]
     
     return jsonify({
         "message": f"Found {len(items_data)} claimed items",
@@ -788,29 +700,17 @@ def options_admin_view_pending_items():
     return '', 200
 
 @item_bp.route('/admin/pending-items', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_view_pending_items():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
-    # Get all pending items
-    pending_items = Item.query.filter_by(approval_status='pending').all()
+    # Get all pending items, with their reporters loaded in one extra query
+    pending_items = Item.query.options(selectinload(Item.reporter)).filter_by(approval_status='pending').all()
+    # Recent items whose photo looks like the same picture
+    suspected_duplicates = duplicates.find_duplicates(pending_items)
     
     items_data = []
     for item in pending_items:
         # Get reporter information
-        reporter = User.query.get(item.reported_by)
+        reporter = item.reporter
         reporter_info = {
             "id": reporter.id,
             "username": reporter.username,
@@ -827,14 +727,17 @@ def admin_view_pending_items():
             "image_url": item.image_url,
             "category": item.category,
             "reported_by": reporter_info,
-            "created_at": item.created_at.isoformat()
+            "created_at": item.created_at.isoformat(),
+            "images": image_urls(item.image_key),
+            "suspected_duplicates": suspected_duplicates.get(item.id, [])
         }
         items_data.append(item_data)
     
     return jsonify({
         "message": f"Found {len(items_data)} pending items",
         "pending_items": items_data,
-        "total_count": len(items_data)
+        "total_count": len(items_data),
+        "suspected_duplicate_count": len(suspected_duplicates)
     }), 200
 
 @item_bp.route('/admin/<int:item_id>/approve', methods=['OPTIONS'])
@@ -842,40 +745,31 @@ def options_admin_approve_item(item_id):
     return '', 200
 
 @item_bp.route('/admin/<int:item_id>/approve', methods=['PUT'])
-@jwt_required()
+@admin_required
 def admin_approve_item(item_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     item = Item.query.get_or_404(item_id)
     
     # Update approval status to approved
     item.approval_status = 'approved'
+    
+    # Notify the user who reported the item; written in the same commit
+    notification_outbox.notify(
+        user_id=item.reported_by,
+        title="Item Approved",
+        message=f"Great news! Your item '{item.name}' has been approved by an administrator and is now visible to other users.",
+        notification_type='success',
+        item_id=item.id
+    )
     db.session.commit()
+    cache.invalidate('items')
     
-    # Create notification for the user who reported the item
-    try:
-        create_notification(
-            user_id=item.reported_by,
-            title="Item Approved",
-            message=f"Great news! Your item '{item.name}' has been approved by an administrator and is now visible to other users.",
-            notification_type='success',
-            item_id=item.id
-        )
-    except Exception as e:
-        # Log the error but don't fail the approval process
-        print(f"Failed to create notification: {str(e)}")
+    # Now that a found item is public, tell the owners of likely matching lost items
+    if item.status == 'found':
+        try:
+            matching.match_found_items([item])
+        except Exception:
+            db.session.rollback()
+            logger.exception("Failed to match found item %s", item_id)
     
     return jsonify({
         "message": "Item approved successfully",
@@ -898,22 +792,8 @@ def options_admin_reject_item(item_id):
     return '', 200
 
 @item_bp.route('/admin/<int:item_id>/reject', methods=['PUT'])
-@jwt_required()
+@admin_required
 def admin_reject_item(item_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     item = Item.query.get_or_404(item_id)
     
     # Get rejection reason from request data
@@ -922,20 +802,17 @@ def admin_reject_item(item_id):
     
     # Update approval status to rejected
     item.approval_status = 'rejected'
-    db.session.commit()
     
-    # Create notification for the user who reported the item
-    try:
-        create_notification(
-            user_id=item.reported_by,
-            title="Item Rejected",
-            message=f"Your item '{item.name}' has been rejected by an administrator. Reason: {rejection_reason}",
-            notification_type='error',
-            item_id=item.id
-        )
-    except Exception as e:
-        # Log the error but don't fail the rejection process
-        print(f"Failed to create notification: {str(e)}")
+    # Notify the user who reported the item; written in the same commit
+    notification_outbox.notify(
+        user_id=item.reported_by,
+        title="Item Rejected",
+        message=f"Your item '{item.name}' has been rejected by an administrator. Reason: {rejection_reason}",
+        notification_type='error',
+        item_id=item.id
+    )
+    db.session.commit()
+    cache.invalidate('items')
     
     return jsonify({
         "message": "Item rejected successfully",
@@ -954,27 +831,110 @@ def admin_reject_item(item_id):
         "reason": rejection_reason
     }), 200
 
+# Upper bound on ids per bulk moderation request
+MAX_BULK_MODERATE = 1000
+
+MODERATION_ACTIONS = {
+    'approve': {
+        'approval_status': 'approved',
+        'title': "Item Approved",
+        'message': "Great news! Your item '{name}' has been approved by an administrator and is now visible to other users.",
+        'type': 'success',
+    },
+    'reject': {
+        'approval_status': 'rejected',
+        'title': "Item Rejected",
+        'message': "Your item '{name}' has been rejected by an administrator. Reason: {reason}",
+        'type': 'error',
+    },
+}
+
+@item_bp.route('/admin/bulk-moderate', methods=['OPTIONS'])
+def options_admin_bulk_moderate():
+    return '', 200
+
+@item_bp.route('/admin/bulk-moderate', methods=['PUT'])
+@admin_required
+def admin_bulk_moderate():
+    """
+    Approve or reject many items at once (admin only). The status change is
+    one UPDATE and the reporters' notifications one INSERT, committed together.
+    """
+    data = request.get_json(silent=True) or {}
+    action = MODERATION_ACTIONS.get(data.get('action'))
+    if action is None:
+        return jsonify({"error": "action must be 'approve' or 'reject'"}), 400
+
+    item_ids = data.get('item_ids')
+    if (not isinstance(item_ids, list) or not item_ids
+            or not all(isinstance(item_id, int) and not isinstance(item_id, bool) for item_id in item_ids)):
+        return jsonify({"error": "item_ids must be a non-empty list of integers"}), 400
+    item_ids = list(dict.fromkeys(item_ids))
+    if len(item_ids) > MAX_BULK_MODERATE:
+        return jsonify({"error": f"At most {MAX_BULK_MODERATE} items can be moderated at once"}), 400
+
+    reason = data.get('reason') or 'No reason provided'
+    target = action['approval_status']
+
+    # Items already in the target state are left alone (and not re-notified)
+    moderated = db.session.execute(
+        update(Item)
+        .where(Item.id.in_(item_ids), or_(Item.approval_status.is_(None), Item.approval_status != target))
+        .values(approval_status=target)
+        .returning(Item.id, Item.name, Item.status, Item.reported_by)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    for row in moderated:
+        notification_outbox.notify(
+            user_id=row.reported_by,
+            title=action['title'],
+            message=action['message'].format(name=row.name, reason=reason),
+            notification_type=action['type'],
+            item_id=row.id
+        )
+
+    moderated_ids = {row.id for row in moderated}
+    skipped_ids = [item_id for item_id in item_ids if item_id not in moderated_ids]
+    existing_ids = set()
+    if skipped_ids:
+        existing_ids = {row.id for row in db.session.query(Item.id).filter(Item.id.in_(skipped_ids))}
+    db.session.commit()
+    cache.invalidate('items')
+
+    # Newly public found items may match somebody's lost item
+    found_ids = [row.id for row in moderated if row.status == 'found']
+    if target == 'approved' and found_ids:
+        try:
+            matching.match_found_items(Item.query.filter(Item.id.in_(found_ids)).all())
+        except Exception:
+            db.session.rollback()
+            logger.exception("Failed to match found items %s", found_ids)
+
+    results = []
+    for item_id in item_ids:
+        if item_id in moderated_ids:
+            outcome = target
+        elif item_id in existing_ids:
+            outcome = 'unchanged'
+        else:
+            outcome = 'not_found'
+        results.append({"id": item_id, "result": outcome})
+
+    return jsonify({
+        "message": f"{len(moderated_ids)} items {target}",
+        "action": data['action'],
+        "updated_count": len(moderated_ids),
+        "results": results
+    }), 200
+
 @item_bp.route('/admin/claims/<int:claim_id>/approve', methods=['OPTIONS'])
 def options_admin_approve_claim(claim_id):
     return '', 200
 
 @item_bp.route('/admin/claims/<int:claim_id>/approve', methods=['PUT'])
-@jwt_required()
+@admin_required
 def admin_approve_claim(claim_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     claim = Claim.query.get_or_404(claim_id)
     item = Item.query.get_or_404(claim.item_id)
     
@@ -986,11 +946,29 @@ def admin_approve_claim(claim_id):
     
     # Reject all other pending claims for this item
     other_claims = Claim.query.filter_by(item_id=claim.item_id).filter(Claim.id != claim_id).all()
+    rejected_claimants = []
     for other_claim in other_claims:
         if other_claim.status == 'pending':
             other_claim.status = 'rejected'
-    
+            rejected_claimants.append(other_claim.claimant_id)
+    
+    # Tell every claimant the outcome; staged notifications are written with this commit
+    notification_outbox.notify(
+        user_id=claim.claimant_id,
+        title="Claim Approved",
+        message=f"Your claim for '{item.name}' has been approved.",
+        notification_type='success',
+        item_id=item.id
+    )
+    notification_outbox.notify_many(
+        rejected_claimants,
+        title="Claim Rejected",
+        message=f"Another claim for '{item.name}' has been approved, so your claim was rejected.",
+        notification_type='error',
+        item_id=item.id
+    )
     db.session.commit()
+    cache.invalidate('items')
     
     return jsonify({
         "message": "Claim approved successfully",
@@ -1014,22 +992,8 @@ def options_admin_reject_claim(claim_id):
     return '', 200
 
 @item_bp.route('/admin/claims/<int:claim_id>/reject', methods=['PUT'])
-@jwt_required()
+@admin_required
 def admin_reject_claim(claim_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     claim = Claim.query.get_or_404(claim_id)
     
     # Update claim status to rejected
@@ -1052,29 +1016,18 @@ def options_admin_view_pending_claims():
     return '', 200
 
 @item_bp.route('/admin/pending-claims', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_view_pending_claims():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
-    # Get all pending claims with item and claimant details
-    pending_claims = Claim.query.filter_by(status='pending').all()
+    # Get all pending claims with item and claimant details (one extra query each, not one per claim)
+    pending_claims = Claim.query.options(
+        selectinload(Claim.item),
+        selectinload(Claim.claimant)
+    ).filter_by(status='pending').all()
     
     claims_data = []
     for claim in pending_claims:
         # Get item information
-        item = Item.query.get(claim.item_id)
+        item = claim.item
         item_info = {
             "id": item.id,
             "name": item.name,
@@ -1087,7 +1040,7 @@ def admin_view_pending_claims():
         } if item else None
         
         # Get claimant information
-        claimant = User.query.get(claim.claimant_id)
+        claimant = claim.claimant
         claimant_info = {
             "id": claimant.id,
             "username": claimant.username,
@@ -1110,3 +1063,9 @@ def admin_view_pending_claims():
         "pending_claims": claims_data,
         "total_count": len(claims_data)
     }), 200
+
+@item_bp.route('/admin/cache-stats', methods=['GET'])
+@admin_required
+def admin_view_cache_stats():
+    # Hit/miss counters are per worker process
+    return jsonify(cache.stats()), 200
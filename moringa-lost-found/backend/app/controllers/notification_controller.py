@@ -1,28 +1,20 @@
-from flask import request, jsonify, Blueprint
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import json
+import threading
+import time
+from flask import current_app, request, jsonify, Blueprint, Response
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, get_jwt_request_location
+from sqlalchemy import func
 from app.models.notification import Notification
 from app.models.user import User
-from app.extensions import db
+from app.extensions import db, cache, pubsub
+from app.services import notification_events, notification_counters
+from app.utils.auth import STREAM_SCOPE, accepts_stream_token, issue_stream_token
 
 notification_bp = Blueprint('notifications', __name__, url_prefix='/notifications')
 
-def create_notification(user_id, title, message, notification_type='info', item_id=None):
-    """
-    Helper function to create a notification for a user
-    """
-    notification = Notification(
-        user_id=user_id,
-        title=title,
-        message=message,
-        type=notification_type,
-        item_id=item_id
-    )
-    db.session.add(notification)
-    db.session.commit()
-    return notification
-
 @notification_bp.route('', methods=['GET'])
 @jwt_required()
+@cache.conditional(lambda: f"notifications:{get_jwt_identity()}", cache_control='private, no-cache')
 def get_user_notifications():
     """
     Get all notifications for the current user
@@ -70,8 +62,13 @@ def mark_notification_as_read(notification_id):
         user_id=current_user_id
     ).first_or_404()
     
-    notification.is_read = True
+    # Conditional update, so two concurrent requests cannot both decrement
+    marked = Notification.query.filter_by(id=notification_id, is_read=False).update({'is_read': True})
+    notification_counters.decrement(current_user_id, marked)
     db.session.commit()
+    cache.invalidate(f"notifications:{current_user_id}")
+    if marked:
+        notification_events.publish_unread_count(current_user_id)
     
     return jsonify({
         "message": "Notification marked as read",
@@ -95,8 +92,11 @@ def mark_all_notifications_as_read():
         user_id=current_user_id, 
         is_read=False
     ).update({'is_read': True})
+    notification_counters.decrement(current_user_id, updated_count)
     
     db.session.commit()
+    cache.invalidate(f"notifications:{current_user_id}")
+    notification_events.publish_unread_count(current_user_id)
     
     return jsonify({
         "message": f"Marked {updated_count} notifications as read"
@@ -114,13 +114,19 @@ def delete_notification(notification_id):
     except (ValueError, TypeError):
         return jsonify({"error": "Invalid user identity"}), 401
     
-    notification = Notification.query.filter_by(
-        id=notification_id, 
-        user_id=current_user_id
-    ).first_or_404()
-    
-    db.session.delete(notification)
+    # Delete unread first so the counter only moves if this request removed an unread row
+    deleted_unread = Notification.query.filter_by(
+        id=notification_id,
+        user_id=current_user_id,
+        is_read=False
+    ).delete()
+    if not deleted_unread and not Notification.query.filter_by(id=notification_id, user_id=current_user_id).delete():
+        return jsonify({"error": "Notification not found"}), 404
+    notification_counters.decrement(current_user_id, deleted_unread)
     db.session.commit()
+    cache.invalidate(f"notifications:{current_user_id}")
+    if deleted_unread:
+        notification_events.publish_unread_count(current_user_id)
     
     return jsonify({"message": "Notification deleted successfully"}), 200
 
@@ -136,9 +142,137 @@ def get_unread_count():
     except (ValueError, TypeError):
         return jsonify({"error": "Invalid user identity"}), 401
     
-    unread_count = Notification.query.filter_by(
-        user_id=current_user_id, 
-        is_read=False
-    ).count()
-    
-    return jsonify({"unread_count": unread_count}), 200
\ No newline at end of file
+    return jsonify({"unread_count": notification_counters.get(current_user_id)}), 200
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT_SECONDS = 15
+# Missed notifications sent per reconnect
+STREAM_REPLAY_LIMIT = 100
+
+_slots_lock = threading.Lock()
+
+def stream_slots():
+    """
+    This process's semaphore for STREAM_MAX_CONNECTIONS open streams
+    """
+    app = current_app._get_current_object()
+    with _slots_lock:
+        if 'notification_stream_slots' not in app.extensions:
+            app.extensions['notification_stream_slots'] = threading.BoundedSemaphore(
+                app.config.get('STREAM_MAX_CONNECTIONS', 40)
+            )
+        return app.extensions['notification_stream_slots']
+
+def format_sse(message):
+    lines = [f"event: {message['event']}"]
+    if message.get('id') is not None:
+        lines.append(f"id: {message['id']}")
+    lines.append(f"data: {json.dumps(message['data'])}")
+    return '\n'.join(lines) + '\n\n'
+
+def event_stream(subscription, initial_events, max_seconds, retry_ms):
+    """
+    Runs after the request has returned, so it must not touch the database:
+    everything it sends comes from the broker. Ends after `max_seconds`;
+    EventSource then reconnects after `retry_ms` with Last-Event-ID set.
+    """
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        for message in initial_events:
+            yield format_sse(message)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            message = subscription.get(timeout=min(STREAM_HEARTBEAT_SECONDS, remaining))
+            if message is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield format_sse(message)
+    finally:
+        pubsub.unsubscribe(subscription)
+
+@jwt_required()
+def get_stream_token():
+    """
+    Short-lived token for opening the notification stream as ?jwt=
+    """
+    return jsonify({
+        "token": issue_stream_token(),
+        "expires_in": current_app.config.get('STREAM_TOKEN_SECONDS', 60)
+    }), 200
+
+# EventSource cannot set headers, so a stream token may be passed as ?jwt=
+@accepts_stream_token
+@jwt_required(locations=['headers', 'query_string'])
+def stream_notifications():
+    """
+    Server-Sent Events stream of new notifications and unread-count changes
+    for the current user
+    """
+    current_user_id = get_jwt_identity()
+    try:
+        current_user_id = int(current_user_id)
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid user identity"}), 401
+    # Access tokens stay out of URLs (and so out of access logs)
+    if get_jwt_request_location() == 'query_string' and get_jwt().get('scope') != STREAM_SCOPE:
+        return jsonify({"error": "Use a token from POST /notifications/stream-token in ?jwt="}), 401
+
+    config = current_app.config
+    slots = stream_slots()
+    if not slots.acquire(blocking=False):
+        response = jsonify({"error": "Too many open notification streams, try again shortly"})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, config.get('STREAM_RETRY_MS', 3000) // 1000))
+        return response
+
+    subscription = None
+    try:
+        # Subscribe before reading so nothing published in between is missed
+        subscription = pubsub.subscribe(notification_events.user_channel(current_user_id))
+
+        initial_events = []
+        # Carries the newest notification's id so the reconnect after the
+        # stream ends replays anything published in between
+        resume_id = db.session.query(func.max(Notification.id)).filter(
+            Notification.user_id == current_user_id
+        ).scalar()
+        # On reconnect, replay what the client missed. A new EventSource
+        # (opened with a fresh stream token) can't set the header, so it
+        # passes ?last_event_id= instead.
+        last_event_id = request.headers.get('Last-Event-ID', type=int)
+        if last_event_id is None:
+            last_event_id = request.args.get('last_event_id', type=int)
+        if last_event_id is not None:
+            missed = Notification.query.filter(
+                Notification.user_id == current_user_id,
+                Notification.id > last_event_id
+            ).order_by(Notification.id).limit(STREAM_REPLAY_LIMIT).all()
+            initial_events.extend({"event": "notification", "id": n.id, "data": n.to_dict()} for n in missed)
+            if len(missed) == STREAM_REPLAY_LIMIT:
+                # The rest comes on the next reconnect
+                resume_id = missed[-1].id
+        initial_events.append({
+            "event": "unread_count",
+            "id": resume_id,
+            "data": {"unread_count": notification_events.unread_count(current_user_id)}
+        })
+
+        # Hand the connection back to the pool before streaming starts
+        db.session.close()
+    except Exception:
+        if subscription is not None:
+            pubsub.unsubscribe(subscription)
+        slots.release()
+        raise
+
+    stream = event_stream(subscription, initial_events, config.get('STREAM_MAX_SECONDS', 300),
+                          config.get('STREAM_RETRY_MS', 3000))
+    response = Response(stream, mimetype='text/event-stream')
+    # Runs however the response ends, even if the stream never started
+    response.call_on_close(slots.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -3,8 +3,9 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.report import Claim, Comment
 from app.models.reward import Reward
 from app.models.item import Item
-from app.extensions import db
-from app.models.user import User
+from app.extensions import db, cache
+from app.utils.auth import admin_required
+from app.services import dashboard, reconciliation
 
 report_bp = Blueprint('reports', __name__, url_prefix='/reports')
 
@@ -37,6 +38,7 @@ def create_report():
         
         db.session.add(item)
         db.session.commit()
+        cache.invalidate('items')
         
         return jsonify({
             "message": "Report created successfully",
@@ -86,6 +88,7 @@ def add_comment():
     )
     db.session.add(comment)
     db.session.commit()
+    cache.invalidate(f"comments:{data['item_id']}")
     return jsonify({"message": "Comment added."}), 201
 
 @report_bp.route('/rewards', methods=['POST'])
@@ -123,47 +126,20 @@ def get_user_rewards():
 
 # Admin methods
 @report_bp.route('/<int:report_id>/approve', methods=['PUT'])
-@jwt_required()
+@admin_required
 def approve_report(report_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    # Debug: Log the user role
-    print(f"User ID: {current_user_id}, Role: {user.role}")
-    
-    if user.role != 'admin':
-        return jsonify({"error": "Admin access required", "user_role": user.role}), 403
-    
     item = Item.query.get(report_id)
     if not item:
         return jsonify({"message": "Report not found"}), 404
     
     item.status = "approved"
     db.session.commit()
+    cache.invalidate('items')
     return jsonify({"message": "Report approved successfully"})
 
 @report_bp.route('/admin/reports', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_reports():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user or user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     items = Item.query.all()
     lost_items = []
     found_items = []
@@ -184,20 +160,35 @@ def get_all_reports():
         "found_items": found_items
     })
 
+# Longest window the dashboard's items-per-day series may cover
+MAX_DASHBOARD_DAYS = 365
+
+@report_bp.route('/admin/dashboard', methods=['GET'])
+@admin_required
+@cache.cached('dashboard', timeout=30)
+def get_dashboard():
+    """
+    Totals for the admin dashboard (admin only). Cached for up to 30 seconds.
+    """
+    days = request.args.get('days', 30, type=int)
+    if days < 1 or days > MAX_DASHBOARD_DAYS:
+        return jsonify({"error": f"days must be between 1 and {MAX_DASHBOARD_DAYS}"}), 400
+    return jsonify(dashboard.admin_dashboard(days)), 200
+
+@admin_required
+def get_rewards_summary():
+    """
+    Reward count and amount per status and per day (admin only), from the
+    totals `flask rewards summarize` precomputes
+    """
+    days = request.args.get('days', 30, type=int)
+    if days < 1 or days > MAX_DASHBOARD_DAYS:
+        return jsonify({"error": f"days must be between 1 and {MAX_DASHBOARD_DAYS}"}), 400
+    return jsonify(reconciliation.summary(days)), 200
+
 @report_bp.route('/admin/claims', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_claims():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user or user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     claims = Claim.query.all()
     return jsonify([{
         "id": claim.id,
@@ -208,19 +199,8 @@ def get_all_claims():
     } for claim in claims])
 
 @report_bp.route('/admin/claims/<int:claim_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_claim_status(claim_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    try:
-        current_user_id = int(current_user_id)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid user identity"}), 401
-    
-    user = User.query.get(current_user_id)
-    if not user or user.role != 'admin':
-        return jsonify({"error": "Admin access required"}), 403
-    
     data = request.get_json()
     claim = Claim.query.get(claim_id)
     
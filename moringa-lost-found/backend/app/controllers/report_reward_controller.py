@@ -5,25 +5,22 @@ from app.models.report import Report
 from app.models.reward import Reward
 from app.models.item import Item
 from app.models.user import User
-import os
-import requests
+from app.services import payouts
+from app.utils.auth import current_user
+from app.controllers.reward_controller import RewardController, positive_amount
 from datetime import datetime
 
 report_reward_bp = Blueprint('report_rewards', __name__, url_prefix='/api/reports')
 
 class ReportRewardController:
-    def __init__(self):
-        self.mpesa_api_key = os.getenv('MPESA_API_KEY', 'test_key')
-        self.mpesa_shortcode = os.getenv('MPESA_SHORTCODE', '174379')
-        self.mpesa_passkey = os.getenv('MPESA_PASSKEY', 'bfb279f9aa9bdbcf158e97dd71a467cd2e0c893059b10f78e6b72ada1ed2c919')
-        self.mpesa_endpoint = os.getenv('MPESA_ENDPOINT', 'https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest')
-
     @jwt_required()
     def create_reward_for_report(self, report_id):
         """Create a reward for a report with MPESA payment"""
         try:
-            data = request.get_json()
-            current_user_id = get_jwt_identity()
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({'error': 'Request body must be a JSON object'}), 400
+            user = current_user()
             
             # Validate required fields
             required_fields = ['amount', 'mpesa_phone_number', 'finder_user_id']
@@ -35,6 +32,13 @@ class ReportRewardController:
             report = Report.query.get(report_id)
             if not report:
                 return jsonify({'error': 'Report not found'}), 404
+            if user is None or (user.role != 'admin' and report.user_id != user.id):
+                return jsonify({'error': 'Only the report owner can offer a reward'}), 403
+            amount = positive_amount(data['amount'])
+            if amount is None:
+                return jsonify({'error': 'amount must be a positive number'}), 400
+            if data['finder_user_id'] == report.user_id or not db.session.get(User, data['finder_user_id']):
+                return jsonify({'error': 'finder_user_id must be another existing user'}), 400
             
             # Check if report already has a reward
             if report.reward:
@@ -45,8 +49,8 @@ class ReportRewardController:
                 item_id=report.item_id,
                 report_id=report.id,
                 finder_user_id=data['finder_user_id'],
-                owner_user_id=current_user_id,
-                amount=float(data['amount']),
+                owner_user_id=report.user_id,
+                amount=amount,
                 mpesa_phone_number=data['mpesa_phone_number']
             )
             
@@ -54,7 +58,7 @@ class ReportRewardController:
             db.session.commit()
             
             # Update report
-            report.reward_amount = float(data['amount'])
+            report.reward_amount = amount
             report.reward_status = 'offered'
             report.mpesa_phone_number = data['mpesa_phone_number']
             db.session.commit()
@@ -85,24 +89,27 @@ class ReportRewardController:
                 return jsonify({'error': 'No reward found for this report'}), 404
             
             reward = report.reward
+            user = current_user()
+            if user is None or (user.role != 'admin' and reward.owner_user_id != user.id):
+                return jsonify({'error': 'Only the reward owner can pay it'}), 403
             
             if reward.status != 'pending':
                 return jsonify({'error': 'Payment already processed'}), 400
             
-            # Simulate MPESA payment initiation
-            transaction_id = f'MPESA{reward.id}{int(datetime.now().timestamp())}'
-            
-            reward.status = 'initiated'
-            reward.mpesa_transaction_id = transaction_id
+            # The payout worker sends the STK push; this only queues it
+            job = payouts.enqueue(reward.id)
+            if job is None:
+                return jsonify({'error': 'Payment already processed'}), 400
             report.reward_status = 'initiated'
             db.session.commit()
             
             return jsonify({
-                'message': 'MPESA payment initiated',
-                'transaction_id': transaction_id,
+                'message': 'MPESA payment queued',
+                'job_id': job.id,
+                'status': job.status,
                 'amount': reward.amount,
                 'phone_number': reward.mpesa_phone_number
-            }), 200
+            }), 202
             
         except Exception as e:
             db.session.rollback()
@@ -110,26 +117,38 @@ class ReportRewardController:
 
     @jwt_required()
     def get_report_with_reward(self, report_id):
-        """Get report details with reward information"""
+        """Get report details with reward information (its reporter, the finder or an admin only)"""
         try:
             report = Report.query.get(report_id)
             if not report:
                 return jsonify({'error': 'Report not found'}), 404
             
+            reward = report.reward
+            user = current_user()
+            admin = user is not None and user.role == 'admin'
+            is_owner = user is not None and report.user_id == user.id
+            is_finder = user is not None and reward is not None and reward.finder_user_id == user.id
+            if not (admin or is_owner or is_finder):
+                return jsonify({'error': 'Not your report'}), 403
+            
+            reward_data = {
+                'id': reward.id if reward else None,
+                'amount': reward.amount if reward else None,
+                'status': reward.status if reward else None,
+                'mpesa_transaction_id': reward.mpesa_transaction_id if reward else None
+            }
+            # The paying number is the owner's; finders don't see it
+            if reward and (admin or reward.owner_user_id == user.id):
+                reward_data['mpesa_phone_number'] = reward.mpesa_phone_number
+            
             return jsonify({
                 'report': {
                     'id': report.id,
                     'item_id': report.item_id,
                     'user_id': report.user_id,
-                    'is_approved': report.is_approved,
-                    'created_at': report.created_at.isoformat(),
-                    'reward': {
-                        'id': report.reward.id if report.reward else None,
-                        'amount': report.reward.amount if report.reward else None,
-                        'status': report.reward.status if report.reward else None,
-                        'mpesa_phone_number': report.reward.mpesa_phone_number if report.reward else None,
-                        'mpesa_transaction_id': report.reward.mpesa_transaction_id if report.reward else None
-                    }
+                    'reward_status': report.reward_status,
+                    'created_at': report.created_at.isoformat() if report.created_at else None,
+                    'reward': reward_data
                 }
             }), 200
             
@@ -139,31 +158,4 @@ class ReportRewardController:
     @jwt_required()
     def get_user_rewards(self):
         """Get rewards for the current user"""
-        try:
-            user_id = get_jwt_identity()
-            
-            rewards_given = Reward.query.filter_by(owner_user_id=user_id).all()
-            rewards_received = Reward.query.filter_by(finder_user_id=user_id).all()
-            
-            def format_reward(reward):
-                return {
-                    'id': reward.id,
-                    'item_name': reward.item.name,
-                    'amount': reward.amount,
-                    'status': reward.status,
-                    'mpesa_phone_number': reward.mpesa_phone_number,
-                    'mpesa_transaction_id': reward.mpesa_transaction_id,
-                    'created_at': reward.created_at.isoformat(),
-                    'other_party': {
-                        'username': reward.finder.username if reward.owner_user_id == user_id else reward.owner.username,
-                        'phone': reward.finder.phone if reward.owner_user_id == user_id else reward.owner.phone
-                    }
-                }
-            
-            return jsonify({
-                'rewards_given': [format_reward(r) for r in rewards_given],
-                'rewards_received': [format_reward(r) for r in rewards_received]
-            }), 200
-            
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        return RewardController().get_user_rewards(get_jwt_identity())
@@ -1,26 +1,42 @@
+import math
 from flask import jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import aliased
 from app.models.reward import Reward
 from app.models.item import Item
 from app.models.user import User
+from app.models.payout_job import PayoutJob
+from app.services import payouts, mpesa_callbacks, reward_history
 from app.extensions import db
-import requests
-import os
-import time
+from app.utils.pagination import paginate, wants_page, InvalidPageRequest
 
-class RewardController:
-    def __init__(self):
-        self.mpesa_api_key = os.getenv('MPESA_API_KEY', 'test_key')
-        self.mpesa_shortcode = os.getenv('MPESA_SHORTCODE', '174379')
-        self.mpesa_passkey = os.getenv('MPESA_PASSKEY', 'bfb279f9aa9bdbcf158e97dd71a467cd2e0c893059b10f78e6b72ada1ed2c919')
-        self.mpesa_endpoint = os.getenv('MPESA_ENDPOINT', 'https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest')
+def positive_amount(value):
+    """
+    `value` as a float if it is a positive, finite number; otherwise None
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return amount if math.isfinite(amount) and amount > 0 else None
 
-    def create_reward(self, item_id, finder_user_id, amount, phone_number):
-        """Create a new reward for finding an item"""
+class RewardController:
+    def create_reward(self, item_id, finder_user_id, amount, phone_number, user_id, admin=False):
+        """Create a new reward for finding an item (its reporter or an admin only)"""
         try:
             item = Item.query.get(item_id)
             if not item:
                 return jsonify({'error': 'Item not found'}), 404
+            if not admin and item.reported_by != user_id:
+                return jsonify({'error': 'Only the item owner can offer a reward'}), 403
+            
+            amount = positive_amount(amount)
+            if amount is None:
+                return jsonify({'error': 'amount must be a positive number'}), 400
+            if finder_user_id == item.reported_by or not db.session.get(User, finder_user_id):
+                return jsonify({'error': 'finder_user_id must be another existing user'}), 400
             
             if item.status != 'found':
                 return jsonify({'error': 'Item must be marked as found to create reward'}), 400
@@ -33,7 +49,7 @@ class RewardController:
             reward = Reward(
                 item_id=item_id,
                 finder_user_id=finder_user_id,
-                owner_user_id=item.user_id,
+                owner_user_id=item.reported_by,
                 amount=amount,
                 mpesa_phone_number=phone_number
             )
@@ -56,101 +72,122 @@ class RewardController:
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
 
-    def initiate_mpesa_payment(self, reward_id):
-        """Initiate M-Pesa payment for reward"""
+    def initiate_mpesa_payment(self, reward_id, user_id, admin=False):
+        """Initiate M-Pesa payment for reward (its owner or an admin only)"""
         try:
             reward = Reward.query.get(reward_id)
             if not reward:
                 return jsonify({'error': 'Reward not found'}), 404
+            if not admin and reward.owner_user_id != user_id:
+                return jsonify({'error': 'Only the reward owner can pay it'}), 403
             
             if reward.status != 'pending':
                 return jsonify({'error': 'Reward payment already processed'}), 400
             
-            # In production, this would integrate with M-Pesa API
-            # For now, we'll simulate the payment process
-            
-            # Simulate M-Pesa STK Push
-            payment_data = {
-                'BusinessShortCode': self.mpesa_shortcode,
-                'Password': self.mpesa_passkey,
-                'Timestamp': '20240718120000',
-                'TransactionType': 'CustomerPayBillOnline',
-                'Amount': reward.amount,
-                'PartyA': reward.mpesa_phone_number,
-                'PartyB': self.mpesa_shortcode,
-                'PhoneNumber': reward.mpesa_phone_number,
-                'CallBackURL': 'https://your-callback-url.com/mpesa/callback',
-                'AccountReference': f'REWARD-{reward.id}',
-                'TransactionDesc': f'Reward for finding item {reward.item_id}'
-            }
-            
-            # Simulate successful payment initiation
-            reward.status = 'initiated'
-            reward.mpesa_transaction_id = f'MPESA{reward.id}{int(time.time())}'
+            # The payout worker sends the STK push; this only queues it
+            job = payouts.enqueue(reward.id)
+            if job is None:
+                return jsonify({'error': 'Reward payment already processed'}), 400
             db.session.commit()
             
             return jsonify({
-                'message': 'M-Pesa payment initiated successfully',
-                'transaction_id': reward.mpesa_transaction_id,
+                'message': 'M-Pesa payment queued',
+                'job_id': job.id,
+                'status': job.status,
                 'amount': reward.amount,
                 'phone_number': reward.mpesa_phone_number
-            }), 200
+            }), 202
             
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
 
+    def get_payout_job(self, job_id, user_id, admin=False):
+        """Get the state of a queued M-Pesa payment"""
+        job = PayoutJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Payout job not found'}), 404
+        if not admin and user_id not in (job.reward.owner_user_id, job.reward.finder_user_id):
+            return jsonify({'error': 'Unauthorized'}), 403
+        return jsonify({'job': job.to_dict(), 'reward_status': job.reward.status}), 200
+
+    def get_reward(self, reward_id, user_id, admin=False):
+        """Get a reward with its item and both parties (its owner, finder or an admin only)"""
+        finder = aliased(User)
+        owner = aliased(User)
+        row = db.session.query(
+            Reward, Item.name, Item.description, owner.username, finder.username
+        ).join(Item, Item.id == Reward.item_id).join(owner, owner.id == Reward.owner_user_id) \
+            .outerjoin(finder, finder.id == Reward.finder_user_id).filter(Reward.id == reward_id).first()
+        if row is None:
+            return jsonify({'error': 'Reward not found'}), 404
+        reward, item_name, item_description, owner_username, finder_username = row
+        if not admin and user_id not in (reward.owner_user_id, reward.finder_user_id):
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        details = {
+            'id': reward.id,
+            'item': {
+                'id': reward.item_id,
+                'name': item_name,
+                'description': item_description
+            },
+            'amount': reward.amount,
+            'status': reward.status,
+            'mpesa_transaction_id': reward.mpesa_transaction_id,
+            'finder': {
+                'id': reward.finder_user_id,
+                'username': finder_username
+            } if reward.finder_user_id else None,
+            'owner': {
+                'id': reward.owner_user_id,
+                'username': owner_username
+            },
+            'created_at': reward.created_at.isoformat()
+        }
+        # The paying phone number is the owner's; the finder doesn't see it
+        if admin or user_id == reward.owner_user_id:
+            details['mpesa_phone_number'] = reward.mpesa_phone_number
+        return jsonify(details), 200
+
     def get_user_rewards(self, user_id):
-        """Get rewards for a specific user (both given and received)"""
+        """
+        Rewards the user gave and received, with items and the other party,
+        from a single query. Pass `limit`/`after` (and optionally
+        `direction=given|received`) for keyset pages of the merged history.
+        """
         try:
-            rewards_given = Reward.query.filter_by(owner_user_id=user_id).all()
-            rewards_received = Reward.query.filter_by(finder_user_id=user_id).all()
-            
-            def format_reward(reward):
-                return {
-                    'id': reward.id,
-                    'item_name': reward.item.name,
-                    'amount': reward.amount,
-                    'status': reward.status,
-                    'mpesa_transaction_id': reward.mpesa_transaction_id,
-                    'mpesa_phone_number': reward.mpesa_phone_number,
-                    'created_at': reward.created_at.isoformat(),
-                    'other_party': {
-                        'username': reward.finder.username if reward.owner_user_id == user_id else reward.owner.username,
-                        'phone': reward.finder.phone if reward.owner_user_id == user_id else reward.owner.phone
-                    }
-                }
-            
+            user_id = int(user_id)
+            direction = request.args.get('direction')
+            if direction is not None and direction not in reward_history.DIRECTIONS:
+                return jsonify({'error': "direction must be 'given' or 'received'"}), 400
+
+            if not wants_page():
+                return jsonify(reward_history.given_and_received(user_id, direction)), 200
+
+            try:
+                page = paginate(reward_history.history_query(user_id, direction), Reward)
+            except InvalidPageRequest as e:
+                return jsonify({'error': str(e)}), 400
             return jsonify({
-                'rewards_given': [format_reward(r) for r in rewards_given],
-                'rewards_received': [format_reward(r) for r in rewards_received]
+                'rewards': [reward_history.to_dict(row, user_id) for row in page.items],
+                'next_cursor': page.next_cursor
             }), 200
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
-    def update_reward_status(self, reward_id, status, transaction_id=None):
-        """Update reward status after M-Pesa callback"""
+    def ingest_mpesa_callback(self, payload, raw=None):
+        """Record an M-Pesa STK push callback and apply its result once"""
         try:
-            reward = Reward.query.get(reward_id)
-            if not reward:
-                return jsonify({'error': 'Reward not found'}), 404
-            
-            reward.status = status
-            if transaction_id:
-                reward.mpesa_transaction_id = transaction_id
-            
+            outcome = mpesa_callbacks.ingest(payload, raw)
             db.session.commit()
-            
-            return jsonify({
-                'message': f'Reward status updated to {status}',
-                'reward': {
-                    'id': reward.id,
-                    'status': reward.status,
-                    'transaction_id': reward.mpesa_transaction_id
-                }
-            }), 200
-            
+        except mpesa_callbacks.InvalidCallback as e:
+            db.session.rollback()
+            return jsonify({'ResultCode': 1, 'ResultDesc': str(e)}), 400
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
+
+        # Duplicates are acknowledged too, or Safaricom keeps retrying them
+        return jsonify({'ResultCode': 0, 'ResultDesc': 'Accepted', 'outcome': outcome}), 200
@@ -4,7 +4,9 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 from app.models.user import User
 from app.models.item import Item
 from app.models.report import Comment
-from app import db
+from app.extensions import db, cache
+from app.utils.pagination import wants_page
+from app.controllers.item_controller import paged_items_response, PUBLIC_CACHE_CONTROL
 
 # Register a new user
 def register_user():
@@ -62,34 +64,39 @@ def get_user_profile():
         "role": user.role
     })
 
-# Get all items
-def get_items():
-    items = Item.query.all()
-    return jsonify([{
+def serialize_item(item):
+    return {
         "id": item.id,
         "name": item.name,
         "description": item.description,
         "status": item.status,
         "location_found": item.location_found,
         "created_at": item.created_at.isoformat()
-    } for item in items])
+    }
+
+# Get all items
+@cache.conditional('items', cache_control=PUBLIC_CACHE_CONTROL)
+@cache.cached('items')
+def get_items():
+    query = Item.query
+    if wants_page():
+        return paged_items_response(query, serialize_item)
+
+    items = query.all()
+    return jsonify([serialize_item(item) for item in items])
 
 # Get item by ID
+@cache.conditional('items', cache_control=PUBLIC_CACHE_CONTROL)
+@cache.cached('items')
 def get_item_by_id(item_id):
     item = Item.query.get(item_id)
     if not item:
         return jsonify({"message": "Item not found"}), 404
     
-    return jsonify({
-        "id": item.id,
-        "name": item.name,
-        "description": item.description,
-        "status": item.status,
-        "location_found": item.location_found,
-        "created_at": item.created_at.isoformat()
-    })
+    return jsonify(serialize_item(item))
 
 # Get comments for an item
+@cache.conditional(lambda item_id: f"comments:{item_id}", cache_control=PUBLIC_CACHE_CONTROL)
 def get_item_comments(item_id):
     comments = Comment.query.filter_by(item_id=item_id).all()
     return jsonify([{
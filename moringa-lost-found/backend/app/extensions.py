@@ -1,7 +1,19 @@
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
+from app.utils.cache import ResponseCache
+from app.utils.pubsub import PubSub
+from app.utils.query_stats import QueryCounter
+from app.utils.metrics import Metrics
+from app.utils.images import ImageStore
+from app.utils.mpesa import MpesaClient
 
 db = SQLAlchemy()
 jwt = JWTManager()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+cache = ResponseCache()
+pubsub = PubSub()
+query_counter = QueryCounter()
+metrics = Metrics()
+images = ImageStore()
+mpesa = MpesaClient()
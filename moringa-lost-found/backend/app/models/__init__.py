@@ -7,3 +7,14 @@ from .item import Item
 from .report import Report, Claim, Comment
 from .reward import Reward
 from .notification import Notification
+from .notification_counter import NotificationCounter
+from .item_match import ItemMatch
+from .payout_job import PayoutJob
+from .mpesa_callback import MpesaCallback
+from .reward_ledger import RewardMismatch, RewardDailyTotal
+
+# Register the full-text search DDL on the items table
+from . import search_index
+
+# Make SQLite enforce foreign keys and their ON DELETE actions
+from . import sqlite_pragmas
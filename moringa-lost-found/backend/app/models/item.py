@@ -1,8 +1,27 @@
 from datetime import datetime
 from app.extensions import db
+from app.utils.images import image_urls
 
 class Item(db.Model):
     __tablename__ = 'items'
+    __table_args__ = (
+        # Keyset pagination indexes for the public (approved only), per-user
+        # and full item feeds
+        db.Index('ix_items_approved_created_at_id', 'created_at', 'id',
+                 postgresql_where=db.text("approval_status = 'approved'"),
+                 sqlite_where=db.text("approval_status = 'approved'")),
+        db.Index('ix_items_reported_by_created_at_id', 'reported_by', 'created_at', 'id'),
+        db.Index('ix_items_created_at_id', 'created_at', 'id'),
+        # The moderation queue, which is only ever read by this predicate
+        db.Index('ix_items_pending_created_at', 'created_at',
+                 postgresql_where=db.text("approval_status = 'pending'"),
+                 sqlite_where=db.text("approval_status = 'pending'")),
+        # Admin status views and the open lost items used by matching; with
+        # category it also covers the dashboard's grouped counts
+        db.Index('ix_items_status_approval_status_category', 'status', 'approval_status', 'category'),
+        # Covers loading the photo hashes of recent items for duplicate detection
+        db.Index('ix_items_created_at_image_hash_id', 'created_at', 'image_hash', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
@@ -12,13 +31,33 @@ class Item(db.Model):
     category = db.Column(db.String(50), default='other')
     location_found = db.Column(db.String(200))
     image_url = db.Column(db.String(200))
+    # Key of an uploaded image in the image store ('<sha256>.<ext>'); image_url then points at it
+    image_key = db.Column(db.String(80))
+    # Perceptual (difference) hash of the uploaded image, for spotting duplicate reports
+    image_hash = db.Column(db.BigInteger)
     reported_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
 
-    # Relationships
-    claims = db.relationship('Claim', lazy=True)
-    comments = db.relationship('Comment', lazy=True)
-    rewards = db.relationship('Reward', lazy=True)
+    # Relationships. Children are removed by the database's ON DELETE
+    # CASCADE, so deleting an item never loads them.
+    claims = db.relationship('Claim', lazy=True, cascade='save-update, merge, delete', passive_deletes=True)
+    comments = db.relationship('Comment', lazy=True, cascade='save-update, merge, delete', passive_deletes=True)
+    rewards = db.relationship('Reward', lazy=True, cascade='save-update, merge, delete', passive_deletes=True)
 
     def __repr__(self):
         return f'<Item {self.name} - {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'approval_status': self.approval_status,
+            'description': self.description,
+            'location_found': self.location_found,
+            'reported_by': self.reported_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'image_url': self.image_url,
+            'images': image_urls(self.image_key),
+            'category': self.category
+        }
@@ -0,0 +1,31 @@
+from datetime import datetime
+from app.extensions import db
+
+class ItemMatch(db.Model):
+    __tablename__ = 'item_matches'
+    __table_args__ = (
+        db.UniqueConstraint('found_item_id', 'lost_item_id', name='uq_item_matches_found_lost'),
+        db.Index('ix_item_matches_lost_item_id', 'lost_item_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    found_item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='CASCADE'), nullable=False)
+    lost_item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='CASCADE'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
+
+    # Relationships
+    found_item = db.relationship('Item', foreign_keys=[found_item_id])
+    lost_item = db.relationship('Item', foreign_keys=[lost_item_id])
+
+    def __repr__(self):
+        return f'<ItemMatch found {self.found_item_id} -> lost {self.lost_item_id} ({self.score:.2f})>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'found_item_id': self.found_item_id,
+            'lost_item_id': self.lost_item_id,
+            'score': self.score,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
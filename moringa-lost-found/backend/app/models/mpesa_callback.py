@@ -0,0 +1,28 @@
+from datetime import datetime
+from app.extensions import db
+
+class MpesaCallback(db.Model):
+    """
+    Raw M-Pesa STK push callbacks, one row per transaction. Rows are only
+    ever inserted; a retried delivery of the same transaction conflicts on
+    checkout_request_id and is dropped (see app.services.mpesa_callbacks).
+    """
+    __tablename__ = 'mpesa_callbacks'
+    __table_args__ = (
+        db.UniqueConstraint('checkout_request_id', name='uq_mpesa_callbacks_checkout_request_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    checkout_request_id = db.Column(db.String(100), nullable=False)
+    merchant_request_id = db.Column(db.String(100), nullable=True)
+    result_code = db.Column(db.Integer, nullable=False)
+    result_desc = db.Column(db.String(255), nullable=True)
+    # Only successful payments carry a receipt, amount and phone number
+    receipt_number = db.Column(db.String(50), nullable=True)
+    amount = db.Column(db.Float, nullable=True)
+    phone_number = db.Column(db.String(20), nullable=True)
+    payload = db.Column(db.Text, nullable=False)
+    received_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
+
+    def __repr__(self):
+        return f'<MpesaCallback {self.checkout_request_id} result {self.result_code}>'
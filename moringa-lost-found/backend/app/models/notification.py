@@ -3,6 +3,13 @@ from app.extensions import db
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # A user's notifications, newest first
+        db.Index('ix_notifications_user_id_created_at', 'user_id', 'created_at'),
+        # Only the unread rows, for the unread list, mark-all-read and recounts
+        db.Index('ix_notifications_unread_user_id_created_at', 'user_id', 'created_at',
+                 postgresql_where=db.text('is_read = false'), sqlite_where=db.text('is_read = 0')),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -10,12 +17,13 @@ class Notification(db.Model):
     message = db.Column(db.Text, nullable=False)
     type = db.Column(db.String(50), default='info')  # 'info', 'success', 'warning', 'error'
     is_read = db.Column(db.Boolean, default=False)
-    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=True)  # Optional reference to related item
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='SET NULL'), nullable=True)  # Optional reference to related item
     created_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
 
     # Relationships
     user = db.relationship('User', backref='notifications', lazy=True)
-    item = db.relationship('Item', backref='notifications', lazy=True)
+    # Deleting an item keeps its notifications; the database clears item_id
+    item = db.relationship('Item', backref=db.backref('notifications', passive_deletes=True), lazy=True)
 
     def __repr__(self):
         return f'<Notification {self.title} for User {self.user_id}>'
@@ -0,0 +1,15 @@
+from app.extensions import db
+
+class NotificationCounter(db.Model):
+    """
+    Denormalized count of a user's unread notifications. Kept in step with
+    `notifications` by app.services.notification_counters inside the same
+    transaction as each write; `flask notifications recount` repairs drift.
+    """
+    __tablename__ = 'notification_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<NotificationCounter user {self.user_id}: {self.unread_count} unread>'
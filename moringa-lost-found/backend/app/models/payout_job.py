@@ -0,0 +1,44 @@
+from datetime import datetime
+from app.extensions import db
+
+class PayoutJob(db.Model):
+    """
+    A queued M-Pesa payment request for a reward. The API only inserts the
+    job; `flask payouts work` sends it (see app.services.payouts).
+    """
+    __tablename__ = 'payout_jobs'
+    __table_args__ = (
+        # Jobs due for a (re)try, oldest first
+        db.Index('ix_payout_jobs_status_run_at', 'status', 'run_at'),
+        db.Index('ix_payout_jobs_reward_id', 'reward_id'),
+        db.UniqueConstraint('checkout_request_id', name='uq_payout_jobs_checkout_request_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    reward_id = db.Column(db.Integer, db.ForeignKey('rewards.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sending, sent, unknown, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # When a queued job is next due, or when a sending job's lease runs out
+    run_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.utcnow())
+    # Daraja's id for an accepted STK push; its callback refers to it
+    checkout_request_id = db.Column(db.String(100), nullable=True)
+    last_error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.utcnow(), onupdate=lambda: datetime.utcnow())
+
+    reward = db.relationship('Reward', backref=db.backref('payout_jobs', lazy=True, passive_deletes=True))
+
+    def __repr__(self):
+        return f'<PayoutJob {self.id} for Reward {self.reward_id} - {self.status}>'
+
+    def to_dict(self):
+        # checkout_request_id stays server-side: it is all a forged callback would need
+        return {
+            'id': self.id,
+            'reward_id': self.reward_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
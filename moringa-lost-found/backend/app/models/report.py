@@ -3,10 +3,14 @@ from app.extensions import db
 
 class Report(db.Model):
     __tablename__ = 'reports'
+    __table_args__ = (
+        db.Index('ix_reports_item_id', 'item_id'),
+        db.Index('ix_reports_user_id', 'user_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='CASCADE'), nullable=False)
     reward_amount = db.Column(db.Float, nullable=True)
     reward_status = db.Column(db.String(20), nullable=True)
     mpesa_phone_number = db.Column(db.String(20), nullable=True)
@@ -14,17 +18,30 @@ class Report(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
 
     # user relationship is defined in User model
-    item = db.relationship('Item', backref='reports')
-    rewards = db.relationship('Reward', backref='report', lazy=True)
+    item = db.relationship('Item', backref=db.backref(
+        'reports', cascade='save-update, merge, delete', passive_deletes=True
+    ))
+    rewards = db.relationship('Reward', backref='report', lazy=True, passive_deletes=True)
+
+    @property
+    def reward(self):
+        # A report is given at most one reward
+        return self.rewards[0] if self.rewards else None
 
     def __repr__(self):
         return f'<Report {self.id} by User {self.user_id} for Item {self.item_id}>'
 
 class Claim(db.Model):
     __tablename__ = 'claims'
+    __table_args__ = (
+        # Claims of an item (optionally by status), and the admin pending-claims queue
+        db.Index('ix_claims_item_id_status', 'item_id', 'status'),
+        db.Index('ix_claims_status_created_at', 'status', 'created_at'),
+        db.Index('ix_claims_claimant_id', 'claimant_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='CASCADE'), nullable=False)
     claimant_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     status = db.Column(db.String(20), default='pending')
     created_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
@@ -37,9 +54,12 @@ class Claim(db.Model):
 
 class Comment(db.Model):
     __tablename__ = 'comments'
+    __table_args__ = (
+        db.Index('ix_comments_item_id_created_at', 'item_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='CASCADE'), nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     comment_text = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
@@ -3,16 +3,22 @@ from app.extensions import db
 
 class Reward(db.Model):
     __tablename__ = 'rewards'
+    __table_args__ = (
+        db.Index('ix_rewards_item_id', 'item_id'),
+        # Rewards given / received by a user, newest first
+        db.Index('ix_rewards_owner_user_id_created_at', 'owner_user_id', 'created_at'),
+        db.Index('ix_rewards_finder_user_id_created_at', 'finder_user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    report_id = db.Column(db.Integer, db.ForeignKey('reports.id'), nullable=True)
-    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id', ondelete='SET NULL'), nullable=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='CASCADE'), nullable=False)
     finder_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     owner_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     mpesa_transaction_id = db.Column(db.String(100), unique=True, nullable=True)
     mpesa_phone_number = db.Column(db.String(20), nullable=True)
-    status = db.Column(db.String(20), default='pending')  # pending, completed, failed
+    status = db.Column(db.String(20), default='pending')  # pending, initiated, completed, failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
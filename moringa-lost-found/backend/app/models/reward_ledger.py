@@ -0,0 +1,61 @@
+from datetime import datetime
+from app.extensions import db
+
+class RewardMismatch(db.Model):
+    """
+    A disagreement between the rewards table and an imported M-Pesa
+    statement, found by `flask rewards reconcile`. Rows of one run share a
+    run_id; the ledger_* columns come from the reward, the statement_*
+    columns from the statement.
+    """
+    __tablename__ = 'reward_mismatches'
+    __table_args__ = (
+        db.Index('ix_reward_mismatches_run_id_kind', 'run_id', 'kind'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.String(32), nullable=False)
+    # missing_receipt, missing_from_statement, missing_from_ledger, duplicate_in_statement,
+    # amount_mismatch, status_mismatch
+    kind = db.Column(db.String(30), nullable=False)
+    reward_id = db.Column(db.Integer, db.ForeignKey('rewards.id', ondelete='SET NULL'), nullable=True)
+    receipt_number = db.Column(db.String(100), nullable=True)
+    ledger_amount = db.Column(db.Float, nullable=True)
+    statement_amount = db.Column(db.Float, nullable=True)
+    ledger_status = db.Column(db.String(20), nullable=True)
+    statement_status = db.Column(db.String(50), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.utcnow())
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'run_id': self.run_id,
+            'kind': self.kind,
+            'reward_id': self.reward_id,
+            'receipt_number': self.receipt_number,
+            'ledger_amount': self.ledger_amount,
+            'statement_amount': self.statement_amount,
+            'ledger_status': self.ledger_status,
+            'statement_status': self.statement_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<RewardMismatch {self.kind} reward {self.reward_id} receipt {self.receipt_number}>'
+
+class RewardDailyTotal(db.Model):
+    """
+    Reward count and amount per day created and status. Rebuilt from the
+    rewards table by `flask rewards summarize` (and after each reconcile)
+    so GET /admin/rewards/summary never scans rewards.
+    """
+    __tablename__ = 'reward_daily_totals'
+
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<RewardDailyTotal {self.day} {self.status}: {self.count}>'
@@ -0,0 +1,58 @@
+from sqlalchemy import DDL, event
+from app.models.item import Item
+
+# Full-text index over item name, description and location.
+#
+# Postgres keeps a weighted tsvector in a generated column with a GIN index;
+# SQLite (dev/test) keeps an external-content FTS5 table maintained by
+# triggers. Either way the database updates the index on every write to
+# `items`, so ORM writes and set-based UPDATE/DELETE statements stay in sync.
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE items ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(location_found, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX ix_items_search_vector ON items USING gin (search_vector)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE items_fts USING fts5(
+        name, description, location_found,
+        content='items', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, name, description, location_found)
+        VALUES (new.id, new.name, new.description, new.location_found);
+    END
+    """,
+    """
+    CREATE TRIGGER items_fts_ad AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, description, location_found)
+        VALUES ('delete', old.id, old.name, old.description, old.location_found);
+    END
+    """,
+    """
+    CREATE TRIGGER items_fts_au AFTER UPDATE OF name, description, location_found ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, description, location_found)
+        VALUES ('delete', old.id, old.name, old.description, old.location_found);
+        INSERT INTO items_fts(rowid, name, description, location_found)
+        VALUES (new.id, new.name, new.description, new.location_found);
+    END
+    """,
+]
+
+for statement in POSTGRES_DDL:
+    event.listen(Item.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+for statement in SQLITE_DDL:
+    event.listen(Item.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+event.listen(Item.__table__, 'after_drop', DDL("DROP TABLE IF EXISTS items_fts").execute_if(dialect='sqlite'))
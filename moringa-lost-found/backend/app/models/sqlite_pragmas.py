@@ -0,0 +1,13 @@
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# SQLite (dev/test) only enforces foreign keys, and so only runs their
+# ON DELETE actions, on connections that ask for it. Postgres always does.
+
+@event.listens_for(Engine, 'connect')
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
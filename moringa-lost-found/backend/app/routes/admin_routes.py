@@ -12,3 +12,5 @@ admin_bp.route('/reports', methods=['GET'])(report_controller.get_all_reports)
 admin_bp.route('/reports/<int:report_id>/approve', methods=['PUT'])(report_controller.approve_report)
 admin_bp.route('/claims', methods=['GET'])(report_controller.get_all_claims)
 admin_bp.route('/claims/<int:claim_id>', methods=['PUT'])(report_controller.update_claim_status)
+admin_bp.route('/dashboard', methods=['GET'])(report_controller.get_dashboard)
+admin_bp.route('/rewards/summary', methods=['GET'])(report_controller.get_rewards_summary)
@@ -0,0 +1 @@
+from app.controllers.image_controller import image_bp
@@ -8,4 +8,6 @@ notification_bp.route('', methods=['GET'])(notification_controller.get_user_noti
 notification_bp.route('/<int:notification_id>/read', methods=['PUT'])(notification_controller.mark_notification_as_read)
 notification_bp.route('/mark-all-read', methods=['PUT'])(notification_controller.mark_all_notifications_as_read)
 notification_bp.route('/<int:notification_id>', methods=['DELETE'])(notification_controller.delete_notification)
-notification_bp.route('/unread-count', methods=['GET'])(notification_controller.get_unread_count)
\ No newline at end of file
+notification_bp.route('/unread-count', methods=['GET'])(notification_controller.get_unread_count)
+notification_bp.route('/stream-token', methods=['POST'])(notification_controller.get_stream_token)
+notification_bp.route('/stream', methods=['GET'])(notification_controller.stream_notifications)
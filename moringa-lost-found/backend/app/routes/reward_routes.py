@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify
+import hmac
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.controllers.reward_controller import RewardController
+from app.utils.auth import is_admin
 
 reward_bp = Blueprint('rewards', __name__, url_prefix='/api/rewards')
 reward_controller = RewardController()
@@ -11,7 +13,9 @@ def create_reward():
     """Create a new reward for finding an item"""
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
         
         required_fields = ['item_id', 'finder_user_id', 'amount', 'phone_number']
         for field in required_fields:
@@ -22,7 +26,9 @@ def create_reward():
             data['item_id'],
             data['finder_user_id'],
             data['amount'],
-            data['phone_number']
+            data['phone_number'],
+            int(user_id),
+            admin=is_admin()
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -32,7 +38,16 @@ def create_reward():
 def initiate_payment(reward_id):
     """Initiate M-Pesa payment for reward"""
     try:
-        return reward_controller.initiate_mpesa_payment(reward_id)
+        return reward_controller.initiate_mpesa_payment(reward_id, int(get_jwt_identity()), admin=is_admin())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reward_bp.route('/payout-jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_payout_job(job_id):
+    """Get the state of a queued M-Pesa payment"""
+    try:
+        return reward_controller.get_payout_job(job_id, int(get_jwt_identity()), admin=is_admin())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -46,49 +61,26 @@ def get_my_rewards():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@reward_bp.route('/<int:reward_id>/callback', methods=['POST'])
-def mpesa_callback(reward_id):
+@reward_bp.route('/mpesa/callback', methods=['POST'])
+def mpesa_callback():
     """Handle M-Pesa callback for payment status"""
-    try:
-        data = request.get_json()
-        status = data.get('status', 'completed')
-        transaction_id = data.get('transaction_id')
-        
-        return reward_controller.update_reward_status(reward_id, status, transaction_id)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    token = current_app.config.get('MPESA_CALLBACK_TOKEN')
+    if not token and not current_app.config.get('TESTING'):
+        # Anyone could otherwise settle a reward by posting a made-up success
+        current_app.logger.error("Rejected an M-Pesa callback: MPESA_CALLBACK_TOKEN is not set")
+        return jsonify({'error': 'Callbacks are disabled until MPESA_CALLBACK_TOKEN is set'}), 403
+    if token and not hmac.compare_digest(request.args.get('token', ''), token):
+        return jsonify({'error': 'Unauthorized'}), 403
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'ResultCode': 1, 'ResultDesc': 'Expected a JSON body'}), 400
+    return reward_controller.ingest_mpesa_callback(data, request.get_data(as_text=True))
 
 @reward_bp.route('/<int:reward_id>', methods=['GET'])
 @jwt_required()
 def get_reward(reward_id):
     """Get specific reward details"""
     try:
-        reward = Reward.query.get(reward_id)
-        if not reward:
-            return jsonify({'error': 'Reward not found'}), 404
-        
-        return jsonify({
-            'id': reward.id,
-            'item': {
-                'id': reward.item.id,
-                'name': reward.item.name,
-                'description': reward.item.description
-            },
-            'amount': reward.amount,
-            'status': reward.status,
-            'mpesa_transaction_id': reward.mpesa_transaction_id,
-            'mpesa_phone_number': reward.mpesa_phone_number,
-            'finder': {
-                'id': reward.finder.id,
-                'username': reward.finder.username,
-                'phone': reward.finder.phone
-            },
-            'owner': {
-                'id': reward.owner.id,
-                'username': reward.owner.username,
-                'phone': reward.owner.phone
-            },
-            'created_at': reward.created_at.isoformat()
-        }), 200
+        return reward_controller.get_reward(reward_id, int(get_jwt_identity()), admin=is_admin())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
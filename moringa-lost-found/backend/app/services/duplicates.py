@@ -0,0 +1,174 @@
+import functools
+import itertools
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from app.extensions import db
+from app.models.item import Item
+from app.utils.images import HASH_MASK, hamming_distance
+
+# Near-duplicate photo detection.
+#
+# Every uploaded image carries a 64-bit difference hash (see
+# app.utils.images.difference_hash), so resized or recompressed copies of a
+# photo are only a few bits apart. The hashes of recent items are kept in a
+# per-process multi-index: each hash is split into four 16-bit chunks, each
+# with its own table. Two hashes at most 4r+3 bits apart agree to within r
+# bits on at least one chunk, so a lookup probes every chunk value within r
+# bits of the query's in each table and checks the few hashes it finds.
+# Updates change the tables' sets in place, so the index is only updated
+# and searched under _index_lock.
+
+# Photos whose hashes differ in at most this many bits are treated as the same
+MAX_DUPLICATE_DISTANCE = 8
+# Only items reported within this many days are compared against
+DUPLICATE_WINDOW_DAYS = 30
+
+CHUNKS = 4
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+@functools.lru_cache(maxsize=None)
+def chunk_flips(radius):
+    """
+    Every CHUNK_BITS-bit mask with at most `radius` bits set
+    """
+    return tuple(
+        sum(1 << bit for bit in bits)
+        for flipped in range(radius + 1)
+        for bits in itertools.combinations(range(CHUNK_BITS), flipped)
+    )
+
+def chunks(image_hash):
+    value = image_hash & HASH_MASK
+    return [(value >> (CHUNK_BITS * position)) & CHUNK_MASK for position in range(CHUNKS)]
+
+class ImageHashIndex:
+    """
+    Multi-index over the photo hashes of recent items, kept in step with
+    the database by `update`.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.items_by_hash = defaultdict(set)
+        self.tables = [defaultdict(set) for _ in range(CHUNKS)]
+
+    def add(self, item_id, image_hash):
+        self.hashes[item_id] = image_hash
+        if not self.items_by_hash[image_hash]:
+            for table, chunk in zip(self.tables, chunks(image_hash)):
+                table[chunk].add(image_hash)
+        self.items_by_hash[image_hash].add(item_id)
+
+    def remove(self, item_id):
+        image_hash = self.hashes.pop(item_id)
+        item_ids = self.items_by_hash[image_hash]
+        item_ids.discard(item_id)
+        if not item_ids:
+            del self.items_by_hash[image_hash]
+            for table, chunk in zip(self.tables, chunks(image_hash)):
+                table[chunk].discard(image_hash)
+                if not table[chunk]:
+                    del table[chunk]
+
+    def update(self, rows):
+        """
+        Make (item id, hash) rows the indexed set, touching only what changed
+        """
+        current = dict(rows)
+        for item_id in [item_id for item_id, image_hash in self.hashes.items() if current.get(item_id) != image_hash]:
+            self.remove(item_id)
+        for item_id, image_hash in current.items():
+            if item_id not in self.hashes:
+                self.add(item_id, image_hash)
+
+    def search(self, image_hash, max_distance=MAX_DUPLICATE_DISTANCE):
+        """
+        {item id: distance} of the indexed items whose hash is within max_distance bits
+        """
+        flips = chunk_flips(max_distance // CHUNKS)
+        candidates = set()
+        for table, chunk in zip(self.tables, chunks(image_hash)):
+            for flip in flips:
+                found = table.get(chunk ^ flip)
+                if found:
+                    candidates.update(found)
+
+        matches = {}
+        for candidate in candidates:
+            distance = hamming_distance(image_hash, candidate)
+            if distance <= max_distance:
+                for item_id in self.items_by_hash.get(candidate, ()):
+                    matches[item_id] = distance
+        return matches
+
+    def __len__(self):
+        return len(self.hashes)
+
+_index_lock = threading.Lock()
+
+def recent_image_hashes():
+    cutoff = datetime.utcnow() - timedelta(days=DUPLICATE_WINDOW_DAYS)
+    return db.session.query(Item.id, Item.image_hash).filter(
+        Item.created_at >= cutoff, Item.image_hash.isnot(None)
+    ).all()
+
+def refresh_image_hash_index(rows):
+    """
+    Return the app's cached index, brought up to date with the recent
+    items' (id, hash) rows. Call with _index_lock held, and keep holding it
+    while searching the index.
+    """
+    index = current_app.extensions.get('image_hash_index')
+    if index is None:
+        index = current_app.extensions['image_hash_index'] = ImageHashIndex()
+    index.update(rows)
+    return index
+
+def find_duplicates(items, max_distance=MAX_DUPLICATE_DISTANCE):
+    """
+    Map the id of each given item to the other recent items whose photo is
+    within max_distance bits of its own, closest first. Items without a
+    photo hash, or without suspected duplicates, are left out.
+    """
+    hashed = [item for item in items if item.image_hash is not None]
+    if not hashed:
+        return {}
+
+    rows = recent_image_hashes()
+    candidates = {}
+    with _index_lock:
+        index = refresh_image_hash_index(rows)
+        for item in hashed:
+            matches = index.search(item.image_hash, max_distance)
+            matches.pop(item.id, None)
+            if matches:
+                candidates[item.id] = matches
+    if not candidates:
+        return {}
+
+    other_ids = {other_id for matches in candidates.values() for other_id in matches}
+    others = {row.id: row for row in db.session.query(
+        Item.id, Item.name, Item.status, Item.approval_status, Item.reported_by, Item.created_at
+    ).filter(Item.id.in_(other_ids))}
+
+    duplicates = {}
+    for item_id, matches in candidates.items():
+        flagged = [
+            {
+                "id": other_id,
+                "name": others[other_id].name,
+                "status": others[other_id].status,
+                "approval_status": others[other_id].approval_status,
+                "reported_by": others[other_id].reported_by,
+                "created_at": others[other_id].created_at.isoformat(),
+                "distance": distance
+            }
+            for other_id, distance in sorted(matches.items(), key=lambda match: (match[1], match[0]))
+            if other_id in others
+        ]
+        if flagged:
+            duplicates[item_id] = flagged
+    return duplicates
@@ -0,0 +1,39 @@
+from collections import namedtuple
+from sqlalchemy import case, delete, func, select
+from app.extensions import db
+from app.models.item import Item
+from app.models.notification import Notification
+from app.services import notification_counters
+
+# Set-based removal of items.
+#
+# Claims, comments, reports, rewards and item matches go with their items
+# through the foreign keys' ON DELETE CASCADE, so purging any number of items
+# is one DELETE on items. Notifications about the items are deleted
+# explicitly first, because the recipients' unread counters have to drop by
+# the unread ones among them.
+
+# item_ids: the deleted items; notified_user_ids: users who lost notifications;
+# unread_counts: new unread count of each user whose count went down
+PurgeResult = namedtuple('PurgeResult', ['item_ids', 'notified_user_ids', 'unread_counts'])
+
+def purge_items(*criteria):
+    """
+    Delete the items matching `criteria` (conditions on Item) and everything
+    attached to them in the caller's transaction. Returns a PurgeResult.
+    """
+    targets = select(Item.id).where(*criteria)
+
+    # Recipients of notifications about the items, with how many of them are unread
+    affected = db.session.execute(
+        select(
+            Notification.user_id,
+            func.sum(case((Notification.is_read.is_(False), 1), else_=0))
+        ).where(Notification.item_id.in_(targets)).group_by(Notification.user_id)
+    ).all()
+    if affected:
+        db.session.execute(delete(Notification).where(Notification.item_id.in_(targets)))
+
+    unread = notification_counters.decrement_many({user_id: int(count) for user_id, count in affected})
+    item_ids = db.session.execute(delete(Item).where(*criteria).returning(Item.id)).scalars().all()
+    return PurgeResult(item_ids, [user_id for user_id, _ in affected], unread)
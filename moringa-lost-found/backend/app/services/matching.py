@@ -0,0 +1,257 @@
+import re
+import threading
+import time
+from collections import Counter
+import numpy as np
+from scipy import sparse
+from flask import current_app
+from sqlalchemy import or_
+from app.extensions import db
+from app.models.item import Item
+from app.models.item_match import ItemMatch
+from app.services import notification_outbox
+
+# Lost-to-found matching.
+#
+# Open lost items are vectorized into a TF-IDF matrix (name + description) and
+# a binary location-token matrix, and cached per process. Scoring a batch
+# of found items is then two sparse matrix products plus a vectorized category
+# comparison, with no Python loop over the lost items.
+#
+# Refreshing the cached index replaces its arrays and grows its
+# vocabularies, so the index is only refreshed and read under _index_lock;
+# a request scoring against it never sees a half-applied refresh.
+
+TEXT_WEIGHT = 0.6
+CATEGORY_WEIGHT = 0.25
+LOCATION_WEIGHT = 0.15
+
+TOP_K = 5
+MIN_MATCH_SCORE = 0.25
+
+# Rebuild the cached index at least this often so edited descriptions are picked up
+INDEX_TTL_SECONDS = 600
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(
+    'a an and are at by for from has have in is it its my near of on or the this to was were with'.split()
+)
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower())
+            if len(token) > 1 and token not in STOP_WORDS]
+
+def item_text(row):
+    return f"{row.name} {row.description or ''}"
+
+def normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ matrix
+
+class LostItemIndex:
+    """
+    Vectorized snapshot of the lost items, grown incrementally as new ones
+    are reported. Items that are no longer open are masked out of scoring.
+    """
+
+    def __init__(self, rows):
+        self.built_at = time.monotonic()
+        self.ids = np.empty(0, dtype=np.int64)
+        self.names = []
+        self.reporters = np.empty(0, dtype=np.int64)
+        self.category_codes = np.empty(0, dtype=np.int64)
+        self.open = np.empty(0, dtype=bool)
+
+        self.categories = {}
+        self.vocabulary = {}
+        self.location_vocabulary = {}
+        self.idf = np.empty(0)
+        self.text_matrix = sparse.csr_matrix((0, 0))
+        self.location_matrix = sparse.csr_matrix((0, 0))
+        self.add(rows)
+
+    def add(self, rows):
+        """
+        Append lost items. Terms first seen in this batch get their IDF from
+        it; existing weights are kept until the next full rebuild.
+        """
+        if not rows:
+            return
+        self.ids = np.concatenate([self.ids, np.array([row.id for row in rows], dtype=np.int64)])
+        self.names.extend(row.name for row in rows)
+        self.reporters = np.concatenate([self.reporters, np.array([row.reported_by for row in rows], dtype=np.int64)])
+        self.category_codes = np.concatenate([
+            self.category_codes,
+            np.array([self._category_code(row.category, grow=True) for row in rows], dtype=np.int64)
+        ])
+        self.open = np.concatenate([self.open, np.ones(len(rows), dtype=bool)])
+
+        counts = self._count_matrix([tokenize(item_text(row)) for row in rows], self.vocabulary, grow=True)
+        document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])[len(self.idf):]
+        self.idf = np.concatenate([self.idf, np.log((1.0 + len(self.ids)) / (1.0 + document_frequency)) + 1.0])
+        self.text_matrix = self._append(self.text_matrix, self._tfidf(counts))
+
+        locations = self._count_matrix([tokenize(row.location_found) for row in rows], self.location_vocabulary, grow=True)
+        self.location_matrix = self._append(self.location_matrix, normalize_rows(self._binary(locations)))
+
+    def set_open(self, open_ids):
+        self.open = np.isin(self.ids, open_ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _category_code(self, category, grow=False):
+        # 'other' carries no signal, so it never counts as agreement
+        if not category or category == 'other':
+            return -1
+        if grow:
+            return self.categories.setdefault(category, len(self.categories))
+        return self.categories.get(category, -2)
+
+    @staticmethod
+    def _count_matrix(documents, vocabulary, grow=False):
+        indptr, indices, data = [0], [], []
+        for tokens in documents:
+            counter = Counter(tokens)
+            for token, count in counter.items():
+                column = vocabulary.setdefault(token, len(vocabulary)) if grow else vocabulary.get(token)
+                if column is not None:
+                    indices.append(column)
+                    data.append(count)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(documents), len(vocabulary))
+        )
+
+    @staticmethod
+    def _append(matrix, rows):
+        # Earlier rows have no entries in columns for newly seen terms
+        matrix = matrix.copy()
+        matrix.resize((matrix.shape[0], rows.shape[1]))
+        return sparse.vstack([matrix, rows], format='csr')
+
+    @staticmethod
+    def _binary(counts):
+        counts = counts.copy()
+        counts.data[:] = 1.0
+        return counts
+
+    def _tfidf(self, counts):
+        counts = counts.copy()
+        # Sublinear term frequency, then IDF weighting and L2 normalization
+        counts.data = (1.0 + np.log(counts.data)) * self.idf[counts.indices]
+        return normalize_rows(counts)
+
+    def score(self, found_rows):
+        """
+        Score every lost item against every found item; returns an
+        (n_lost, n_found) dense array.
+        """
+        text_queries = self._tfidf(self._count_matrix([tokenize(item_text(row)) for row in found_rows], self.vocabulary))
+        location_queries = normalize_rows(self._binary(
+            self._count_matrix([tokenize(row.location_found) for row in found_rows], self.location_vocabulary)
+        ))
+        found_categories = np.array([self._category_code(row.category) for row in found_rows], dtype=np.int64)
+        found_reporters = np.array([row.reported_by for row in found_rows], dtype=np.int64)
+
+        text_scores = (self.text_matrix @ text_queries.T).toarray()
+        location_scores = (self.location_matrix @ location_queries.T).toarray()
+        category_scores = ((self.category_codes[:, None] == found_categories[None, :])
+                           & (found_categories[None, :] >= 0))
+
+        scores = (TEXT_WEIGHT * text_scores
+                  + LOCATION_WEIGHT * location_scores
+                  + CATEGORY_WEIGHT * category_scores)
+        scores[~self.open] = 0.0
+        # Nobody needs to be told about the item they reported themselves
+        scores[self.reporters[:, None] == found_reporters[None, :]] = 0.0
+        return scores
+
+    def top_matches(self, found_rows, k=TOP_K, min_score=MIN_MATCH_SCORE):
+        """
+        Return, for each found item, a list of (lost index, score) pairs, best first
+        """
+        if not self.open.any() or not found_rows:
+            return [[] for _ in found_rows]
+
+        scores = self.score(found_rows)
+        k = min(k, len(self))
+        candidates = np.argpartition(-scores, k - 1, axis=0)[:k]
+
+        results = []
+        for column in range(scores.shape[1]):
+            rows = candidates[:, column]
+            rows = rows[np.argsort(-scores[rows, column])]
+            results.append([(row, float(scores[row, column])) for row in rows if scores[row, column] >= min_score])
+        return results
+
+_index_lock = threading.Lock()
+
+def open_lost_items_query():
+    return Item.query.filter(
+        Item.status == 'lost',
+        or_(Item.approval_status.is_(None), Item.approval_status != 'rejected')
+    )
+
+def lost_item_rows(query):
+    return query.with_entities(
+        Item.id, Item.name, Item.description, Item.category, Item.location_found, Item.reported_by
+    ).all()
+
+def refresh_lost_item_index(open_ids):
+    """
+    Return the app's cached index, brought up to date with the open lost
+    items `open_ids`. Only newly opened items are fetched and vectorized;
+    the whole index is rebuilt once the TTL expires. Call with _index_lock
+    held, and keep holding it while reading the index.
+    """
+    index = current_app.extensions.get('lost_item_index')
+    if index is None or time.monotonic() - index.built_at > INDEX_TTL_SECONDS:
+        index = current_app.extensions['lost_item_index'] = LostItemIndex(lost_item_rows(open_lost_items_query()))
+    else:
+        missing = np.setdiff1d(open_ids, index.ids)
+        if missing.size:
+            index.add(lost_item_rows(Item.query.filter(Item.id.in_(missing.tolist()))))
+    index.set_open(open_ids)
+    return index
+
+def match_found_items(found_items, k=TOP_K):
+    """
+    Score newly found items against open lost items, store the top-k
+    candidates in item_matches and notify the owners of the lost items
+    """
+    found_items = [item for item in found_items if item.status == 'found']
+    if not found_items:
+        return []
+
+    open_ids = np.fromiter((row.id for row in open_lost_items_query().with_entities(Item.id)), dtype=np.int64)
+    with _index_lock:
+        index = refresh_lost_item_index(open_ids)
+        # (lost item id, its reporter, its name, score) per found item, read before the lock is released
+        candidates = [
+            [(int(index.ids[row]), int(index.reporters[row]), index.names[row], score) for row, score in found_matches]
+            for found_matches in index.top_matches(found_items, k)
+        ]
+    already_matched = set(db.session.query(ItemMatch.found_item_id, ItemMatch.lost_item_id).filter(
+        ItemMatch.found_item_id.in_([item.id for item in found_items])
+    ).all())
+
+    matches = []
+    for found, found_candidates in zip(found_items, candidates):
+        for lost_item_id, reporter_id, lost_name, score in found_candidates:
+            if (found.id, lost_item_id) in already_matched:
+                continue
+            matches.append(ItemMatch(found_item_id=found.id, lost_item_id=lost_item_id, score=score))
+            notification_outbox.notify(
+                user_id=reporter_id,
+                title="Possible Match Found",
+                message=f"An item that may be your lost '{lost_name}' has been reported found: '{found.name}'.",
+                notification_type='info',
+                item_id=found.id
+            )
+
+    db.session.add_all(matches)
+    db.session.commit()
+    return matches
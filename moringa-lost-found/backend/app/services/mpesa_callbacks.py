@@ -0,0 +1,142 @@
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extensions import db
+from app.models.mpesa_callback import MpesaCallback
+from app.models.payout_job import PayoutJob
+from app.models.report import Report
+from app.models.reward import Reward
+
+# M-Pesa STK push callback ingestion.
+#
+# Safaricom retries a callback until it is acknowledged, so the same
+# transaction can arrive several times and in any order relative to the
+# worker recording the request. Each delivery is inserted into
+# mpesa_callbacks with ON CONFLICT DO NOTHING on the CheckoutRequestID; only
+# the first one goes on to apply its result, as a single UPDATE that moves
+# the reward out of 'initiated'. A reward that already completed or failed
+# is never touched again. A callback that arrives before the worker has
+# stored the CheckoutRequestID is kept and applied when the worker does. A
+# success whose amount differs from the reward's is rejected and rolled
+# back, so it can't stand in for the real callback as its first delivery.
+
+logger = logging.getLogger(__name__)
+
+class InvalidCallback(ValueError):
+    pass
+
+def _insert(dialect_name):
+    return postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+
+def parse_stk_callback(payload):
+    """
+    Fields of a Daraja STK push callback body as MpesaCallback columns
+    """
+    try:
+        callback = payload['Body']['stkCallback']
+        fields = {
+            'checkout_request_id': str(callback['CheckoutRequestID']),
+            'merchant_request_id': callback.get('MerchantRequestID'),
+            'result_code': int(callback['ResultCode']),
+            'result_desc': (callback.get('ResultDesc') or '')[:255],
+        }
+        metadata = {item['Name']: item.get('Value')
+                    for item in (callback.get('CallbackMetadata') or {}).get('Item', [])}
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise InvalidCallback("Not an STK push callback")
+
+    if fields['result_code'] == 0 and not metadata.get('MpesaReceiptNumber'):
+        raise InvalidCallback("Successful callback without a receipt number")
+    try:
+        fields['amount'] = float(metadata['Amount']) if metadata.get('Amount') is not None else None
+    except (TypeError, ValueError):
+        raise InvalidCallback("Invalid amount")
+    if fields['result_code'] == 0 and fields['amount'] is None:
+        raise InvalidCallback("Successful callback without an amount")
+    fields['receipt_number'] = metadata.get('MpesaReceiptNumber')
+    fields['phone_number'] = str(metadata['PhoneNumber']) if metadata.get('PhoneNumber') else None
+    return fields
+
+def reward_status(result_code):
+    return 'completed' if result_code == 0 else 'failed'
+
+def apply_result(checkout_request_id, result_code, receipt_number=None, amount=None):
+    """
+    Move the reward paid by this STK push from 'initiated' to completed or
+    failed. Returns True if it did; False if no sent job has this id yet or
+    the reward already left 'initiated'. A success whose amount isn't what
+    the STK push asked for (the reward rounded to whole shillings) raises
+    InvalidCallback and changes nothing.
+    """
+    new_status = reward_status(result_code)
+    values = {'status': new_status, 'updated_at': datetime.utcnow()}
+    if receipt_number:
+        values['mpesa_transaction_id'] = receipt_number
+    reward_id = select(PayoutJob.reward_id).where(PayoutJob.checkout_request_id == checkout_request_id)
+    conditions = [Reward.id == reward_id.scalar_subquery(), Reward.status == 'initiated']
+    if result_code == 0:
+        conditions.append(func.round(Reward.amount) == amount)
+    updated = db.session.execute(
+        update(Reward)
+        .where(*conditions)
+        .values(**values)
+        .returning(Reward.report_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if updated is None:
+        if result_code == 0:
+            waiting = db.session.execute(
+                select(Reward.amount).where(Reward.id == reward_id.scalar_subquery(), Reward.status == 'initiated')
+            ).scalar()
+            if waiting is not None:
+                raise InvalidCallback(f"Paid amount {amount} does not match the reward's {waiting}")
+        return False
+    if updated.report_id is not None:
+        db.session.execute(
+            update(Report)
+            .where(Report.id == updated.report_id)
+            .values(reward_status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+    return True
+
+def ingest(payload, raw=None):
+    """
+    Record one callback and apply it in the caller's transaction. Returns
+    'applied', 'duplicate' (this transaction was seen before) or 'ignored'
+    (its reward isn't waiting for a result).
+    """
+    fields = parse_stk_callback(payload)
+    table = MpesaCallback.__table__
+    statement = _insert(db.engine.dialect.name)(table).values(
+        payload=raw if raw is not None else json.dumps(payload),
+        received_at=datetime.utcnow(),
+        **fields
+    ).on_conflict_do_nothing(index_elements=[table.c.checkout_request_id]).returning(table.c.id)
+    if db.session.execute(statement).first() is None:
+        return 'duplicate'
+    applied = apply_result(fields['checkout_request_id'], fields['result_code'], fields['receipt_number'],
+                           fields['amount'])
+    return 'applied' if applied else 'ignored'
+
+def apply_stored(checkout_request_ids):
+    """
+    Apply callbacks that arrived before the worker recorded their
+    CheckoutRequestIDs. Returns the number applied.
+    """
+    if not checkout_request_ids:
+        return 0
+    early = db.session.execute(
+        select(MpesaCallback.checkout_request_id, MpesaCallback.result_code, MpesaCallback.receipt_number,
+               MpesaCallback.amount)
+        .where(MpesaCallback.checkout_request_id.in_(checkout_request_ids))
+    ).all()
+    applied = 0
+    for callback in early:
+        try:
+            applied += apply_result(*callback)
+        except InvalidCallback as e:
+            logger.warning("Not applying stored callback %s: %s", callback.checkout_request_id, e)
+    return applied
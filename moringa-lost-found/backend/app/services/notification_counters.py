@@ -0,0 +1,105 @@
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extensions import db
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+
+# Per-user unread notification counters.
+#
+# Every change is a single relative UPDATE/upsert executed in the caller's
+# transaction, so the counter commits or rolls back together with the
+# notification rows it describes and concurrent writers never overwrite
+# each other's increments.
+
+# Users per decrement statement; each costs a few bound parameters
+DECREMENT_BATCH_SIZE = 2000
+
+def _insert(dialect_name):
+    return postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+
+def increment(user_id, amount=1):
+    increment_many({user_id: amount})
+
+def increment_many(amounts):
+    """
+    Add to several users' counters in one upsert; returns {user_id: new count}
+    """
+    if not amounts:
+        return {}
+    table = NotificationCounter.__table__
+    statement = _insert(db.engine.dialect.name)(table).values([
+        {'user_id': user_id, 'unread_count': amount} for user_id, amount in amounts.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={'unread_count': table.c.unread_count + statement.excluded.unread_count}
+    ).returning(table.c.user_id, table.c.unread_count)
+    return dict(db.session.execute(statement).all())
+
+def decrement(user_id, amount=1):
+    decrement_many({user_id: amount})
+
+def decrement_many(amounts):
+    """
+    Subtract from several users' counters in one UPDATE; returns {user_id: new count}
+    """
+    amounts = {user_id: amount for user_id, amount in amounts.items() if amount > 0}
+    if not amounts:
+        return {}
+    table = NotificationCounter.__table__
+    column = table.c.unread_count
+    result = {}
+    user_ids = sorted(amounts)
+    for start in range(0, len(user_ids), DECREMENT_BATCH_SIZE):
+        batch = {user_id: amounts[user_id] for user_id in user_ids[start:start + DECREMENT_BATCH_SIZE]}
+        amount = case(batch, value=table.c.user_id)
+        result.update(db.session.execute(
+            table.update()
+            .where(table.c.user_id.in_(batch))
+            # Never go negative; a drifted counter is fixed by recount()
+            .values(unread_count=case((column > amount, column - amount), else_=0))
+            .returning(table.c.user_id, column)
+        ).all())
+    return result
+
+def get(user_id):
+    """
+    Unread count for a user: one primary-key lookup, whatever the number of notifications
+    """
+    count = db.session.execute(
+        select(NotificationCounter.unread_count).where(NotificationCounter.user_id == user_id)
+    ).scalar()
+    return count or 0
+
+def recount(user_id=None):
+    """
+    Rebuild counters from the notifications table, for every user or just
+    one. Returns the number of counters that had drifted.
+    """
+    actual = select(Notification.user_id, func.count().label('unread_count')).where(
+        Notification.is_read.is_(False)
+    ).group_by(Notification.user_id)
+    stored = select(NotificationCounter.user_id, NotificationCounter.unread_count)
+    if user_id is not None:
+        actual = actual.where(Notification.user_id == user_id)
+        stored = stored.where(NotificationCounter.user_id == user_id)
+
+    actual = dict(db.session.execute(actual).all())
+    stored = dict(db.session.execute(stored).all())
+
+    drifted = 0
+    for counter_user_id in actual.keys() | stored.keys():
+        count = actual.get(counter_user_id, 0)
+        if stored.get(counter_user_id) == count:
+            continue
+        drifted += 1
+        if counter_user_id in stored:
+            db.session.execute(
+                NotificationCounter.__table__.update()
+                .where(NotificationCounter.user_id == counter_user_id)
+                .values(unread_count=count)
+            )
+        else:
+            increment(counter_user_id, count)
+    db.session.commit()
+    return drifted
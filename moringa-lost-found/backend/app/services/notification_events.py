@@ -0,0 +1,23 @@
+from app.extensions import pubsub
+from app.services import notification_counters
+
+# Events pushed to GET /notifications/stream. Publish only after the write
+# has been committed so subscribers never see rolled-back state.
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+def unread_count(user_id):
+    return notification_counters.get(user_id)
+
+def publish_unread_count(user_id, count=None):
+    if count is None:
+        count = unread_count(user_id)
+    pubsub.publish(user_channel(user_id), {"event": "unread_count", "data": {"unread_count": count}})
+
+def publish_notification(notification):
+    pubsub.publish(user_channel(notification.user_id), {
+        "event": "notification",
+        "id": notification.id,
+        "data": notification.to_dict()
+    })
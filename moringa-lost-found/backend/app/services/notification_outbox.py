@@ -0,0 +1,148 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, insert, literal, select
+from app.extensions import db, cache
+from app.models.notification import Notification
+from app.models.user import User
+from app.services import notification_counters, notification_events
+
+# Notification outbox.
+#
+# notify()/notify_many() only stage notifications on the current session.
+# When the caller commits, everything staged is written inside that same
+# transaction just before it commits: single notifications as one multi-row
+# INSERT, each fan-out as one INSERT ... SELECT, and all affected unread
+# counters as one upsert. Nothing is written if the transaction rolls back,
+# and the cache invalidations and live events go out only after the commit.
+
+STAGED_KEY = 'notification_outbox'
+DELIVERED_KEY = 'notification_outbox_delivered'
+
+# Rows per multi-row INSERT and recipients per fan-out statement; both keep
+# the bound parameters well under the SQLite and Postgres limits
+INSERT_BATCH_SIZE = 1000
+FANOUT_BATCH_SIZE = 10000
+
+def _outbox(session):
+    return session.info.setdefault(STAGED_KEY, {'single': [], 'fanout': []})
+
+def notify(user_id, title, message, notification_type='info', item_id=None):
+    """
+    Stage a notification for one user. Returns the Notification, whose id
+    is filled in when the transaction commits.
+    """
+    notification = Notification(
+        user_id=user_id,
+        title=title,
+        message=message,
+        type=notification_type,
+        is_read=False,
+        item_id=item_id
+    )
+    _outbox(db.session())['single'].append(notification)
+    return notification
+
+def notify_many(user_ids, title, message, notification_type='info', item_id=None):
+    """
+    Stage the same notification for many users. Ids that are not users are
+    skipped, and each user is notified once.
+    """
+    user_ids = sorted(set(user_ids))
+    for start in range(0, len(user_ids), FANOUT_BATCH_SIZE):
+        notify_query(
+            select(User.id).where(User.id.in_(user_ids[start:start + FANOUT_BATCH_SIZE])),
+            title, message, notification_type, item_id
+        )
+
+def notify_query(recipients, title, message, notification_type='info', item_id=None):
+    """
+    Stage a notification for every user id selected by `recipients`, a
+    single-column select (e.g. select(User.id).where(User.role == 'admin')).
+    """
+    _outbox(db.session())['fanout'].append((recipients, {
+        'title': title,
+        'message': message,
+        'type': notification_type,
+        'item_id': item_id,
+    }))
+
+def _write_single(session, notifications):
+    table = Notification.__table__
+    now = datetime.utcnow()
+    rows = [{
+        'user_id': n.user_id,
+        'title': n.title,
+        'message': n.message,
+        'type': n.type,
+        'is_read': False,
+        'item_id': n.item_id,
+        'created_at': now,
+    } for n in notifications]
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[start:start + INSERT_BATCH_SIZE]
+        # One multi-row INSERT ... VALUES. Ids are assigned in VALUES order,
+        # so the sorted returned ids line up with the staged rows.
+        ids = sorted(session.execute(insert(table).values(batch).returning(table.c.id)).scalars())
+        for notification, notification_id in zip(notifications[start:start + INSERT_BATCH_SIZE], ids):
+            notification.id = notification_id
+            notification.created_at = now
+    return notifications
+
+def _write_fanout(session, recipients, values):
+    table = Notification.__table__
+    now = datetime.utcnow()
+    recipients = recipients.subquery()
+    rows = select(
+        recipients.c[0],
+        literal(values['title']),
+        literal(values['message']),
+        literal(values['type']),
+        literal(False),
+        literal(values['item_id'], type_=table.c.item_id.type),
+        literal(now, type_=table.c.created_at.type),
+    )
+    result = session.execute(
+        insert(table)
+        .from_select(['user_id', 'title', 'message', 'type', 'is_read', 'item_id', 'created_at'], rows)
+        .returning(table.c.id, table.c.user_id)
+    )
+    return [
+        Notification(id=notification_id, user_id=user_id, is_read=False, created_at=now, **values)
+        for notification_id, user_id in result
+    ]
+
+@event.listens_for(db.session, 'before_commit')
+def _flush_outbox(session):
+    staged = session.info.pop(STAGED_KEY, None)
+    if not staged:
+        return
+    # Rows the notifications may reference (e.g. a new item) must exist first
+    session.flush()
+
+    written = []
+    if staged['single']:
+        written.extend(_write_single(session, staged['single']))
+    for recipients, values in staged['fanout']:
+        written.extend(_write_fanout(session, recipients, values))
+    if not written:
+        return
+
+    unread = notification_counters.increment_many(Counter(n.user_id for n in written))
+    session.info.setdefault(DELIVERED_KEY, []).append((written, unread))
+
+@event.listens_for(db.session, 'after_commit')
+def _announce(session):
+    for written, unread in session.info.pop(DELIVERED_KEY, ()):
+        for user_id in unread:
+            cache.invalidate(f"notifications:{user_id}")
+        for notification in written:
+            notification_events.publish_notification(notification)
+        for user_id, count in unread.items():
+            notification_events.publish_unread_count(user_id, count)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard(session, previous_transaction):
+    if previous_transaction.nested:
+        return
+    session.info.pop(STAGED_KEY, None)
+    session.info.pop(DELIVERED_KEY, None)
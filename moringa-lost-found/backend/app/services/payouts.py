@@ -0,0 +1,289 @@
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import exists, func, select, update
+from app.extensions import db, mpesa
+from app.models.mpesa_callback import MpesaCallback
+from app.models.payout_job import PayoutJob
+from app.models.reward import Reward
+from app.services import mpesa_callbacks, reconciliation
+from app.utils.mpesa import MpesaError, MpesaUnknownOutcome
+
+# M-Pesa payout queue.
+#
+# Paying a reward only inserts a payout_jobs row in the request's own
+# transaction, so the API answers with the job id at once. A worker process
+# (`flask payouts work`) leases due jobs in batches with one
+# UPDATE ... RETURNING, sends their STK push requests concurrently through
+# the shared M-Pesa client (app/utils/mpesa.py), and writes every outcome back in one bulk UPDATE.
+# Failures that may be transient are retried with exponential backoff and
+# jitter. A worker that dies mid-batch holds its jobs only until their lease
+# runs out, so delivery is at least once.
+#
+# A request that was sent but got no answer (a read timeout) is not retried:
+# Daraja may have prompted the customer already. Its job is marked
+# 'unknown' and the reward stays 'initiated'. Having no CheckoutRequestID,
+# the job is matched to the unclaimed successful callback from the same
+# phone for the same amount once one arrives. If none has arrived after
+# PAYOUT_UNKNOWN_SECONDS, long after the prompt would have expired, the
+# job is retried like any other failure.
+#
+# A callback that arrives while the worker is still recording its job
+# can't see the job's CheckoutRequestID, and the worker's own check for
+# early callbacks can't see the callback yet, so each pass also applies
+# stored callbacks of jobs sent within the last lease whose reward is
+# still 'initiated'.
+#
+# Whenever it runs out of due jobs, the worker also rebuilds the daily
+# reward totals behind GET /admin/rewards/summary, at most once every
+# REWARD_TOTALS_REFRESH_SECONDS.
+
+logger = logging.getLogger(__name__)
+
+# Outcome of one STK push request; checkout_request_id is set when Daraja accepted it,
+# unknown when it was sent but no answer came back
+SendResult = namedtuple('SendResult', ['checkout_request_id', 'error', 'retryable', 'unknown'],
+                        defaults=(False,))
+LeasedJob = namedtuple('LeasedJob', ['id', 'reward_id', 'attempts'])
+
+def enqueue(reward_id):
+    """
+    Move a pending reward to 'initiated' and stage a payout job for it in
+    the caller's transaction. Returns the job, or None if the reward was
+    not pending, e.g. because a concurrent request queued it first.
+    """
+    initiated = db.session.execute(
+        update(Reward)
+        .where(Reward.id == reward_id, Reward.status == 'pending')
+        .values(status='initiated', updated_at=datetime.utcnow())
+    )
+    if initiated.rowcount != 1:
+        return None
+    job = PayoutJob(reward_id=reward_id)
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+def stk_push_result(status_code, body):
+    """
+    SendResult for Daraja's answer to an STK push request
+    """
+    if status_code == 200 and body.get('ResponseCode') == '0':
+        return SendResult(body['CheckoutRequestID'], None, False)
+    message = body.get('errorMessage') or body.get('ResponseDescription') or f"HTTP {status_code}"
+    # Throttling, server errors and an expired token may pass; a rejected request won't
+    retryable = status_code in (401, 429) or status_code >= 500
+    return SendResult(None, message[:255], retryable)
+
+def backoff_delay(attempts, config):
+    """
+    Seconds before retry number `attempts`: exponential, capped, with full jitter
+    """
+    delay = min(config['PAYOUT_BACKOFF_SECONDS'] * 2 ** (attempts - 1), config['PAYOUT_MAX_BACKOFF_SECONDS'])
+    return random.uniform(delay / 2, delay)
+
+def lease_jobs(limit, lease_seconds):
+    """
+    Mark up to `limit` due jobs as sending, counting the attempt, and return
+    them. Jobs whose lease expired are due again. Other workers skip the
+    rows being leased on Postgres; SQLite runs the statement atomically.
+    """
+    now = datetime.utcnow()
+    due = (
+        select(PayoutJob.id)
+        .where(PayoutJob.status.in_(('queued', 'sending')), PayoutJob.run_at <= now)
+        .order_by(PayoutJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.session.execute(
+        update(PayoutJob)
+        .where(PayoutJob.id.in_(due.scalar_subquery()))
+        .values(status='sending', attempts=PayoutJob.attempts + 1,
+                run_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+        .returning(PayoutJob.id, PayoutJob.reward_id, PayoutJob.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return [LeasedJob(*row) for row in rows]
+
+def record_results(results, config):
+    """
+    Write back the outcome of each (job, SendResult) pair in one bulk
+    UPDATE, rescheduling retryable failures and failing rewards that ran
+    out of attempts. Callbacks that beat the worker here are applied now.
+    """
+    now = datetime.utcnow()
+    job_rows, failed_reward_ids = [], []
+    for job, result in results:
+        row = {'id': job.id, 'status': 'failed', 'checkout_request_id': result.checkout_request_id,
+               'last_error': result.error, 'run_at': now, 'updated_at': now}
+        if result.checkout_request_id:
+            row['status'] = 'sent'
+        elif result.unknown:
+            row['status'] = 'unknown'
+        elif result.retryable and job.attempts < config['PAYOUT_MAX_ATTEMPTS']:
+            row['status'] = 'queued'
+            row['run_at'] = now + timedelta(seconds=backoff_delay(job.attempts, config))
+        else:
+            failed_reward_ids.append(job.reward_id)
+        job_rows.append(row)
+
+    if job_rows:
+        db.session.execute(update(PayoutJob), job_rows)
+        mpesa_callbacks.apply_stored([row['checkout_request_id'] for row in job_rows if row['status'] == 'sent'])
+    if failed_reward_ids:
+        db.session.execute(
+            update(Reward)
+            .where(Reward.id.in_(failed_reward_ids), Reward.status == 'initiated')
+            .values(status='failed', updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+
+def send_batch(jobs, executor):
+    """
+    Send the STK push requests of leased jobs concurrently; returns (job, SendResult) pairs
+    """
+    rewards = {reward.id: reward for reward in db.session.query(
+        Reward.id, Reward.amount, Reward.mpesa_phone_number, Reward.item_id
+    ).filter(Reward.id.in_([job.reward_id for job in jobs]))}
+
+    def send(job):
+        reward = rewards.get(job.reward_id)
+        if reward is None or not reward.mpesa_phone_number:
+            return SendResult(None, "Reward has no M-Pesa phone number", False)
+        payload = mpesa.stk_push_payload(reward.amount, reward.mpesa_phone_number, f'REWARD-{reward.id}',
+                                         f'Reward for finding item {reward.item_id}')
+        try:
+            return stk_push_result(*mpesa.stk_push(payload))
+        except MpesaUnknownOutcome as e:
+            return SendResult(None, str(e)[:255], False, unknown=True)
+        except MpesaError as e:
+            return SendResult(None, str(e)[:255], True)
+
+    return list(zip(jobs, executor.map(send, jobs)))
+
+def resolve_unknown(config):
+    """
+    Settle 'unknown' jobs: attach the unclaimed successful callback that
+    paid their reward, or retry them once PAYOUT_UNKNOWN_SECONDS have
+    passed without one. Returns the number of jobs settled.
+    """
+    now = datetime.utcnow()
+    jobs = db.session.query(
+        PayoutJob.id, PayoutJob.reward_id, PayoutJob.attempts, PayoutJob.updated_at,
+        Reward.mpesa_phone_number, Reward.amount
+    ).join(Reward, Reward.id == PayoutJob.reward_id).filter(PayoutJob.status == 'unknown').all()
+
+    settled, failed_reward_ids = 0, []
+    for job in jobs:
+        # Sent at most a lease before it was recorded
+        sent_after = job.updated_at - timedelta(seconds=config['PAYOUT_LEASE_SECONDS'])
+        checkout_request_id = db.session.query(MpesaCallback.checkout_request_id).filter(
+            MpesaCallback.result_code == 0,
+            MpesaCallback.phone_number == job.mpesa_phone_number,
+            func.round(MpesaCallback.amount) == func.round(job.amount),
+            MpesaCallback.received_at >= sent_after,
+            ~exists().where(PayoutJob.checkout_request_id == MpesaCallback.checkout_request_id)
+        ).order_by(MpesaCallback.received_at).limit(1).scalar()
+
+        values = None
+        if checkout_request_id is not None:
+            values = {'status': 'sent', 'checkout_request_id': checkout_request_id}
+        elif job.updated_at <= now - timedelta(seconds=config['PAYOUT_UNKNOWN_SECONDS']):
+            if job.attempts < config['PAYOUT_MAX_ATTEMPTS']:
+                values = {'status': 'queued', 'run_at': now}
+            else:
+                values = {'status': 'failed'}
+                failed_reward_ids.append(job.reward_id)
+        if values is None:
+            continue
+        db.session.execute(
+            update(PayoutJob)
+            .where(PayoutJob.id == job.id, PayoutJob.status == 'unknown')
+            .values(updated_at=now, **values)
+            .execution_options(synchronize_session=False)
+        )
+        if checkout_request_id is not None:
+            mpesa_callbacks.apply_stored([checkout_request_id])
+        settled += 1
+
+    if failed_reward_ids:
+        db.session.execute(
+            update(Reward)
+            .where(Reward.id.in_(failed_reward_ids), Reward.status == 'initiated')
+            .values(status='failed', updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return settled
+
+def apply_missed_callbacks(config, limit=500):
+    """
+    Apply stored callbacks for recently sent jobs whose reward is still
+    waiting for one. Returns the number applied.
+    """
+    # A sent job's run_at is when it was recorded, so this stays on the status index
+    recent = datetime.utcnow() - timedelta(seconds=config['PAYOUT_LEASE_SECONDS'])
+    checkout_request_ids = db.session.execute(
+        select(PayoutJob.checkout_request_id)
+        .join(Reward, Reward.id == PayoutJob.reward_id)
+        .join(MpesaCallback, MpesaCallback.checkout_request_id == PayoutJob.checkout_request_id)
+        .where(PayoutJob.status == 'sent', PayoutJob.run_at >= recent, Reward.status == 'initiated')
+        .limit(limit)
+    ).scalars().all()
+    applied = mpesa_callbacks.apply_stored(checkout_request_ids)
+    db.session.commit()
+    return applied
+
+def run_batch(executor, config):
+    """
+    Lease, send and record one batch; returns the number of jobs it held
+    """
+    jobs = lease_jobs(config['PAYOUT_BATCH_SIZE'], config['PAYOUT_LEASE_SECONDS'])
+    if jobs:
+        record_results(send_batch(jobs, executor), config)
+    return len(jobs)
+
+def refresh_totals():
+    """
+    Rebuild the daily reward totals; a failure is logged, not raised
+    """
+    try:
+        reconciliation.refresh_daily_totals()
+    except Exception:
+        db.session.rollback()
+        logger.exception("Refreshing the daily reward totals failed")
+
+def work(once=False, stop=None):
+    """
+    Process payout jobs until `stop` (a threading.Event) is set, polling
+    when none are due and refreshing the daily totals when they are stale.
+    With once=True, return as soon as none are due. Returns the number of
+    send attempts made.
+    """
+    config = current_app.config
+    stop = stop or threading.Event()
+    refresh_every = config.get('REWARD_TOTALS_REFRESH_SECONDS', 0)
+    next_refresh = time.monotonic()
+    attempts = 0
+    with ThreadPoolExecutor(max_workers=config['PAYOUT_CONCURRENCY'], thread_name_prefix='payout') as executor:
+        while not stop.is_set():
+            resolve_unknown(config)
+            apply_missed_callbacks(config)
+            processed = run_batch(executor, config)
+            attempts += processed
+            if not processed:
+                if refresh_every and time.monotonic() >= next_refresh:
+                    refresh_totals()
+                    next_refresh = time.monotonic() + refresh_every
+                if once:
+                    break
+                stop.wait(config['PAYOUT_POLL_SECONDS'])
+    return attempts
@@ -0,0 +1,246 @@
+import csv
+import os
+import tempfile
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, insert, literal, select
+from app.extensions import db
+from app.models.reward import Reward
+from app.models.reward_ledger import RewardMismatch, RewardDailyTotal
+
+# Reward reconciliation against M-Pesa statements, and the daily totals
+# behind GET /admin/rewards/summary.
+#
+# `flask rewards reconcile` joins every reward that has a receipt number with
+# the statement rows on that receipt, as a partitioned hash join: both sides
+# are streamed once into PARTITIONS temporary files by a hash of the receipt
+# (rewards through a server-side cursor, YIELD_PER rows at a time), then
+# each statement partition is loaded into a dict and probed with the
+# matching reward partition. Only one partition is ever held in memory, so
+# a million-row statement costs disk space rather than RAM. Mismatches are
+# inserted in batches under one run id and committed together.
+
+PARTITIONS = 64
+YIELD_PER = 5000
+INSERT_BATCH_SIZE = 1000
+# Statements carry two decimals; Reward.amount is a float
+AMOUNT_TOLERANCE = 0.005
+
+RECEIPT_COLUMN = 'Receipt No.'
+STATUS_COLUMN = 'Transaction Status'
+PAID_IN_COLUMN = 'Paid In'
+WITHDRAWN_COLUMN = 'Withdrawn'
+
+class StatementError(ValueError):
+    pass
+
+def parse_amount(value):
+    value = (value or '').replace(',', '').strip()
+    return abs(float(value)) if value else None
+
+def read_statement(f):
+    """
+    Yield (receipt number, amount, status) for each row of an M-Pesa
+    statement CSV. The amount is whichever of Paid In / Withdrawn is set.
+    """
+    reader = csv.DictReader(f)
+    columns = {name.strip(): name for name in reader.fieldnames or []}
+    for required in (RECEIPT_COLUMN, STATUS_COLUMN):
+        if required not in columns:
+            raise StatementError(f"Statement has no '{required}' column")
+    if PAID_IN_COLUMN not in columns and WITHDRAWN_COLUMN not in columns:
+        raise StatementError(f"Statement has no '{PAID_IN_COLUMN}' or '{WITHDRAWN_COLUMN}' column")
+
+    for line, row in enumerate(reader, start=2):
+        receipt = (row[columns[RECEIPT_COLUMN]] or '').strip().upper()
+        if not receipt:
+            continue
+        try:
+            amount = (parse_amount(row.get(columns.get(PAID_IN_COLUMN)))
+                      or parse_amount(row.get(columns.get(WITHDRAWN_COLUMN))))
+        except ValueError:
+            raise StatementError(f"Line {line}: invalid amount")
+        yield receipt, amount, (row[columns[STATUS_COLUMN]] or '').strip()
+
+class Partitions:
+    """
+    Rows spread over temporary CSV files by a stable hash of their first
+    column, so equal keys always land in the same file
+    """
+
+    def __init__(self, directory, name, count):
+        self.paths = [os.path.join(directory, f'{name}-{i}.csv') for i in range(count)]
+        self._files = [open(path, 'w', newline='') for path in self.paths]
+        self._writers = [csv.writer(f) for f in self._files]
+
+    def add(self, key, *values):
+        self._writers[zlib.crc32(key.encode()) % len(self._writers)].writerow((key, *values))
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+    def read(self, index):
+        with open(self.paths[index], newline='') as f:
+            yield from csv.reader(f)
+
+class MismatchWriter:
+    def __init__(self, run_id, batch_size=INSERT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.counts = Counter()
+        # Every row has the same keys so each batch is one executemany
+        self._template = {
+            'run_id': run_id, 'reward_id': None, 'receipt_number': None, 'ledger_amount': None,
+            'statement_amount': None, 'ledger_status': None, 'statement_status': None,
+            'created_at': datetime.utcnow()
+        }
+        self._rows = []
+
+    def add(self, kind, **fields):
+        self._rows.append({**self._template, 'kind': kind, **fields})
+        self.counts[kind] += 1
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            db.session.execute(insert(RewardMismatch), self._rows)
+            self._rows = []
+
+def _float(value):
+    return float(value) if value != '' else None
+
+def join_partition(statement_rows, ledger_rows, mismatches):
+    """
+    Hash join one partition: build on the statement, probe with rewards.
+    Returns the number of rewards that matched cleanly.
+    """
+    statement = {}
+    for receipt, amount, status in statement_rows:
+        if receipt in statement:
+            mismatches.add('duplicate_in_statement', receipt_number=receipt,
+                           statement_amount=_float(amount), statement_status=status)
+        else:
+            statement[receipt] = (_float(amount), status)
+
+    matched = 0
+    for receipt, reward_id, amount, status in ledger_rows:
+        ledger = {'reward_id': int(reward_id), 'receipt_number': receipt,
+                  'ledger_amount': float(amount), 'ledger_status': status}
+        entry = statement.pop(receipt, None)
+        if entry is None:
+            mismatches.add('missing_from_statement', **ledger)
+            continue
+        statement_amount, statement_status = entry
+        if (statement_status.lower() == 'completed') != (status == 'completed'):
+            kind = 'status_mismatch'
+        elif statement_amount is None or abs(statement_amount - float(amount)) > AMOUNT_TOLERANCE:
+            kind = 'amount_mismatch'
+        else:
+            matched += 1
+            continue
+        mismatches.add(kind, statement_amount=statement_amount, statement_status=statement_status, **ledger)
+
+    # Money that moved with no reward recording it
+    for receipt, (amount, status) in statement.items():
+        if status.lower() == 'completed':
+            mismatches.add('missing_from_ledger', receipt_number=receipt, statement_amount=amount,
+                           statement_status=status)
+    return matched
+
+def reconcile(statement, partitions=PARTITIONS, batch_size=INSERT_BATCH_SIZE):
+    """
+    Reconcile all rewards against a statement CSV (an open text file) and
+    store the mismatches. Returns the run's id and counts.
+    """
+    run_id = uuid.uuid4().hex
+    mismatches = MismatchWriter(run_id, batch_size)
+    statement_rows = rewards = matched = 0
+
+    with tempfile.TemporaryDirectory(prefix='reward-reconcile-') as directory:
+        statement_parts = Partitions(directory, 'statement', partitions)
+        ledger_parts = Partitions(directory, 'ledger', partitions)
+        try:
+            for receipt, amount, status in read_statement(statement):
+                statement_parts.add(receipt, '' if amount is None else amount, status)
+                statement_rows += 1
+
+            streamed = db.session.execute(
+                select(Reward.id, Reward.mpesa_transaction_id, Reward.amount, Reward.status)
+                .execution_options(yield_per=YIELD_PER)
+            )
+            for reward_id, receipt, amount, status in streamed:
+                rewards += 1
+                if receipt:
+                    ledger_parts.add(receipt.strip().upper(), reward_id, amount, status)
+                elif status == 'completed':
+                    mismatches.add('missing_receipt', reward_id=reward_id, ledger_amount=amount,
+                                   ledger_status=status)
+        finally:
+            statement_parts.close()
+            ledger_parts.close()
+
+        for index in range(partitions):
+            matched += join_partition(statement_parts.read(index), ledger_parts.read(index), mismatches)
+
+    mismatches.flush()
+    db.session.commit()
+    return {
+        'run_id': run_id,
+        'statement_rows': statement_rows,
+        'rewards': rewards,
+        'matched': matched,
+        'mismatches': dict(mismatches.counts),
+    }
+
+def refresh_daily_totals():
+    """
+    Rebuild reward_daily_totals from rewards with one grouped
+    INSERT ... SELECT; returns the number of (day, status) rows
+    """
+    day = func.date(Reward.created_at)
+    status = func.coalesce(Reward.status, 'pending')
+    totals = (
+        select(day, status, func.count(), func.coalesce(func.sum(Reward.amount), 0), literal(datetime.utcnow()))
+        .where(Reward.created_at.isnot(None))
+        .group_by(day, status)
+    )
+    db.session.execute(delete(RewardDailyTotal))
+    db.session.execute(insert(RewardDailyTotal).from_select(
+        ['day', 'status', 'count', 'amount', 'refreshed_at'], totals
+    ))
+    db.session.commit()
+    return db.session.query(RewardDailyTotal).count()
+
+def summary(days=30, today=None):
+    """
+    Totals per status over all time and per day for the last `days` days,
+    read from reward_daily_totals
+    """
+    today = today or datetime.utcnow().date()
+    by_status, refreshed_at = {}, None
+    for status, count, amount, status_refreshed_at in db.session.query(
+        RewardDailyTotal.status, func.sum(RewardDailyTotal.count), func.sum(RewardDailyTotal.amount),
+        func.max(RewardDailyTotal.refreshed_at)
+    ).group_by(RewardDailyTotal.status):
+        by_status[status] = {'count': count, 'amount': float(amount)}
+        refreshed_at = max(refreshed_at or status_refreshed_at, status_refreshed_at)
+
+    by_day = defaultdict(lambda: {'count': 0, 'amount': 0.0, 'by_status': {}})
+    for day, status, count, amount in db.session.query(
+        RewardDailyTotal.day, RewardDailyTotal.status, RewardDailyTotal.count, RewardDailyTotal.amount
+    ).filter(RewardDailyTotal.day >= today - timedelta(days=days - 1)):
+        totals = by_day[day.isoformat()]
+        totals['count'] += count
+        totals['amount'] += amount
+        totals['by_status'][status] = {'count': count, 'amount': amount}
+
+    return {
+        'total_count': sum(entry['count'] for entry in by_status.values()),
+        'total_amount': sum(entry['amount'] for entry in by_status.values()),
+        'by_status': by_status,
+        'by_day': [{'date': day, **by_day[day]} for day in sorted(by_day, reverse=True)],
+        'refreshed_at': refreshed_at.isoformat() if refreshed_at else None,
+    }
@@ -0,0 +1,72 @@
+from sqlalchemy import case, or_
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models.item import Item
+from app.models.reward import Reward
+from app.models.user import User
+
+# A user's reward history: the rewards they gave (as the item's owner) and
+# received (as its finder), each with its item and the user on the other
+# side. One statement selects only the columns the response needs, joining
+# items and the counterpart user, so no ORM entities are loaded and the
+# query count doesn't grow with the number of rewards.
+
+DIRECTIONS = ('given', 'received')
+
+def history_query(user_id, direction=None):
+    """
+    Rows of the user's rewards, optionally only 'given' or 'received'.
+    Ordering and limits are left to the caller (see app.utils.pagination).
+    """
+    counterpart = aliased(User)
+    counterpart_id = case((Reward.owner_user_id == user_id, Reward.finder_user_id), else_=Reward.owner_user_id)
+    query = db.session.query(
+        Reward.id, Reward.created_at, Reward.amount, Reward.status, Reward.mpesa_transaction_id,
+        Reward.mpesa_phone_number, Reward.owner_user_id, Reward.finder_user_id,
+        Item.id.label('item_id'), Item.name.label('item_name'),
+        counterpart.id.label('other_party_id'), counterpart.username.label('other_party_username')
+    ).join(Item, Item.id == Reward.item_id).outerjoin(counterpart, counterpart.id == counterpart_id)
+
+    if direction == 'given':
+        return query.filter(Reward.owner_user_id == user_id)
+    if direction == 'received':
+        return query.filter(Reward.finder_user_id == user_id)
+    return query.filter(or_(Reward.owner_user_id == user_id, Reward.finder_user_id == user_id))
+
+def to_dict(row, user_id):
+    direction = 'given' if row.owner_user_id == user_id else 'received'
+    reward = {
+        'id': row.id,
+        'direction': direction,
+        'item_id': row.item_id,
+        'item_name': row.item_name,
+        'amount': row.amount,
+        'status': row.status,
+        'mpesa_transaction_id': row.mpesa_transaction_id,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        # None until a finder is assigned
+        'other_party': {
+            'id': row.other_party_id,
+            'username': row.other_party_username
+        } if row.other_party_id else None
+    }
+    # The paying number is the owner's; finders don't see it
+    if direction == 'given':
+        reward['mpesa_phone_number'] = row.mpesa_phone_number
+    return reward
+
+def given_and_received(user_id, direction=None):
+    """
+    The full history split into rewards given and received, newest first
+    """
+    history = {'rewards_given': [], 'rewards_received': []}
+    rows = history_query(user_id, direction).order_by(Reward.created_at.desc(), Reward.id.desc())
+    for row in rows:
+        reward = to_dict(row, user_id)
+        if row.owner_user_id == user_id and direction != 'received':
+            history['rewards_given'].append(reward)
+        if row.finder_user_id == user_id and direction != 'given':
+            received = {**reward, 'direction': 'received'}
+            received.pop('mpesa_phone_number', None)
+            history['rewards_received'].append(received)
+    return history
@@ -0,0 +1,54 @@
+import re
+from sqlalchemy import text
+from app.extensions import db
+from app.models.item import Item
+
+MAX_SEARCH_TERMS = 8
+
+def parse_terms(q):
+    """
+    Split a free-text query into lowercase word terms. Only word characters
+    survive, so the terms are safe to splice into tsquery/FTS5 syntax.
+    """
+    return re.findall(r'\w+', (q or '').lower())[:MAX_SEARCH_TERMS]
+
+def search_items(q, status=None, category=None, limit=20):
+    """
+    Return approved items matching every term of `q` (each term also matches
+    as a prefix), best match first. Runs as a single indexed statement.
+    """
+    terms = parse_terms(q)
+    if not terms:
+        return []
+
+    params = {'limit': limit}
+    filters = ["items.approval_status = 'approved'"]
+    if status:
+        filters.append("items.status = :status")
+        params['status'] = status
+    if category:
+        filters.append("items.category = :category")
+        params['category'] = category
+
+    if db.engine.dialect.name == 'postgresql':
+        params['query'] = ' & '.join(f"{term}:*" for term in terms)
+        sql = f"""
+            SELECT items.* FROM items
+            WHERE items.search_vector @@ to_tsquery('english', :query)
+              AND {' AND '.join(filters)}
+            ORDER BY ts_rank(items.search_vector, to_tsquery('english', :query)) DESC, items.id DESC
+            LIMIT :limit
+        """
+    else:
+        params['query'] = ' '.join(f'"{term}"*' for term in terms)
+        # bm25 weights rank name matches above description and location matches
+        sql = f"""
+            SELECT items.* FROM items_fts
+            JOIN items ON items.id = items_fts.rowid
+            WHERE items_fts MATCH :query
+              AND {' AND '.join(filters)}
+            ORDER BY bm25(items_fts, 10.0, 4.0, 2.0), items.id DESC
+            LIMIT :limit
+        """
+
+    return Item.query.from_statement(text(sql).bindparams(**params)).all()
@@ -0,0 +1,141 @@
+import functools
+from collections import namedtuple
+from datetime import timedelta
+from flask import current_app, jsonify, request
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, jwt_required
+from app.extensions import db, jwt
+from app.models.user import User
+from app.utils.cache import MemoryBackend
+
+# Authorization from JWT claims.
+#
+# Access tokens carry the user's role and token_version as claims, so the
+# decorators below authorize a request without loading the user. A token is
+# only accepted while its version is the user's current one; those versions
+# are cached per process for AUTH_VERSION_TTL seconds. Bumping a version
+# (make_admin does) revokes older tokens at once in the worker that made the
+# change and within the TTL everywhere else.
+#
+# EventSource can only authenticate through the URL, where access logs keep
+# it, so the notification stream takes a stream token there instead: it
+# expires after STREAM_TOKEN_SECONDS and is refused by every other view.
+
+AuthUser = namedtuple('AuthUser', ['id', 'role'])
+
+def issue_access_token(user):
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={'role': user.role, 'ver': user.token_version}
+    )
+
+STREAM_SCOPE = 'notification_stream'
+
+def issue_stream_token():
+    """
+    Stream token for the user of the request's (header) token
+    """
+    claims = get_jwt()
+    return create_access_token(
+        identity=get_jwt_identity(),
+        additional_claims={'role': claims.get('role'), 'ver': claims.get('ver', 0), 'scope': STREAM_SCOPE},
+        expires_delta=timedelta(seconds=current_app.config.get('STREAM_TOKEN_SECONDS', 60))
+    )
+
+def accepts_stream_token(view):
+    """
+    Let stream tokens authenticate `view`; the view checks where they came from
+    """
+    view.accepts_stream_token = True
+    return view
+
+def _versions():
+    versions = current_app.extensions.get('auth_versions')
+    if versions is None:
+        versions = current_app.extensions['auth_versions'] = MemoryBackend(
+            current_app.config.get('AUTH_VERSION_CACHE_SIZE', 10000)
+        )
+    return versions
+
+def token_version(user_id):
+    """
+    Current token version of a user, or None if the user does not exist
+    """
+    versions = _versions()
+    version = versions.get(user_id)
+    if version is None:
+        version = db.session.query(User.token_version).filter(User.id == user_id).scalar()
+        # -1 caches "no such user" as well
+        version = -1 if version is None else version
+        versions.set(user_id, version, current_app.config.get('AUTH_VERSION_TTL', 30))
+    return None if version < 0 else version
+
+def revoke_tokens(user):
+    """
+    Invalidate every token issued to `user` so far. Takes effect once the
+    caller commits.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    _versions().delete(user.id)
+
+@jwt.token_in_blocklist_loader
+def token_is_revoked(jwt_header, jwt_payload):
+    try:
+        user_id = int(jwt_payload['sub'])
+    except (KeyError, ValueError, TypeError):
+        # Left for the handler to reject as an invalid identity
+        return False
+    # Tokens issued before versions existed count as version 0
+    return jwt_payload.get('ver', 0) != token_version(user_id)
+
+@jwt.token_verification_loader
+def token_scope_allows_view(jwt_header, jwt_payload):
+    if jwt_payload.get('scope') is None:
+        return True
+    view = current_app.view_functions.get(request.endpoint)
+    return jwt_payload['scope'] == STREAM_SCOPE and getattr(view, 'accepts_stream_token', False)
+
+@jwt.token_verification_failed_loader
+def scoped_token_rejected(jwt_header, jwt_payload):
+    return jsonify({"error": "This token only opens the notification stream"}), 401
+
+def current_user():
+    """
+    AuthUser for the request's token, or None if its identity is not a user id.
+    Built from the claims; only tokens without a role claim cost a query.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+    except (ValueError, TypeError):
+        return None
+    role = get_jwt().get('role')
+    if role is None:
+        role = db.session.query(User.role).filter(User.id == user_id).scalar()
+    return AuthUser(user_id, role)
+
+def is_admin():
+    user = current_user()
+    return user is not None and user.role == 'admin'
+
+def user_required(view):
+    """
+    Require a valid token for an existing user; the view reads it with current_user()
+    """
+    @functools.wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if current_user() is None:
+            return jsonify({"error": "Invalid user identity"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def admin_required(view):
+    """
+    Require a valid token whose role is 'admin'
+    """
+    @functools.wraps(view)
+    @user_required
+    def wrapper(*args, **kwargs):
+        if not is_admin():
+            return jsonify({"error": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,315 @@
+import fcntl
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlencode
+from flask import request, make_response, current_app
+
+# Read-through cache for public JSON responses.
+#
+# Entries are stored under a per-namespace generation number. Writes call
+# cache.invalidate(namespace), which bumps the generation so every existing
+# entry of that namespace stops being reachable at once; stale entries then
+# age out through the TTL or LRU eviction. The same generations serve as
+# resource versions for strong ETags (see `conditional`).
+#
+# Backends:
+#   'memory'     - per-process LRU with TTL; only correct with a single worker
+#   'filesystem' - files under CACHE_DIR, shared by all workers on the host
+#   'redis'      - shared Redis instance at CACHE_REDIS_URL (needs `redis`)
+#   'null'       - response caching disabled (versions are still kept)
+
+class MemoryBackend:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._epoch = uuid.uuid4().hex[:8]
+        self._entries = OrderedDict()
+        # Counters live outside the LRU so a generation can never be evicted
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key):
+        return self._counters.get(key, 0)
+
+    def epoch(self):
+        # Counters restart with the process, so versions are scoped to it
+        return self._epoch
+
+class NullBackend(MemoryBackend):
+    """
+    Stores no responses but still keeps version counters
+    """
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+class FileSystemBackend:
+    # Check the entry count (and prune) once every this many writes
+    PRUNE_EVERY = 100
+
+    def __init__(self, directory, max_entries=10000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        self._epoch = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires_at = float(f.readline())
+                if expires_at and expires_at < time.time():
+                    return None
+                return f.read()
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl if ttl else 0
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(f"{expires_at}\n".encode())
+            f.write(value)
+        os.replace(tmp_path, self._path(key))
+
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def incr(self, key):
+        path = self._path(key) + '.counter'
+        with open(path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            value = int(f.read() or 0) + 1
+            f.seek(0)
+            f.truncate()
+            f.write(str(value))
+            return value
+
+    def get_counter(self, key):
+        try:
+            with open(self._path(key) + '.counter') as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def epoch(self):
+        # Created once per cache directory; wiping the directory resets the counters and the epoch together
+        if self._epoch is None:
+            path = os.path.join(self.directory, 'epoch.counter')
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+                with os.fdopen(fd, 'w') as f:
+                    f.write(uuid.uuid4().hex[:8])
+            except FileExistsError:
+                pass
+            with open(path) as f:
+                self._epoch = f.read().strip()
+        return self._epoch
+
+    def _prune(self):
+        entries = [entry for entry in os.scandir(self.directory)
+                   if entry.is_file() and not entry.name.startswith('.') and not entry.name.endswith('.counter')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+class RedisBackend:
+    def __init__(self, url, prefix='lostfound:cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_TYPE='redis' requires the redis package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._epoch = None
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl or None)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def get_counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def epoch(self):
+        if self._epoch is None:
+            self.client.set(self.prefix + 'epoch', uuid.uuid4().hex[:8], nx=True)
+            self._epoch = self.client.get(self.prefix + 'epoch').decode()
+        return self._epoch
+
+class ResponseCache:
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.backend_name = 'null'
+        self.default_timeout = 60
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend_name = app.config.get('CACHE_TYPE', 'null')
+        if backend_name == 'memory':
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        elif backend_name == 'filesystem':
+            directory = app.config.get('CACHE_DIR') or os.path.join(app.instance_path, 'cache')
+            self.backend = FileSystemBackend(directory, app.config.get('CACHE_MAX_ENTRIES', 10000))
+        elif backend_name == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        elif backend_name == 'null':
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f"Unknown CACHE_TYPE: {backend_name}")
+        self.backend_name = backend_name
+        self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 60)
+        self.hits = self.misses = 0
+        app.extensions['response_cache'] = self
+
+    def generation(self, namespace):
+        """
+        Current generation of a namespace; bumped by every invalidation
+        """
+        return self.backend.get_counter(f"generation:{namespace}")
+
+    def etag(self, namespace):
+        """
+        Strong ETag for the current request: the namespace version plus a
+        digest of the namespace and URL. Each query string is its own
+        representation, and per-user namespaces share URLs.
+        """
+        digest = hashlib.sha1(f"{namespace}|{self._request_key()}".encode()).hexdigest()[:16]
+        return f"{self.backend.epoch()}-{self.generation(namespace)}-{digest}"
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.incr(f"generation:{namespace}")
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    @staticmethod
+    def _request_key():
+        args = urlencode(sorted(request.args.items(multi=True)))
+        return f"{request.path}?{args}"
+
+    def cached(self, namespace, timeout=None):
+        """
+        Decorator for GET views whose response depends only on the URL.
+        Successful responses are stored as bytes; anything else bypasses the cache.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = f"{namespace}:{self.generation(namespace)}:{self._request_key()}"
+                stored = self.backend.get(key)
+                if stored is not None:
+                    self._count(hit=True)
+                    header, body = stored.split(b'\n', 1)
+                    meta = json.loads(header)
+                    response = current_app.response_class(body, status=meta['status'], mimetype=meta['mimetype'])
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self._count(hit=False)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    meta = json.dumps({"status": response.status_code, "mimetype": response.mimetype})
+                    self.backend.set(key, meta.encode() + b'\n' + response.get_data(), timeout or self.default_timeout)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def conditional(self, namespace, cache_control=None):
+        """
+        Decorator adding an ETag to successful GET responses. A request whose
+        If-None-Match carries the current tag gets a 304 without the view (and
+        its queries) running at all. `namespace` may be a callable receiving
+        the view's keyword arguments.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                resolved = namespace(**kwargs) if callable(namespace) else namespace
+                etag = self.etag(resolved)
+
+                if request.if_none_match.contains(etag):
+                    response = current_app.response_class(status=304)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+
+                response.set_etag(etag)
+                if cache_control:
+                    response.headers['Cache-Control'] = cache_control
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,277 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+
+# Content-addressed image store.
+#
+# Originals are stored once per distinct content under their SHA-256:
+#   <root>/originals/ab/<sha256>.<ext>
+# and resized variants next to each other:
+#   <root>/variants/ab/<sha256>/<variant file>
+# Uploading the same bytes twice stores nothing new. Variants are rendered
+# in a process pool so resizing never runs on a request thread; until they
+# exist the variant URLs redirect to the original.
+#
+# Stored files never change, so they are served with immutable caching and
+# their hash as ETag. Bodies are either left to the front-end server
+# (IMAGE_ACCEL_REDIRECT for nginx, USE_X_SENDFILE for Apache), sent from a
+# per-process LRU of hot variants, or streamed with the WSGI file wrapper,
+# which gunicorn turns into sendfile().
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = '/images'
+
+# Upload formats we accept, and the extension each is stored under
+FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+# name: (file name, longest side in pixels, format)
+VARIANTS = {
+    'medium_webp': ('medium.webp', 1024, 'WEBP'),
+    'thumb': ('thumb.jpg', 256, 'JPEG'),
+    'thumb_webp': ('thumb.webp', 256, 'WEBP'),
+}
+VARIANT_FILES = {file_name for file_name, _, _ in VARIANTS.values()}
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True},
+    'WEBP': {'quality': 82, 'method': 4},
+}
+
+# Refuse images that would take more than this many pixels to decode
+MAX_IMAGE_PIXELS = 40_000_000
+
+# Side of the difference hash grid; 8 gives a 64-bit hash
+HASH_SIZE = 8
+HASH_MASK = (1 << HASH_SIZE * HASH_SIZE) - 1
+
+class InvalidImage(ValueError):
+    pass
+
+def split_key(image_key):
+    """
+    (digest, extension) of a stored original's key, e.g. '9f86...08.jpg'
+    """
+    digest, _, extension = image_key.partition('.')
+    return digest, extension
+
+def image_urls(image_key):
+    """
+    URLs of an original and all of its variants
+    """
+    if not image_key:
+        return None
+    digest, _ = split_key(image_key)
+    urls = {'original': f"{URL_PREFIX}/{image_key}"}
+    for name, (file_name, _, _) in VARIANTS.items():
+        urls[name] = f"{URL_PREFIX}/{digest}/{file_name}"
+    return urls
+
+def difference_hash(data):
+    """
+    64-bit difference hash (dHash) of image bytes: one bit per pixel of a
+    9x8 grayscale thumbnail, set when it is brighter than its right
+    neighbour. Resized or recompressed copies of a photo land a few bits
+    apart. Returned signed so it fits a BIGINT column.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        # A JPEG is decoded straight to grayscale at a fraction of its size
+        image.draft('L', (HASH_SIZE * 16, HASH_SIZE * 16))
+        image = ImageOps.exif_transpose(image).convert('L')
+        pixels = image.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).tobytes()
+
+    value = 0
+    for row in range(HASH_SIZE):
+        for column in range(HASH_SIZE):
+            offset = row * (HASH_SIZE + 1) + column
+            value = value << 1 | (pixels[offset] > pixels[offset + 1])
+    return value - (1 << 64) if value >> 63 else value
+
+def hamming_distance(a, b):
+    """
+    Number of bits two image hashes differ in
+    """
+    return ((a ^ b) & HASH_MASK).bit_count()
+
+def _write_atomically(path, write):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def render_variants(original_path, variant_dir):
+    """
+    Write every missing variant of an original. Runs in a pool process.
+    """
+    with Image.open(original_path) as image:
+        # Shrinking to the largest variant first lets JPEG decode at a reduced
+        # scale. The box is square, so rotating per EXIF afterwards is the same.
+        largest = max(size for _, size, _ in VARIANTS.values())
+        image.thumbnail((largest, largest), Image.LANCZOS, reducing_gap=1.0)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        # Largest first, so each variant is resized from the previous one
+        for file_name, size, image_format in sorted(VARIANTS.values(), key=lambda variant: -variant[1]):
+            path = os.path.join(variant_dir, file_name)
+            image.thumbnail((size, size), Image.LANCZOS)
+            if os.path.exists(path):
+                continue
+            variant = image.convert('RGB') if image_format == 'JPEG' and image.mode != 'RGB' else image
+            _write_atomically(path, lambda f: variant.save(f, image_format, **SAVE_OPTIONS[image_format]))
+    return variant_dir
+
+class BytesLRU:
+    """
+    Thread-safe LRU of file contents bounded by total size. Stored images
+    never change, so entries need no expiry.
+    """
+
+    def __init__(self, max_bytes, max_entry_bytes):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_entry_bytes or len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+class ImageStore:
+    def __init__(self, app=None):
+        self.root = None
+        self.workers = 0
+        self.accel_redirect = None
+        self.hot = None
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = app.config.get('IMAGE_STORAGE_ROOT') or os.path.join(app.instance_path, 'images')
+        self.max_bytes = app.config.get('IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+        # 0 renders variants synchronously (tests); otherwise the pool size
+        self.workers = app.config.get('IMAGE_WORKERS', os.cpu_count() or 1)
+        self.accel_redirect = app.config.get('IMAGE_ACCEL_REDIRECT')
+        cache_bytes = app.config.get('IMAGE_MEMORY_CACHE_BYTES', 0)
+        self.hot = BytesLRU(cache_bytes, app.config.get('IMAGE_MEMORY_CACHE_MAX_ENTRY', 256 * 1024)) if cache_bytes else None
+        app.extensions['images'] = self
+
+    def original_path(self, image_key):
+        digest, _ = split_key(image_key)
+        return os.path.join(self.root, 'originals', digest[:2], image_key)
+
+    def variant_dir(self, digest):
+        return os.path.join(self.root, 'variants', digest[:2], digest)
+
+    def variant_path(self, digest, file_name):
+        return os.path.join(self.variant_dir(digest), file_name)
+
+    def save(self, data):
+        """
+        Validate and store uploaded image bytes; returns the image key. The
+        original is written only if this content isn't stored yet.
+        """
+        image_format = self._check(data)
+        image_key = f"{hashlib.sha256(data).hexdigest()}.{FORMATS[image_format]}"
+        path = self.original_path(image_key)
+        if not os.path.exists(path):
+            _write_atomically(path, lambda f: f.write(data))
+        return image_key
+
+    @staticmethod
+    def _check(data):
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image_format = image.format
+                width, height = image.size
+                image.verify()
+        except Exception:
+            raise InvalidImage("File is not a valid image")
+        if image_format not in FORMATS:
+            raise InvalidImage(f"Unsupported image format: {image_format}")
+        if width * height > MAX_IMAGE_PIXELS:
+            raise InvalidImage("Image dimensions are too large")
+        return image_format
+
+    def variants_ready(self, digest):
+        return all(os.path.exists(self.variant_path(digest, file_name)) for file_name in VARIANT_FILES)
+
+    def schedule_variants(self, image_key):
+        """
+        Render the variants of a stored original in the background (or right
+        away when IMAGE_WORKERS is 0). Returns a Future, or None if they
+        already exist or were rendered inline.
+        """
+        digest, _ = split_key(image_key)
+        if self.variants_ready(digest):
+            return None
+        args = (self.original_path(image_key), self.variant_dir(digest))
+        if not self.workers:
+            render_variants(*args)
+            return None
+        future = self._executor().submit(render_variants, *args)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future):
+        if future.exception() is not None:
+            logger.error("Rendering image variants failed", exc_info=future.exception())
+
+    def _executor(self):
+        # One pool per process, created lazily so a store set up before gunicorn forks still works
+        if self._pool_pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pool_pid != os.getpid():
+                # Forking a threaded web worker is unsafe; forkserver starts clean processes,
+                # and preloading this module means each one doesn't import the app anew
+                if os.name == 'posix':
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload([__name__])
+                else:
+                    context = multiprocessing.get_context('spawn')
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pool_pid = os.getpid()
+        return self._pool
+
+    def shutdown(self, wait=True):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=wait)
+        self._pool = self._pool_pid = None
@@ -0,0 +1,101 @@
+import hmac
+import os
+import time
+from flask import Response, current_app, g, jsonify, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Request metrics in Prometheus format, served at /metrics.
+#
+# Under gunicorn every worker is a separate process. When
+# PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py does this) each worker
+# writes its samples to mmap'd files in that directory and /metrics merges
+# the files of all workers, so whichever worker answers the scrape reports
+# the totals. Without it the metrics are those of the current process.
+#
+# Scrapes must send "Authorization: Bearer <METRICS_TOKEN>"; the endpoint
+# names, status codes and traffic it reveals are not for the public, so
+# until the token is set /metrics refuses every request.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in database statements per request',
+    ['endpoint'], buckets=LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Counter(
+    'http_request_db_queries_total', 'Database statements executed, by endpoint',
+    ['endpoint']
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by endpoint and status code',
+    ['endpoint', 'method', 'status']
+)
+IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Requests currently being handled',
+    ['endpoint'], multiprocess_mode='livesum'
+)
+
+def endpoint_label():
+    # Unmatched URLs share one label so scanners cannot blow up the series count
+    return request.endpoint or 'unmatched'
+
+class Metrics:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.teardown_request(self._finish)
+        app.add_url_rule('/metrics', 'metrics', self.export, methods=['GET'])
+        app.extensions['metrics'] = self
+
+    @staticmethod
+    def _start():
+        g.metrics_start = time.perf_counter()
+        g.metrics_endpoint = endpoint_label()
+        IN_PROGRESS.labels(g.metrics_endpoint).inc()
+
+    @staticmethod
+    def _record(response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        endpoint = g.metrics_endpoint
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+        REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+
+        stats = g.get('query_stats')
+        if stats is not None:
+            REQUEST_DB_TIME.labels(endpoint).observe(stats.duration)
+            REQUEST_QUERIES.labels(endpoint).inc(stats.count)
+        return response
+
+    @staticmethod
+    def _finish(exc):
+        endpoint = g.pop('metrics_endpoint', None)
+        if endpoint is not None:
+            g.pop('metrics_start', None)
+            IN_PROGRESS.labels(endpoint).dec()
+
+    @staticmethod
+    def export():
+        token = current_app.config.get('METRICS_TOKEN')
+        if not token:
+            return jsonify({'error': 'Metrics are disabled until METRICS_TOKEN is set'}), 403
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return jsonify({'error': 'Unauthorized'}), 403
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,200 @@
+import base64
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Shared client for the M-Pesa Daraja API.
+#
+# OAuth access tokens are cached per process and refreshed ahead of expiry:
+# once a token is within MPESA_TOKEN_REFRESH_MARGIN seconds of expiring, one
+# thread fetches the next while the others keep using the current one, so
+# callers never wait on a refresh unless the token has actually expired.
+# Requests go through one keep-alive session per process whose pool holds
+# MPESA_POOL_SIZE connections, with MPESA_CONNECT_TIMEOUT/MPESA_READ_TIMEOUT
+# on every call. A request that fails before it is sent raises MpesaError
+# and is safe to repeat; one that was sent but got no answer raises
+# MpesaUnknownOutcome, since Daraja may already have acted on it.
+
+logger = logging.getLogger(__name__)
+
+OAUTH_PATH = '/oauth/v1/generate?grant_type=client_credentials'
+STK_PUSH_PATH = '/mpesa/stkpush/v1/processrequest'
+
+class MpesaError(Exception):
+    """
+    The request did not reach Daraja (no connection or no token), so it can be retried
+    """
+
+class MpesaUnknownOutcome(MpesaError):
+    """
+    The request was sent but no answer came back (read timeout or dropped
+    connection); Daraja may have acted on it, so it must not be blindly repeated
+    """
+
+def may_have_been_sent(error):
+    """
+    Whether a requests exception could have happened after the request went out
+    """
+    if isinstance(error, requests.ReadTimeout):
+        return True
+    if isinstance(error, requests.ConnectTimeout):
+        return False
+    if isinstance(error, (requests.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+        # Refused connections and failed DNS lookups are wrapped as NewConnectionError
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return not isinstance(reason, NewConnectionError)
+    return False
+
+class TokenCache:
+    def __init__(self, fetch, refresh_margin=60, clock=time.monotonic):
+        # fetch() returns (token, seconds until it expires)
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self.fetches = 0
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        token, expires_in = self.fetch()
+        self.fetches += 1
+        self._token, self._expires_at = token, self.clock() + expires_in
+
+    def get(self):
+        token, expires_at = self._token, self._expires_at
+        now = self.clock()
+        if token and now < expires_at - self.refresh_margin:
+            return token
+
+        if token and now < expires_at:
+            # Still valid: refresh unless another thread already is, and keep going meanwhile
+            if self._lock.acquire(blocking=False):
+                try:
+                    if self._token == token:
+                        self._refresh()
+                except MpesaError as e:
+                    logger.warning("Refreshing the M-Pesa token failed; using the current one: %s", e)
+                finally:
+                    self._lock.release()
+            return self._token
+
+        with self._lock:
+            if self._token and self.clock() < self._expires_at:
+                return self._token
+            self._refresh()
+            return self._token
+
+    def invalidate(self, token):
+        """
+        Drop `token` after Daraja rejected it, unless it was already replaced
+        """
+        with self._lock:
+            if self._token == token:
+                self._token, self._expires_at = None, 0.0
+
+class MpesaClient:
+    def __init__(self, app=None):
+        self.base_url = None
+        self.tokens = None
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.base_url = config.get('MPESA_BASE_URL', 'https://sandbox.safaricom.co.ke')
+        self.credentials = (config.get('MPESA_CONSUMER_KEY'), config.get('MPESA_CONSUMER_SECRET'))
+        self.shortcode = config.get('MPESA_SHORTCODE')
+        self.passkey = config.get('MPESA_PASSKEY')
+        self.callback_url = config.get('MPESA_CALLBACK_URL')
+        self.timeout = (config.get('MPESA_CONNECT_TIMEOUT', 5), config.get('MPESA_READ_TIMEOUT', 30))
+        self.pool_size = config.get('MPESA_POOL_SIZE') or config.get('PAYOUT_CONCURRENCY', 8)
+        self.tokens = TokenCache(self._fetch_token, config.get('MPESA_TOKEN_REFRESH_MARGIN', 60))
+        self._close_session()
+        app.extensions['mpesa'] = self
+
+    @property
+    def session(self):
+        # One session per process: sockets opened before gunicorn forks must not be shared
+        if self._session_pid == os.getpid():
+            return self._session
+        with self._lock:
+            if self._session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session, self._session_pid = session, os.getpid()
+        return self._session
+
+    def _close_session(self):
+        if self._session is not None and self._session_pid == os.getpid():
+            self._session.close()
+        self._session = self._session_pid = None
+
+    def _url(self, path):
+        return self.base_url.rstrip('/') + path
+
+    def _fetch_token(self):
+        try:
+            response = self.session.get(self._url(OAUTH_PATH), auth=self.credentials, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise MpesaError(f"OAuth request failed: {e}")
+        if response.status_code != 200:
+            raise MpesaError(f"OAuth request failed with HTTP {response.status_code}")
+        try:
+            body = response.json()
+            return body['access_token'], float(body.get('expires_in', 3599))
+        except (ValueError, KeyError, TypeError) as e:
+            raise MpesaError(f"OAuth response has no usable access token: {e!r}")
+
+    def stk_push_payload(self, amount, phone_number, account_reference, description, now=None):
+        timestamp = (now or datetime.now()).strftime('%Y%m%d%H%M%S')
+        password = base64.b64encode(f"{self.shortcode}{self.passkey}{timestamp}".encode()).decode()
+        return {
+            'BusinessShortCode': self.shortcode,
+            'Password': password,
+            'Timestamp': timestamp,
+            'TransactionType': 'CustomerPayBillOnline',
+            'Amount': int(round(amount)),
+            'PartyA': phone_number,
+            'PartyB': self.shortcode,
+            'PhoneNumber': phone_number,
+            'CallBackURL': self.callback_url,
+            'AccountReference': account_reference,
+            'TransactionDesc': description
+        }
+
+    def post(self, path, payload):
+        """
+        POST to Daraja with a cached token; returns (HTTP status, JSON body).
+        A token Daraja rejects is dropped and the request sent once more.
+        """
+        for attempt in range(2):
+            token = self.tokens.get()
+            try:
+                response = self.session.post(self._url(path), json=payload, timeout=self.timeout,
+                                             headers={'Authorization': f'Bearer {token}'})
+            except requests.RequestException as e:
+                if may_have_been_sent(e):
+                    raise MpesaUnknownOutcome(f"No answer from {path}: {e}")
+                raise MpesaError(f"Request to {path} failed: {e}")
+            if response.status_code != 401 or attempt:
+                break
+            self.tokens.invalidate(token)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        return response.status_code, body
+
+    def stk_push(self, payload):
+        return self.post(STK_PUSH_PATH, payload)
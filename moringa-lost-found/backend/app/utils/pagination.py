@@ -0,0 +1,64 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+class InvalidPageRequest(ValueError):
+    pass
+
+def encode_cursor(created_at, row_id):
+    """
+    Encode the (created_at, id) position of a row as an opaque cursor token
+    """
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a cursor token produced by encode_cursor back into (created_at, id)
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidPageRequest("Invalid cursor")
+
+def wants_page():
+    """
+    Paging is opt-in so existing clients keep receiving the full list
+    """
+    return 'limit' in request.args or 'after' in request.args
+
+def paginate(query, model):
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    Reads `limit` and `after` from the query string. Each page is a single
+    index range scan, so latency does not depend on how deep the client is.
+    """
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if limit is None or limit < 1:
+        raise InvalidPageRequest("limit must be a positive integer")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    after = request.args.get('after')
+    if after:
+        created_at, row_id = decode_cursor(after)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return Page(rows, next_cursor)
@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import uuid
+from collections import defaultdict
+
+# Publish/subscribe for live notification streams.
+#
+# Backends (PUBSUB_TYPE):
+#   'memory' - in-process broker; enough for a single worker and for tests
+#   'unix'   - every worker binds a datagram socket in PUBSUB_DIR and a
+#              publish is sent to all of them, so events reach subscribers
+#              connected to any gunicorn worker on the host. Each message is
+#              one datagram, read whole whatever its size; one too large for
+#              the kernel to send is dropped with a warning.
+
+logger = logging.getLogger(__name__)
+
+def receive_datagram(sock):
+    """
+    Block until a datagram arrives and return all of it
+    """
+    # On Linux, peeking with MSG_TRUNC reports the datagram's full length
+    size = sock.recv_into(bytearray(1), 1, socket.MSG_PEEK | socket.MSG_TRUNC)
+    payload, _, flags, _ = sock.recvmsg(max(size, 1))
+    if flags & socket.MSG_TRUNC:
+        raise ValueError(f"Datagram truncated at {len(payload)} bytes")
+    return payload
+
+class Subscription:
+    def __init__(self, channel, max_pending=100):
+        self.channel = channel
+        self._queue = queue.Queue(maxsize=max_pending)
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # A client that stopped reading loses events rather than memory
+            pass
+
+    def get(self, timeout=None):
+        """
+        Next message, or None if nothing arrived within `timeout` seconds
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+class UnixSocketBroker(InProcessBroker):
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self._pid = None
+        self._socket = None
+        self._start_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _ensure_listening(self):
+        # Bind lazily and per process, so a broker created before gunicorn forks still works
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(path)
+            self._socket = sock
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, args=(sock,), daemon=True).start()
+
+    def _listen(self, sock):
+        while True:
+            try:
+                envelope = json.loads(receive_datagram(sock))
+            except (OSError, ValueError) as e:
+                logger.warning("Dropped a pub/sub message: %s", e)
+                continue
+            self._deliver(envelope['channel'], envelope['message'])
+
+    def subscribe(self, channel):
+        self._ensure_listening()
+        return super().subscribe(channel)
+
+    def publish(self, channel, message):
+        self._ensure_listening()
+        payload = json.dumps({'channel': channel, 'message': message}).encode()
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith('.sock'):
+                    continue
+                try:
+                    sender.sendto(payload, entry.path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The worker that owned this socket has exited
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                except OSError as e:
+                    logger.warning("Could not publish %d bytes on %s: %s", len(payload), channel, e)
+        finally:
+            sender.close()
+
+class PubSub:
+    def __init__(self, app=None):
+        self.broker = InProcessBroker()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend_name = app.config.get('PUBSUB_TYPE', 'memory')
+        if backend_name == 'memory':
+            self.broker = InProcessBroker()
+        elif backend_name == 'unix':
+            directory = app.config.get('PUBSUB_DIR') or os.path.join(app.instance_path, 'pubsub')
+            self.broker = UnixSocketBroker(directory)
+        else:
+            raise ValueError(f"Unknown PUBSUB_TYPE: {backend_name}")
+        app.extensions['pubsub'] = self
+
+    def subscribe(self, channel):
+        return self.broker.subscribe(channel)
+
+    def unsubscribe(self, subscription):
+        self.broker.unsubscribe(subscription)
+
+    def publish(self, channel, message):
+        self.broker.publish(channel, message)
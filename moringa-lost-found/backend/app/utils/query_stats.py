@@ -0,0 +1,135 @@
+import contextvars
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Per-request SQL statement counting and N+1 detection.
+#
+# Engine events feed every statement executed in this context to the
+# active collectors: one per request (see QueryCounter) plus any opened by
+# count_queries()/query_budget() in tests. A statement shape repeated many
+# times within one request is almost always a query issued from a loop.
+
+_collectors = contextvars.ContextVar('query_collectors', default=())
+
+_IN_LIST_RE = re.compile(r'\(\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+))*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def statement_shape(statement):
+    """
+    Statement text with whitespace collapsed and bound parameter lists folded,
+    so the same query with different values has the same shape
+    """
+    return _IN_LIST_RE.sub('(...)', _WHITESPACE_RE.sub(' ', statement).strip())
+
+class QueryStats:
+    def __init__(self):
+        self.statements = []
+        self.duration = 0.0
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold):
+        """
+        Statement shapes executed at least `threshold` times, most frequent first
+        """
+        counts = Counter(statement_shape(statement) for statement in self.statements)
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    if collectors:
+        for stats in collectors:
+            stats.statements.append(statement)
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start_time')
+    if starts:
+        elapsed = time.perf_counter() - starts.pop()
+        for stats in _collectors.get():
+            stats.duration += elapsed
+
+@contextmanager
+def count_queries():
+    """
+    Collect the statements executed inside the block:
+
+        with count_queries() as stats:
+            client.get('/items')
+        assert stats.count == 1
+    """
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+@contextmanager
+def query_budget(max_queries):
+    """
+    Fail if the block executes more than `max_queries` statements
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = '\n'.join(f"  {statement_shape(statement)}" for statement in stats.statements)
+        raise AssertionError(f"{stats.count} queries executed, budget was {max_queries}:\n{listing}")
+
+class QueryCounter:
+    """
+    Counts the statements and database time of every request. Suspected N+1
+    patterns are logged; with DB_QUERY_HEADERS (or in debug mode) the
+    numbers are also sent as X-DB-Queries / X-DB-Time response headers.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._stop)
+        app.extensions['query_counter'] = self
+
+    @staticmethod
+    def _start():
+        g.query_stats = QueryStats()
+        g.query_stats_token = _collectors.set(_collectors.get() + (g.query_stats,))
+
+    @staticmethod
+    def _finish(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+
+        threshold = current_app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+        for shape, n in stats.repeated(threshold):
+            current_app.logger.warning(
+                "Possible N+1 query in %s %s: %d x %s", request.method, request.path, n, shape
+            )
+
+        if current_app.config.get('DB_QUERY_HEADERS') or current_app.debug:
+            response.headers['X-DB-Queries'] = str(stats.count)
+            response.headers['X-DB-Time'] = f"{stats.duration * 1000:.2f}ms"
+        return response
+
+    @staticmethod
+    def _stop(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            try:
+                _collectors.reset(token)
+            except ValueError:
+                # Reset from a different context (e.g. a streamed response); drop it instead
+                _collectors.set(tuple(s for s in _collectors.get() if s is not g.get('query_stats')))
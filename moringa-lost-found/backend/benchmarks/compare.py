@@ -0,0 +1,59 @@
+"""
+Compare load-test results against a baseline and fail on regressions.
+
+    python -m benchmarks.compare baseline.json results.json [--tolerance 0.2] [--noise-ms 1.0]
+
+An endpoint regresses when its p95 latency rises, or its throughput falls,
+by more than the tolerance. p95 changes smaller than --noise-ms are ignored
+so sub-millisecond endpoints don't fail on jitter. Exits with status 1 if
+any endpoint regressed.
+"""
+import argparse
+import json
+import sys
+
+def compare(baseline, current, tolerance=0.2, noise_ms=1.0):
+    """
+    Return (rows, regressed) where each row is (endpoint, baseline p95,
+    current p95, baseline rps, current rps, problems)
+    """
+    rows = []
+    regressed = False
+    for name, before in baseline['endpoints'].items():
+        after = current['endpoints'].get(name)
+        if after is None or not after.get('requests') or not before.get('requests'):
+            continue
+        problems = []
+        if (after['p95_ms'] > before['p95_ms'] * (1 + tolerance)
+                and after['p95_ms'] - before['p95_ms'] > noise_ms):
+            problems.append('p95')
+        if after['rps'] < before['rps'] * (1 - tolerance):
+            problems.append('throughput')
+        if after['errors'] > before['errors']:
+            problems.append('errors')
+        regressed = regressed or bool(problems)
+        rows.append((name, before['p95_ms'], after['p95_ms'], before['rps'], after['rps'], problems))
+    return rows, regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative change (0.2 = 20%%)")
+    parser.add_argument('--noise-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows, regressed = compare(baseline, current, args.tolerance, args.noise_ms)
+    print(f"{'endpoint':<28} {'p95 before':>11} {'p95 after':>10} {'req/s before':>13} {'req/s after':>12}")
+    for name, p95_before, p95_after, rps_before, rps_after, problems in rows:
+        flag = f"  REGRESSED ({', '.join(problems)})" if problems else ''
+        print(f"{name:<28} {p95_before:>11.2f} {p95_after:>10.2f} {rps_before:>13.1f} {rps_after:>12.1f}{flag}")
+    sys.exit(1 if regressed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Local stand-in for the Daraja OAuth and STK push endpoints.
+
+    python -m benchmarks.daraja_stub [--port 8089] [--latency 0.2] [--failure-rate 0.05] [--callbacks 2]
+
+Point MPESA_BASE_URL at it (e.g. http://127.0.0.1:8089) to run the payout
+worker offline. Tokens are checked on every STK push, a share of requests
+can fail with 503 to exercise retries, and request and connection counts
+are kept for tests and benchmarks. With --callbacks N every accepted request is answered
+N times at its CallBackURL, as Safaricom's retries would.
+"""
+import argparse
+import base64
+import json
+import random
+import string
+import threading
+import time
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+OAUTH_PATH = '/oauth/v1/generate'
+STK_PUSH_PATH = '/mpesa/stkpush/v1/processrequest'
+
+STK_PUSH_FIELDS = ('BusinessShortCode', 'Password', 'Timestamp', 'TransactionType', 'Amount',
+                   'PartyA', 'PartyB', 'PhoneNumber', 'CallBackURL', 'AccountReference')
+
+def callback_payload(checkout_request_id, result_code=0, amount=None, phone_number=None, receipt_number=None):
+    """
+    Body of the STK push callback Daraja posts when a request completes
+    """
+    callback = {
+        'MerchantRequestID': uuid.uuid4().hex[:16],
+        'CheckoutRequestID': checkout_request_id,
+        'ResultCode': result_code,
+        'ResultDesc': 'The service request is processed successfully.' if result_code == 0
+                      else 'Request cancelled by user',
+    }
+    if result_code == 0:
+        receipt_number = receipt_number or ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
+        callback['CallbackMetadata'] = {'Item': [
+            {'Name': 'Amount', 'Value': amount},
+            {'Name': 'MpesaReceiptNumber', 'Value': receipt_number},
+            {'Name': 'TransactionDate', 'Value': int(time.strftime('%Y%m%d%H%M%S'))},
+            {'Name': 'PhoneNumber', 'Value': int(phone_number) if phone_number else None},
+        ]}
+    return {'Body': {'stkCallback': callback}}
+
+class DarajaStub:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, token_ttl=3599, seed=None,
+                 callbacks=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        # Deliveries of each accepted request's callback
+        self.callbacks = callbacks
+        self.token_ttl = token_ttl
+        self.rng = random.Random(seed)
+        self.counts = {'connections': 0, 'tokens': 0, 'stk_pushes': 0, 'accepted': 0, 'failed': 0, 'rejected': 0,
+                       'callbacks_sent': 0, 'callbacks_failed': 0}
+        # CheckoutRequestID -> STK push payload of every accepted request
+        self.accepted = {}
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._tokens[token] = time.monotonic() + self.token_ttl
+            self.counts['tokens'] += 1
+        return token
+
+    def revoke_tokens(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def token_valid(self, token):
+        with self._lock:
+            expires_at = self._tokens.get(token)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def stk_push(self, payload):
+        """
+        (HTTP status, response body) for an authorized STK push request
+        """
+        self._count('stk_pushes')
+        if self.latency:
+            time.sleep(self.latency)
+        missing = [field for field in STK_PUSH_FIELDS if not payload.get(field)]
+        if missing:
+            self._count('rejected')
+            return 400, {'errorCode': '400.002.02', 'errorMessage': f"Bad Request - Invalid {missing[0]}"}
+        with self._lock:
+            fail = self.rng.random() < self.failure_rate
+        if fail:
+            self._count('failed')
+            return 503, {'errorCode': '503.001.01', 'errorMessage': 'Service is currently unavailable'}
+
+        checkout_request_id = f"ws_CO_{uuid.uuid4().hex[:20]}"
+        with self._lock:
+            self.accepted[checkout_request_id] = payload
+            self.counts['accepted'] += 1
+        if self.callbacks:
+            body = callback_payload(checkout_request_id, 0, payload['Amount'], payload['PhoneNumber'])
+            threading.Thread(target=self.deliver_callback, args=(payload['CallBackURL'], body), daemon=True).start()
+        return 200, {
+            'MerchantRequestID': uuid.uuid4().hex[:16],
+            'CheckoutRequestID': checkout_request_id,
+            'ResponseCode': '0',
+            'ResponseDescription': 'Success. Request accepted for processing',
+            'CustomerMessage': 'Success. Request accepted for processing'
+        }
+
+    def deliver_callback(self, url, body):
+        data = json.dumps(body).encode()
+        for _ in range(self.callbacks):
+            request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    response.read()
+                self._count('callbacks_sent')
+            except OSError:
+                self._count('callbacks_failed')
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so pooled clients reuse their connections
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                stub._count('connections')
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if urlsplit(self.path).path != OAUTH_PATH:
+                    return self._send(404, {'errorMessage': 'Not found'})
+                scheme, _, credentials = self.headers.get('Authorization', '').partition(' ')
+                if scheme != 'Basic' or ':' not in base64.b64decode(credentials or b'').decode(errors='replace'):
+                    return self._send(400, {'errorCode': '400.008.01', 'errorMessage': 'Invalid Authentication passed'})
+                self._send(200, {'access_token': stub.issue_token(), 'expires_in': str(stub.token_ttl)})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if urlsplit(self.path).path != STK_PUSH_PATH:
+                    return self._send(404, {'errorMessage': 'Not found'})
+                scheme, _, token = self.headers.get('Authorization', '').partition(' ')
+                if scheme != 'Bearer' or not stub.token_valid(token):
+                    return self._send(401, {'errorCode': '404.001.04', 'errorMessage': 'Invalid Access Token'})
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    return self._send(400, {'errorCode': '400.002.01', 'errorMessage': 'Invalid JSON'})
+                self._send(*stub.stk_push(payload))
+
+        return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds each STK push takes")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Share of STK pushes answered with 503")
+    parser.add_argument('--callbacks', type=int, default=0, help="Times each accepted request's callback is delivered")
+    args = parser.parse_args(argv)
+
+    stub = DarajaStub(args.host, args.port, latency=args.latency, failure_rate=args.failure_rate,
+                      callbacks=args.callbacks)
+    print(f"Daraja stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+        print(json.dumps(stub.counts))
+
+if __name__ == '__main__':
+    main()
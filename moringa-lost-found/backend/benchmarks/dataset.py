@@ -0,0 +1,187 @@
+"""
+Synthetic campus dataset for benchmarks.
+
+    python -m benchmarks.dataset [--preset tiny|small|campus] [--items N ...] [--database-url URL]
+
+Activity is skewed the way a real campus is: a few users report most items
+and receive most notifications (Zipf-distributed), most items are approved
+lost items, and created_at spreads over the last year. The same seed always
+produces the same data.
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.item import Item
+from app.models.report import Claim, Comment
+from app.models.reward import Reward
+from app.models.notification import Notification
+from app.services import notification_counters
+from config import Config
+
+BENCHMARK_PASSWORD = 'benchmark123'
+BATCH_SIZE = 10000
+
+@dataclass
+class Scale:
+    users: int
+    items: int
+    notifications: int
+    claims: int
+    comments: int
+    rewards: int
+    admins: int = 5
+
+PRESETS = {
+    # Small enough for CI and the test suite
+    'tiny': Scale(users=50, items=200, notifications=1000, claims=50, comments=100, rewards=20),
+    'small': Scale(users=1000, items=5000, notifications=20000, claims=1500, comments=3000, rewards=500),
+    'campus': Scale(users=50000, items=200000, notifications=1000000, claims=60000, comments=120000, rewards=20000),
+}
+
+CATEGORIES = ['electronics', 'documents', 'clothing', 'accessories', 'books', 'keys', 'bags', 'other']
+CATEGORY_WEIGHTS = [25, 15, 12, 12, 10, 10, 8, 8]
+NOUNS = {
+    'electronics': ['phone', 'laptop', 'charger', 'earphones', 'calculator', 'tablet'],
+    'documents': ['student ID', 'passport', 'certificate', 'national ID'],
+    'clothing': ['jacket', 'hoodie', 'scarf', 'cap', 'sweater'],
+    'accessories': ['watch', 'glasses', 'ring', 'bracelet', 'umbrella'],
+    'books': ['notebook', 'textbook', 'novel', 'diary'],
+    'keys': ['keys', 'car keys', 'locker key'],
+    'bags': ['backpack', 'handbag', 'laptop bag', 'wallet'],
+    'other': ['water bottle', 'lunch box', 'mug', 'charger cable'],
+}
+COLOURS = ['black', 'blue', 'red', 'white', 'grey', 'green', 'brown', 'silver']
+LOCATIONS = ['Library', 'Cafeteria', 'Gym', 'Main hall', 'Lab 3', 'Parking lot', 'Reception', 'Lecture room 2']
+
+def default_database_url(preset):
+    # A file database, so concurrent clients get their own connections
+    return f"sqlite:///{os.path.join(tempfile.gettempdir(), f'lostfound-benchmark-{preset}.db')}"
+
+def make_app(database_url):
+    config = type('BenchmarkConfig', (Config,), {'SQLALCHEMY_DATABASE_URI': database_url})
+    return create_app(config)
+
+def zipf_weights(n, s=1.1):
+    return list(itertools.accumulate(1.0 / (rank + 1) ** s for rank in range(n)))
+
+def insert_rows(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+def seed(scale, seed=42, now=None):
+    """
+    Insert a dataset of the given Scale into the current app's (empty) database
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    password_hash = generate_password_hash(BENCHMARK_PASSWORD)
+
+    def created_at():
+        return now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+    insert_rows(User, [{
+        'username': f"student{i}", 'email': f"student{i}@campus.example",
+        'password_hash': password_hash, 'role': 'admin' if i < scale.admins else 'user',
+        'token_version': 0, 'created_at': created_at()
+    } for i in range(scale.users)])
+    user_ids = [row.id for row in db.session.query(User.id).order_by(User.id)]
+    activity = zipf_weights(len(user_ids))
+
+    def active_user():
+        return rng.choices(user_ids, cum_weights=activity)[0]
+
+    items = []
+    for _ in range(scale.items):
+        category = rng.choices(CATEGORIES, weights=CATEGORY_WEIGHTS)[0]
+        noun = rng.choice(NOUNS[category])
+        colour = rng.choice(COLOURS)
+        items.append({
+            'name': f"{colour.title()} {noun}",
+            'description': f"{colour} {noun}, last seen near the {rng.choice(LOCATIONS).lower()}",
+            'status': rng.choices(['lost', 'found', 'claimed'], weights=[60, 35, 5])[0],
+            'approval_status': rng.choices(['approved', 'pending', 'rejected'], weights=[85, 10, 5])[0],
+            'category': category,
+            'location_found': rng.choice(LOCATIONS),
+            'reported_by': active_user(),
+            'created_at': created_at(),
+        })
+    insert_rows(Item, items)
+    item_ids = [row.id for row in db.session.query(Item.id).order_by(Item.id)]
+    # A minority of items attract most of the claims, comments and notifications
+    popular_ids = item_ids[:]
+    rng.shuffle(popular_ids)
+    popularity = zipf_weights(len(popular_ids), s=0.8)
+
+    def popular_item():
+        return rng.choices(popular_ids, cum_weights=popularity)[0]
+
+    insert_rows(Claim, [{
+        'item_id': popular_item(), 'claimant_id': active_user(),
+        'status': rng.choices(['pending', 'approved', 'rejected'], weights=[50, 30, 20])[0],
+        'created_at': created_at()
+    } for _ in range(scale.claims)])
+    insert_rows(Comment, [{
+        'item_id': popular_item(), 'author_id': active_user(),
+        'comment_text': rng.choice(['I think this is mine', 'Seen near the library', 'Still available?']),
+        'created_at': created_at()
+    } for _ in range(scale.comments)])
+    insert_rows(Reward, [{
+        'item_id': popular_item(), 'owner_user_id': active_user(), 'finder_user_id': active_user(),
+        'amount': float(rng.choice([100, 200, 500, 1000])),
+        'status': rng.choices(['pending', 'completed', 'failed'], weights=[30, 60, 10])[0],
+        'created_at': created_at(), 'updated_at': now
+    } for _ in range(scale.rewards)])
+    insert_rows(Notification, [{
+        'user_id': active_user(), 'title': 'Item update', 'message': 'There is news about one of your items',
+        'type': 'info', 'is_read': rng.random() < 0.7, 'item_id': popular_item(), 'created_at': created_at()
+    } for _ in range(scale.notifications)])
+    db.session.commit()
+    notification_counters.recount()
+
+def dataset_ids():
+    """
+    User, admin and item ids of a seeded database, most active users first
+    """
+    return {
+        'user_ids': [row.id for row in db.session.query(User.id).order_by(User.id)],
+        'admin_ids': [row.id for row in db.session.query(User.id).filter(User.role == 'admin').order_by(User.id)],
+        'item_ids': [row.id for row in db.session.query(Item.id).order_by(Item.id)],
+    }
+
+def parse_scale(args):
+    scale = PRESETS[args.preset]
+    overrides = {field: getattr(args, field) for field in asdict(scale) if getattr(args, field, None) is not None}
+    return Scale(**{**asdict(scale), **overrides})
+
+def add_scale_arguments(parser):
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    for field in asdict(PRESETS['small']):
+        parser.add_argument(f"--{field}", type=int, default=None, help=f"Override the preset's number of {field}")
+    parser.add_argument('--seed', type=int, default=42)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument('--database-url', help="Defaults to a SQLite file in the temp directory")
+    args = parser.parse_args()
+    database_url = args.database_url or default_database_url(args.preset)
+
+    app = make_app(database_url)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        scale = parse_scale(args)
+        seed(scale, args.seed)
+        print(f"Seeded {asdict(scale)} into {database_url}")
+
+if __name__ == '__main__':
+    main()
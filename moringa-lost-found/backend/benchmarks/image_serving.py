@@ -0,0 +1,82 @@
+"""
+Image serving throughput from a single worker.
+
+    python -m benchmarks.image_serving [--images 50] [--clients 8] [--duration 10] [--output results.json]
+
+Serves thumbnails through GET /images/... with the in-process app, in
+three configurations: streaming files (what gunicorn turns into sendfile),
+the in-memory LRU of hot thumbnails, and X-Accel-Redirect offload (only the
+headers; nginx would send the body). Each mixes plain thumbnail requests,
+revalidations answered with 304, byte ranges and larger WebP variants.
+"""
+import argparse
+import json
+import random
+import shutil
+import tempfile
+from app.extensions import images
+from app.utils.images import BytesLRU, image_urls
+from benchmarks import dataset
+from benchmarks.image_upload import make_photo
+from benchmarks.load import Scenario, InProcessClient, run, print_report
+
+MODES = ['sendfile', 'memory', 'accel']
+
+def configure(mode):
+    images.hot = BytesLRU(32 * 1024 * 1024, 256 * 1024) if mode == 'memory' else None
+    images.accel_redirect = '/protected-images/' if mode == 'accel' else None
+
+def scenarios(urls):
+    first = urls[0]['thumb_webp']
+    return [
+        Scenario('thumb', 60, None, lambda rng, ids: rng.choice(ids['urls'])['thumb_webp']),
+        Scenario('thumb.304', 20, None, lambda rng, ids: first, headers={'If-None-Match': f'"{first.split("/")[2]}-thumb.webp"'}),
+        Scenario('thumb.range', 5, None, lambda rng, ids: rng.choice(ids['urls'])['thumb'], headers={'Range': 'bytes=0-1023'}),
+        Scenario('medium_webp', 15, None, lambda rng, ids: rng.choice(ids['urls'])['medium_webp']),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help="Measured seconds per configuration")
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='lostfound-image-serving-')
+    try:
+        app = dataset.make_app(f"sqlite:///{workdir}/bench.db")
+        images.root = f"{workdir}/images"
+        images.workers = 0
+
+        rng = random.Random(42)
+        urls = []
+        for _ in range(args.images):
+            image_key = images.save(make_photo(rng, (1600, 1200)))
+            images.schedule_variants(image_key)
+            urls.append(image_urls(image_key))
+
+        results = {"endpoints": {}, "modes": {}}
+        for mode in args.modes.split(','):
+            configure(mode)
+            mode_results = run(lambda: InProcessClient(app), {'urls': urls}, {}, args.clients,
+                               args.duration, args.warmup, scenarios=scenarios(urls))
+            print(f"\n{mode}")
+            print_report(mode_results)
+            results["modes"][mode] = mode_results["total"]
+            for name, stats in mode_results["endpoints"].items():
+                results["endpoints"][f"{mode}.{name}"] = stats
+
+        results["total"] = max(results["modes"].values(), key=lambda stats: stats["rps"])
+        results["meta"] = {"images": args.images, "clients": args.clients, "duration": args.duration}
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.output}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
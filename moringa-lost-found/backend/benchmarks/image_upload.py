@@ -0,0 +1,141 @@
+"""
+Image upload throughput: request latency and background variant rendering.
+
+    python -m benchmarks.image_upload [--count 200] [--clients 8] [--workers 4] [--size 2400x1800] [--output results.json]
+
+Uploads distinct photo-sized JPEGs through POST /items/<id>/image from
+concurrent clients, then waits for the process pool to render every
+thumbnail and WebP variant. Runs against a throwaway SQLite database and
+image store in a temporary directory.
+"""
+import argparse
+import io
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+from PIL import Image, ImageDraw
+from app.extensions import db, images
+from app.models.item import Item
+from app.models.user import User
+from app.utils.auth import issue_access_token
+from benchmarks import dataset
+from benchmarks.load import summarize, print_report
+
+def make_photo(rng, size):
+    """
+    A JPEG with gradients and shapes, so it compresses like a photo rather than noise
+    """
+    width, height = size
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(20, width // 4)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=200, help="Images to upload")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4, help="Variant rendering processes (IMAGE_WORKERS)")
+    parser.add_argument('--size', default='2400x1800', help="Pixel size of the uploaded photos")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    size = tuple(int(part) for part in args.size.split('x'))
+
+    workdir = tempfile.mkdtemp(prefix='lostfound-image-bench-')
+    try:
+        app = dataset.make_app(f"sqlite:///{workdir}/bench.db")
+        images.root = f"{workdir}/images"
+        images.workers = args.workers
+
+        rng = random.Random(args.seed)
+        print(f"Generating {args.count} {args.size} photos ...")
+        photos = [make_photo(rng, size) for _ in range(args.count)]
+        megabytes = sum(len(photo) for photo in photos) / 1e6
+
+        with app.app_context():
+            db.create_all()
+            user = User(username='uploader', email='uploader@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            items = [Item(name=f"Item {i}", status='found', reported_by=user.id) for i in range(args.count)]
+            db.session.add_all(items)
+            db.session.commit()
+            item_ids = [item.id for item in items]
+            headers = {'Authorization': f"Bearer {issue_access_token(user)}"}
+
+        latencies, errors = [], 0
+        lock = threading.Lock()
+        jobs = iter(zip(item_ids, photos))
+
+        def client_loop():
+            nonlocal errors
+            client = app.test_client()
+            while True:
+                with lock:
+                    job = next(jobs, None)
+                if job is None:
+                    return
+                item_id, photo = job
+                began = time.perf_counter()
+                res = client.post(f"/items/{item_id}/image", headers=headers, content_type='multipart/form-data',
+                                  data={'image': (io.BytesIO(photo), 'photo.jpg')})
+                elapsed = time.perf_counter() - began
+                with lock:
+                    if res.status_code == 201:
+                        latencies.append(elapsed)
+                    else:
+                        errors += 1
+
+        # Start the pool's processes before timing, as a long-running server would have
+        executor = images._executor()
+        for future in [executor.submit(time.sleep, 0.2) for _ in range(args.workers)]:
+            future.result()
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client_loop) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        uploaded = time.perf_counter() - started
+        images.shutdown(wait=True)
+        rendered = time.perf_counter() - started
+
+        results = {
+            "endpoints": {"items.upload_image": summarize(latencies, errors, uploaded)},
+            "variants": {
+                "images": args.count,
+                "seconds": round(rendered, 3),
+                "images_per_second": round(args.count / rendered, 2),
+            },
+            "meta": {
+                "count": args.count,
+                "clients": args.clients,
+                "workers": args.workers,
+                "size": args.size,
+                "megabytes": round(megabytes, 1),
+            },
+        }
+        results["total"] = results["endpoints"]["items.upload_image"]
+
+        print_report(results)
+        print(f"Uploaded {megabytes:.1f} MB in {uploaded:.2f}s ({megabytes / uploaded:.1f} MB/s); "
+              f"all variants rendered after {rendered:.2f}s ({args.count / rendered:.1f} images/s)")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.output}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
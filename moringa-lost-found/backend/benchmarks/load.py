@@ -0,0 +1,237 @@
+"""
+Concurrent load test against the WSGI app with per-endpoint latency percentiles.
+
+    python -m benchmarks.load [--preset small] [--clients 16] [--duration 30] [--output results.json]
+    python -m benchmarks.load --url http://localhost:8000 --database-url postgresql://...
+
+Without --url the app runs in-process and each client thread drives it
+through its own test client, so results include routing, auth, caching and
+serialization but not the HTTP server. With --url the clients send real
+HTTP requests to a running server (e.g. gunicorn) that uses --database-url;
+tokens are minted locally, so JWT_SECRET_KEY must match the server's.
+
+The database is seeded with benchmarks.dataset on first use.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from app.extensions import db
+from app.models.item import Item
+from app.models.user import User
+from app.utils.auth import issue_access_token
+from benchmarks import dataset
+
+# Distinct users that get a token; picked with the dataset's activity skew
+TOKEN_USERS = 200
+
+SEARCH_TERMS = ['phone', 'laptop', 'keys', 'wallet', 'black', 'backpack', 'library', 'student', 'umbrella', 'charger']
+
+@dataclass
+class Scenario:
+    name: str
+    weight: int
+    auth: str  # None, 'user' or 'admin'
+    path: object  # callable(rng, ids) -> path
+    headers: dict = None
+
+SCENARIOS = [
+    Scenario('items.list', 30, None, lambda rng, ids: '/items?limit=20'),
+    Scenario('items.get', 25, None, lambda rng, ids: f"/items/{rng.choice(ids['item_ids'])}"),
+    Scenario('items.search', 10, None, lambda rng, ids: f"/items/search?q={rng.choice(SEARCH_TERMS)}"),
+    Scenario('items.comments', 10, None, lambda rng, ids: f"/items/{rng.choice(ids['item_ids'])}/comments"),
+    Scenario('notifications.unread_count', 15, 'user', lambda rng, ids: '/notifications/unread-count'),
+    Scenario('notifications.list', 8, 'user', lambda rng, ids: '/notifications?limit=20'),
+    Scenario('items.admin_pending', 2, 'admin', lambda rng, ids: '/items/admin/pending'),
+]
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path, headers):
+        response = self.client.get(path, headers=headers)
+        response.close()
+        return response.status_code
+
+class HttpClient:
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        # One keep-alive connection per client thread
+        self.session = requests.Session()
+
+    def get(self, path, headers):
+        return self.session.get(self.base_url + path, headers=headers).status_code
+
+def percentile(samples, p):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[p - 1]
+
+def summarize(latencies, errors, elapsed):
+    """
+    Latency percentiles (ms) and throughput for one endpoint's samples (seconds)
+    """
+    samples = [latency * 1000 for latency in latencies]
+    if not samples:
+        return {"requests": 0, "errors": errors, "rps": 0.0}
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+def mint_tokens(ids, rng):
+    """
+    Access tokens for the most active users (plus the admins), keyed by role
+    """
+    weights = dataset.zipf_weights(len(ids['user_ids']))
+    user_ids = set(rng.choices(ids['user_ids'], cum_weights=weights, k=TOKEN_USERS))
+    users = User.query.filter(User.id.in_(user_ids | set(ids['admin_ids']))).all()
+    return {
+        'user': [issue_access_token(user) for user in users if user.role != 'admin'],
+        'admin': [issue_access_token(user) for user in users if user.role == 'admin'],
+    }
+
+def run(make_client, ids, tokens, clients, duration, warmup=0.0, seed=0, scenarios=SCENARIOS):
+    """
+    Run `clients` threads issuing weighted scenario requests for `duration`
+    seconds after `warmup` seconds, and return the per-endpoint summary
+    """
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    start_at = time.perf_counter() + warmup
+    stop_at = start_at + duration
+    weights = [scenario.weight for scenario in scenarios]
+
+    def client_loop(index):
+        rng = random.Random(seed * 1000 + index)
+        client = make_client()
+        local_latencies = defaultdict(list)
+        local_errors = defaultdict(int)
+        while True:
+            scenario = rng.choices(scenarios, weights=weights)[0]
+            headers = dict(scenario.headers or {})
+            if scenario.auth:
+                headers['Authorization'] = f"Bearer {rng.choice(tokens[scenario.auth])}"
+            path = scenario.path(rng, ids)
+
+            began = time.perf_counter()
+            if began >= stop_at:
+                break
+            try:
+                status = client.get(path, headers)
+            except Exception:
+                status = None
+            finished = time.perf_counter()
+
+            if began < start_at:
+                continue
+            if status is None or status >= 400:
+                local_errors[scenario.name] += 1
+            else:
+                local_latencies[scenario.name].append(finished - began)
+
+        with lock:
+            for name, samples in local_latencies.items():
+                latencies[name].extend(samples)
+            for name, count in local_errors.items():
+                errors[name] += count
+
+    threads = [threading.Thread(target=client_loop, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    names = [scenario.name for scenario in scenarios if scenario.name in latencies or scenario.name in errors]
+    return {
+        "endpoints": {name: summarize(latencies[name], errors[name], duration) for name in names},
+        "total": summarize([sample for name in names for sample in latencies[name]],
+                           sum(errors.values()), duration),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(results):
+    print(f"{'endpoint':<28} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(results['endpoints'].items()) + [('total', results['total'])]
+    for name, stats in rows:
+        print(f"{name:<28} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>9.1f} "
+              f"{stats.get('p50_ms', 0):>9.2f} {stats.get('p95_ms', 0):>9.2f} {stats.get('p99_ms', 0):>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    dataset.add_scale_arguments(parser)
+    parser.add_argument('--database-url', help="Defaults to a SQLite file in the temp directory")
+    parser.add_argument('--reseed', action='store_true', help="Drop and re-seed the database first")
+    parser.add_argument('--url', help="Base URL of a running server; the app runs in-process if omitted")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30.0, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Unmeasured seconds before the run")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    database_url = args.database_url or dataset.default_database_url(args.preset)
+    scale = dataset.parse_scale(args)
+    app = dataset.make_app(database_url)
+    with app.app_context():
+        if args.reseed:
+            db.drop_all()
+        db.create_all()
+        if args.reseed or Item.query.first() is None:
+            print(f"Seeding {asdict(scale)} ...")
+            dataset.seed(scale, args.seed)
+        ids = dataset.dataset_ids()
+        tokens = mint_tokens(ids, random.Random(args.seed))
+        db.session.remove()
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        make_client = lambda: InProcessClient(app)
+
+    results = run(make_client, ids, tokens, args.clients, args.duration, args.warmup, args.seed)
+    results["meta"] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "target": args.url or "in-process",
+        "database": app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0],
+        "dataset": {
+            "users": len(ids['user_ids']),
+            "items": len(ids['item_ids']),
+            "preset": args.preset,
+            "seed": args.seed,
+        },
+        "clients": args.clients,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "python": platform.python_version(),
+    }
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
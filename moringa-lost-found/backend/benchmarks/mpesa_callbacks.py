@@ -0,0 +1,137 @@
+"""
+M-Pesa callback ingestion under bursts of retried, reordered deliveries.
+
+    python -m benchmarks.mpesa_callbacks [--payments 2000] [--repeats 3] [--failure-rate 0.1] [--clients 8] [--output results.json]
+
+Seeds rewards whose STK pushes were accepted, then posts every payment's
+callback `--repeats` times, shuffled so retries interleave, to
+POST /api/rewards/mpesa/callback from concurrent clients. Afterwards it
+checks that each transaction was stored once and every reward was settled
+exactly once. Runs against a throwaway SQLite database in a temporary
+directory.
+"""
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+from app.extensions import db
+from app.models.item import Item
+from app.models.mpesa_callback import MpesaCallback
+from app.models.payout_job import PayoutJob
+from app.models.reward import Reward
+from app.models.user import User
+from benchmarks import dataset
+from benchmarks.daraja_stub import callback_payload
+from benchmarks.load import summarize, print_report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--payments', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=3, help="Deliveries of each callback")
+    parser.add_argument('--failure-rate', type=float, default=0.1, help="Share of payments the customer cancels")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    workdir = tempfile.mkdtemp(prefix='lostfound-callback-bench-')
+    try:
+        app = dataset.make_app(f"sqlite:///{workdir}/bench.db")
+        app.config['MPESA_CALLBACK_TOKEN'] = 'bench'
+        with app.app_context():
+            db.create_all()
+            owner = User(username='owner', email='owner@example.com', password_hash='x')
+            finder = User(username='finder', email='finder@example.com', password_hash='x')
+            db.session.add_all([owner, finder])
+            db.session.flush()
+            item = Item(name="Wallet", status='found', reported_by=owner.id)
+            db.session.add(item)
+            db.session.flush()
+            rewards = [Reward(item_id=item.id, owner_user_id=owner.id, finder_user_id=finder.id, amount=500,
+                              mpesa_phone_number='254708374149', status='initiated') for _ in range(args.payments)]
+            db.session.add_all(rewards)
+            db.session.flush()
+            db.session.add_all([PayoutJob(reward_id=reward.id, status='sent', attempts=1,
+                                          checkout_request_id=f"ws_CO_{reward.id}") for reward in rewards])
+            db.session.commit()
+            reward_ids = [reward.id for reward in rewards]
+
+        expected = {reward_id: 'failed' if rng.random() < args.failure_rate else 'completed' for reward_id in reward_ids}
+        bodies = []
+        for reward_id, status in expected.items():
+            body = json.dumps(callback_payload(f"ws_CO_{reward_id}", 0 if status == 'completed' else 1032,
+                                               500, '254708374149'))
+            bodies.extend([body] * args.repeats)
+        rng.shuffle(bodies)
+
+        latencies, errors = [], 0
+        outcomes = {}
+        lock = threading.Lock()
+        deliveries = iter(bodies)
+
+        def client_loop():
+            nonlocal errors
+            client = app.test_client()
+            while True:
+                with lock:
+                    body = next(deliveries, None)
+                if body is None:
+                    return
+                began = time.perf_counter()
+                res = client.post("/api/rewards/mpesa/callback?token=bench", data=body, content_type='application/json')
+                elapsed = time.perf_counter() - began
+                with lock:
+                    if res.status_code == 200:
+                        latencies.append(elapsed)
+                        outcome = res.get_json()['outcome']
+                        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                    else:
+                        errors += 1
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client_loop) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            stored = db.session.query(MpesaCallback).count()
+            settled = dict(db.session.query(Reward.id, Reward.status).all())
+        mismatched = sum(settled[reward_id] != status for reward_id, status in expected.items())
+
+        results = {
+            "endpoints": {"rewards.mpesa_callback": summarize(latencies, errors, elapsed)},
+            "ingestion": {
+                "deliveries": len(bodies),
+                "outcomes": outcomes,
+                "callbacks_stored": stored,
+                "mismatched_rewards": mismatched,
+                "callbacks_per_minute": round(len(bodies) / elapsed * 60),
+            },
+            "meta": {
+                "payments": args.payments,
+                "repeats": args.repeats,
+                "failure_rate": args.failure_rate,
+                "clients": args.clients,
+            },
+        }
+        results["total"] = results["endpoints"]["rewards.mpesa_callback"]
+
+        print_report(results)
+        print(f"{len(bodies)} deliveries in {elapsed:.2f}s ({len(bodies) / elapsed * 60:,.0f}/min): {outcomes}; "
+              f"{stored} callbacks stored, {mismatched} rewards settled wrongly")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.output}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+M-Pesa payout throughput: queueing latency and worker send rate, offline.
+
+    python -m benchmarks.payouts [--rewards 500] [--clients 8] [--latency 0.2] [--concurrency 8] [--batch-size 50] [--failure-rate 0.05] [--output results.json]
+
+Requests payment of every reward through POST /api/rewards/<id>/pay from
+concurrent clients, then drains the queue with the payout worker against
+benchmarks/daraja_stub.py, whose STK push endpoint takes `--latency`
+seconds and fails `--failure-rate` of the time. Runs against a throwaway
+SQLite database in a temporary directory.
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import threading
+import time
+from app.extensions import db, mpesa
+from app.models.item import Item
+from app.models.payout_job import PayoutJob
+from app.models.reward import Reward
+from app.models.user import User
+from app.services import payouts
+from app.utils.auth import issue_access_token
+from benchmarks import dataset
+from benchmarks.daraja_stub import DarajaStub
+from benchmarks.load import summarize, print_report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rewards', type=int, default=500)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds each STK push takes at the stub")
+    parser.add_argument('--failure-rate', type=float, default=0.05, help="Share of STK pushes the stub fails")
+    parser.add_argument('--concurrency', type=int, default=8, help="STK pushes in flight (PAYOUT_CONCURRENCY)")
+    parser.add_argument('--batch-size', type=int, default=50, help="Jobs leased per batch (PAYOUT_BATCH_SIZE)")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='lostfound-payout-bench-')
+    stub = DarajaStub(latency=args.latency, failure_rate=args.failure_rate, seed=42).start()
+    try:
+        app = dataset.make_app(f"sqlite:///{workdir}/bench.db")
+        app.config.update(
+            MPESA_BASE_URL=stub.url,
+            PAYOUT_CONCURRENCY=args.concurrency,
+            PAYOUT_BATCH_SIZE=args.batch_size,
+            PAYOUT_BACKOFF_SECONDS=0,
+            PAYOUT_MAX_ATTEMPTS=20,
+        )
+        mpesa.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            owner = User(username='owner', email='owner@example.com', password_hash='x')
+            finder = User(username='finder', email='finder@example.com', password_hash='x')
+            db.session.add_all([owner, finder])
+            db.session.flush()
+            item = Item(name="Wallet", status='found', reported_by=owner.id)
+            db.session.add(item)
+            db.session.flush()
+            rewards = [Reward(item_id=item.id, owner_user_id=owner.id, finder_user_id=finder.id, amount=500,
+                              mpesa_phone_number='254708374149') for _ in range(args.rewards)]
+            db.session.add_all(rewards)
+            db.session.commit()
+            reward_ids = iter([reward.id for reward in rewards])
+            headers = {'Authorization': f"Bearer {issue_access_token(owner)}"}
+
+        latencies, errors = [], 0
+        lock = threading.Lock()
+
+        def client_loop():
+            nonlocal errors
+            client = app.test_client()
+            while True:
+                with lock:
+                    reward_id = next(reward_ids, None)
+                if reward_id is None:
+                    return
+                began = time.perf_counter()
+                res = client.post(f"/api/rewards/{reward_id}/pay", headers=headers)
+                elapsed = time.perf_counter() - began
+                with lock:
+                    if res.status_code == 202:
+                        latencies.append(elapsed)
+                    else:
+                        errors += 1
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client_loop) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        queued = time.perf_counter() - started
+
+        with app.app_context():
+            started = time.perf_counter()
+            attempts = payouts.work(once=True)
+            drained = time.perf_counter() - started
+            statuses = dict(db.session.query(PayoutJob.status, db.func.count()).group_by(PayoutJob.status).all())
+
+        results = {
+            "endpoints": {"rewards.initiate_payment": summarize(latencies, errors, queued)},
+            "worker": {
+                "jobs": args.rewards,
+                "attempts": attempts,
+                "seconds": round(drained, 3),
+                "jobs_per_second": round(args.rewards / drained, 2),
+                "statuses": statuses,
+                "stub": dict(stub.counts),
+            },
+            "meta": {
+                "rewards": args.rewards,
+                "clients": args.clients,
+                "latency": args.latency,
+                "failure_rate": args.failure_rate,
+                "concurrency": args.concurrency,
+                "batch_size": args.batch_size,
+            },
+        }
+        results["total"] = results["endpoints"]["rewards.initiate_payment"]
+
+        print_report(results)
+        print(f"Worker sent {args.rewards} payouts in {drained:.2f}s ({args.rewards / drained:.1f} jobs/s) "
+              f"with {attempts} attempts and {stub.counts['tokens']} token fetches over {stub.counts['connections']} connections; job statuses {statuses}")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.output}")
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
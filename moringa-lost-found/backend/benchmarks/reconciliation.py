@@ -0,0 +1,140 @@
+"""
+Reward reconciliation against a large M-Pesa statement.
+
+    python -m benchmarks.reconciliation [--rewards 100000] [--mismatch-rate 0.01] [--partitions 64] [--output results.json]
+
+Seeds completed rewards with receipt numbers and writes a statement CSV
+that agrees with them except for a known share of seeded mismatches of
+every kind, then runs the reconciliation, reporting its throughput and peak
+Python memory (tracemalloc) and checking that exactly the seeded mismatches
+were found. Runs against a throwaway SQLite database in a temporary
+directory.
+"""
+import argparse
+import csv
+import json
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.extensions import db
+from app.models.item import Item
+from app.models.reward import Reward
+from app.models.user import User
+from app.services import reconciliation
+from benchmarks import dataset
+
+KINDS = ('amount_mismatch', 'status_mismatch', 'missing_from_statement', 'missing_receipt',
+         'missing_from_ledger', 'duplicate_in_statement')
+HEADER = ['Receipt No.', 'Completion Time', 'Details', 'Transaction Status', 'Paid In', 'Withdrawn', 'Balance']
+
+def seed(path, count, mismatch_rate, rng):
+    """
+    Insert `count` rewards and write their statement to `path`; returns the seeded mismatch counts
+    """
+    owner = User(username='owner', email='owner@example.com', password_hash='x')
+    finder = User(username='finder', email='finder@example.com', password_hash='x')
+    db.session.add_all([owner, finder])
+    db.session.flush()
+    item = Item(name="Wallet", status='found', reported_by=owner.id)
+    db.session.add(item)
+    db.session.flush()
+
+    expected = Counter()
+    now = datetime.utcnow()
+    rows = []
+    with open(path, 'w', newline='') as f:
+        statement = csv.writer(f)
+        statement.writerow(HEADER)
+        for reward_id in range(1, count + 1):
+            receipt = f"R{reward_id:09d}"
+            amount = float(rng.randint(50, 5000))
+            created_at = now - timedelta(days=rng.randrange(90), seconds=rng.randrange(86400))
+            kind = rng.choice(KINDS) if rng.random() < mismatch_rate else None
+            if kind:
+                expected[kind] += 1
+            rows.append({'id': reward_id, 'item_id': item.id, 'owner_user_id': owner.id,
+                         'finder_user_id': finder.id, 'amount': amount, 'status': 'completed',
+                         'mpesa_transaction_id': None if kind == 'missing_receipt' else receipt,
+                         'mpesa_phone_number': '254708374149', 'created_at': created_at, 'updated_at': created_at})
+            if len(rows) == 5000:
+                db.session.execute(insert(Reward), rows)
+                rows = []
+
+            line = [receipt, created_at.strftime('%d-%m-%Y %H:%M:%S'), f'Reward {reward_id}', 'Completed',
+                    f"{amount + (10 if kind == 'amount_mismatch' else 0):,.2f}", '', '']
+            if kind == 'status_mismatch':
+                line[3] = 'Failed'
+            if kind not in ('missing_from_statement', 'missing_receipt'):
+                statement.writerow(line)
+            if kind == 'duplicate_in_statement':
+                statement.writerow(line)
+            if kind == 'missing_from_ledger':
+                statement.writerow([f"X{reward_id:09d}"] + line[1:])
+    if rows:
+        db.session.execute(insert(Reward), rows)
+    db.session.commit()
+    return expected
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rewards', type=int, default=100000)
+    parser.add_argument('--mismatch-rate', type=float, default=0.01)
+    parser.add_argument('--partitions', type=int, default=reconciliation.PARTITIONS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='lostfound-reconcile-bench-')
+    try:
+        app = dataset.make_app(f"sqlite:///{workdir}/bench.db")
+        statement_path = f"{workdir}/statement.csv"
+        with app.app_context():
+            db.create_all()
+            began = time.perf_counter()
+            expected = seed(statement_path, args.rewards, args.mismatch_rate, random.Random(args.seed))
+            print(f"Seeded {args.rewards} rewards in {time.perf_counter() - began:.1f}s")
+
+            tracemalloc.start()
+            began = time.perf_counter()
+            with open(statement_path, newline='', encoding='utf-8-sig') as statement:
+                result = reconciliation.reconcile(statement, partitions=args.partitions)
+            elapsed = time.perf_counter() - began
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            began = time.perf_counter()
+            daily_rows = reconciliation.refresh_daily_totals()
+            summarize_elapsed = time.perf_counter() - began
+
+        found = Counter(result['mismatches'])
+        results = {
+            "reconciliation": {
+                **result,
+                "seconds": round(elapsed, 2),
+                "rows_per_second": round((result['rewards'] + result['statement_rows']) / elapsed),
+                "peak_memory_mb": round(peak / 2 ** 20, 1),
+                "expected_mismatches": dict(expected),
+                "missed_or_extra": sum(((found - expected) + (expected - found)).values()),
+            },
+            "daily_totals": {"rows": daily_rows, "seconds": round(summarize_elapsed, 2)},
+            "meta": {"rewards": args.rewards, "mismatch_rate": args.mismatch_rate, "partitions": args.partitions},
+        }
+
+        print(f"Reconciled {result['rewards']} rewards against {result['statement_rows']} statement rows "
+              f"in {elapsed:.2f}s, peak {peak / 2 ** 20:.1f} MiB; {result['matched']} matched, "
+              f"mismatches {dict(found)} ({results['reconciliation']['missed_or_extra']} missed or extra)")
+        print(f"Rebuilt {daily_rows} daily totals in {summarize_elapsed:.2f}s")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.output}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
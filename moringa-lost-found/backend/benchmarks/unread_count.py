@@ -0,0 +1,59 @@
+"""
+Unread-count latency versus number of notifications per user.
+
+    python -m benchmarks.unread_count [--sizes 10,1000,100000] [--repeat 200]
+
+Compares the counter lookup used by GET /notifications/unread-count with the
+COUNT(*) over notifications it replaced, on an in-memory SQLite database.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+from sqlalchemy import insert
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.notification import Notification
+from app.services import notification_counters
+
+def seed_user(index, size):
+    user = User(username=f"bench{index}", email=f"bench{index}@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    now = datetime.utcnow()
+    rows = [{'user_id': user.id, 'title': 'Benchmark', 'message': 'Benchmark notification',
+             'type': 'info', 'is_read': n % 2 == 0, 'created_at': now} for n in range(size)]
+    for start in range(0, len(rows), 10000):
+        db.session.execute(insert(Notification), rows[start:start + 10000])
+    db.session.commit()
+    notification_counters.recount(user.id)
+    return user.id
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10,1000,100000')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    app = create_app('config.TestConfig')
+    with app.app_context():
+        db.create_all()
+        print(f"{'notifications':>14} {'counter (us)':>14} {'COUNT(*) (us)':>14}")
+        for index, size in enumerate(sizes):
+            user_id = seed_user(index, size)
+            counter = timed(lambda: notification_counters.get(user_id), args.repeat)
+            scan = timed(lambda: Notification.query.filter_by(user_id=user_id, is_read=False).count(), args.repeat)
+            print(f"{size:>14} {counter:>14.1f} {scan:>14.1f}")
+
+if __name__ == '__main__':
+    main()
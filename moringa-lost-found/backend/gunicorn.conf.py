@@ -0,0 +1,27 @@
+import os
+import shutil
+
+# Loaded automatically by gunicorn from the working directory, so the Procfile
+# and render.yaml share these settings.
+
+# Notification streams hold a connection open for minutes, so each worker
+# serves requests from a pool of threads rather than one at a time. Keep
+# STREAM_MAX_CONNECTIONS below this so streams can't take every thread.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 50))
+
+# Workers write Prometheus samples to this directory so /metrics can merge
+# them. It must be set before the app (and prometheus_client) is imported.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'prometheus')
+)
+
+def on_starting(server):
+    # Samples left over from a previous run would be counted again
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
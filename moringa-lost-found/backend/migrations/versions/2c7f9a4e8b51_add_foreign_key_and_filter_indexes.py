@@ -0,0 +1,57 @@
+"""add foreign key and filter indexes
+
+Revision ID: 2c7f9a4e8b51
+Revises: 9e4d2b6f0a13
+Create Date: 2026-10-18 17:05:33.941520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c7f9a4e8b51'
+down_revision = '9e4d2b6f0a13'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'items': [
+        ('ix_items_status_approval_status', ['status', 'approval_status']),
+    ],
+    'reports': [
+        ('ix_reports_item_id', ['item_id']),
+        ('ix_reports_user_id', ['user_id']),
+    ],
+    'claims': [
+        ('ix_claims_item_id_status', ['item_id', 'status']),
+        ('ix_claims_status_created_at', ['status', 'created_at']),
+        ('ix_claims_claimant_id', ['claimant_id']),
+    ],
+    'comments': [
+        ('ix_comments_item_id_created_at', ['item_id', 'created_at']),
+    ],
+    'rewards': [
+        ('ix_rewards_item_id', ['item_id']),
+        ('ix_rewards_owner_user_id_created_at', ['owner_user_id', 'created_at']),
+        ('ix_rewards_finder_user_id_created_at', ['finder_user_id', 'created_at']),
+    ],
+    'notifications': [
+        ('ix_notifications_user_id_is_read_created_at', ['user_id', 'is_read', 'created_at']),
+    ],
+}
+
+
+def upgrade():
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, indexes in reversed(list(INDEXES.items())):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _ in reversed(indexes):
+                batch_op.drop_index(name)
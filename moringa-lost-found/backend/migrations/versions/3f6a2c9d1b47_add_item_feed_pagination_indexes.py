@@ -0,0 +1,30 @@
+"""add item feed pagination indexes
+
+Revision ID: 3f6a2c9d1b47
+Revises: beaff83f7787
+Create Date: 2026-10-18 09:12:41.208316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6a2c9d1b47'
+down_revision = 'beaff83f7787'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.create_index('ix_items_approval_status_created_at_id', ['approval_status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_items_reported_by_created_at_id', ['reported_by', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_items_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_index('ix_items_created_at_id')
+        batch_op.drop_index('ix_items_reported_by_created_at_id')
+        batch_op.drop_index('ix_items_approval_status_created_at_id')
@@ -0,0 +1,29 @@
+"""cover item dashboard counts
+
+Revision ID: 4b9e7d2a6c18
+Revises: d3a8f61c2e94
+Create Date: 2026-10-18 20:03:51.226804
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b9e7d2a6c18'
+down_revision = 'd3a8f61c2e94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Adding category lets the dashboard's GROUP BY read only the index
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.create_index('ix_items_status_approval_status_category', ['status', 'approval_status', 'category'], unique=False)
+        batch_op.drop_index('ix_items_status_approval_status')
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.create_index('ix_items_status_approval_status', ['status', 'approval_status'], unique=False)
+        batch_op.drop_index('ix_items_status_approval_status_category')
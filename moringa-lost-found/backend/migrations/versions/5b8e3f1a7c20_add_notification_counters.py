@@ -0,0 +1,34 @@
+"""add notification_counters table
+
+Revision ID: 5b8e3f1a7c20
+Revises: c27e90f4d5a8
+Create Date: 2026-10-18 15:02:17.402281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e3f1a7c20'
+down_revision = 'c27e90f4d5a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill from the existing notifications
+    op.execute(
+        "INSERT INTO notification_counters (user_id, unread_count) "
+        "SELECT user_id, COUNT(*) FROM notifications WHERE is_read = false GROUP BY user_id"
+    )
+
+
+def downgrade():
+    op.drop_table('notification_counters')
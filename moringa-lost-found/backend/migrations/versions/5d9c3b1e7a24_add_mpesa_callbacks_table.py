@@ -0,0 +1,37 @@
+"""add mpesa_callbacks table
+
+Revision ID: 5d9c3b1e7a24
+Revises: e2b7c4a91f35
+Create Date: 2026-10-19 11:04:37.915208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9c3b1e7a24'
+down_revision = 'e2b7c4a91f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mpesa_callbacks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('checkout_request_id', sa.String(length=100), nullable=False),
+    sa.Column('merchant_request_id', sa.String(length=100), nullable=True),
+    sa.Column('result_code', sa.Integer(), nullable=False),
+    sa.Column('result_desc', sa.String(length=255), nullable=True),
+    sa.Column('receipt_number', sa.String(length=50), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('phone_number', sa.String(length=20), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('checkout_request_id', name='uq_mpesa_callbacks_checkout_request_id')
+    )
+
+
+def downgrade():
+    op.drop_table('mpesa_callbacks')
@@ -0,0 +1,26 @@
+"""add image key to items
+
+Revision ID: 7c1e5a9d3f62
+Revises: 4b9e7d2a6c18
+Create Date: 2026-10-18 20:41:17.583390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e5a9d3f62'
+down_revision = '4b9e7d2a6c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_key', sa.String(length=80), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_column('image_key')
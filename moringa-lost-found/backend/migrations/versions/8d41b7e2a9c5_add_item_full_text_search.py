@@ -0,0 +1,76 @@
+"""add item full-text search
+
+Revision ID: 8d41b7e2a9c5
+Revises: 3f6a2c9d1b47
+Create Date: 2026-10-18 11:02:17.553904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41b7e2a9c5'
+down_revision = '3f6a2c9d1b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Generated column: Postgres computes it for existing and future rows
+        op.execute("""
+            ALTER TABLE items ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(location_found, '')), 'C')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_items_search_vector ON items USING gin (search_vector)")
+
+    elif dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE items_fts USING fts5(
+                name, description, location_found,
+                content='items', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER items_fts_ai AFTER INSERT ON items BEGIN
+                INSERT INTO items_fts(rowid, name, description, location_found)
+                VALUES (new.id, new.name, new.description, new.location_found);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER items_fts_ad AFTER DELETE ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, name, description, location_found)
+                VALUES ('delete', old.id, old.name, old.description, old.location_found);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER items_fts_au AFTER UPDATE OF name, description, location_found ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, name, description, location_found)
+                VALUES ('delete', old.id, old.name, old.description, old.location_found);
+                INSERT INTO items_fts(rowid, name, description, location_found)
+                VALUES (new.id, new.name, new.description, new.location_found);
+            END
+        """)
+        # Index the rows that already exist
+        op.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_items_search_vector")
+        op.execute("ALTER TABLE items DROP COLUMN IF EXISTS search_vector")
+
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS items_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS items_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS items_fts_ai")
+        op.execute("DROP TABLE IF EXISTS items_fts")
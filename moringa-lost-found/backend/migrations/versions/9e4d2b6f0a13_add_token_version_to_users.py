@@ -0,0 +1,26 @@
+"""add token_version to users
+
+Revision ID: 9e4d2b6f0a13
+Revises: 5b8e3f1a7c20
+Create Date: 2026-10-18 16:21:45.730912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4d2b6f0a13'
+down_revision = '5b8e3f1a7c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,28 @@
+"""add image hash to items
+
+Revision ID: a6d2f9c4e871
+Revises: 7c1e5a9d3f62
+Create Date: 2026-10-18 23:12:48.204615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2f9c4e871'
+down_revision = '7c1e5a9d3f62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_hash', sa.BigInteger(), nullable=True))
+        batch_op.create_index('ix_items_created_at_image_hash_id', ['created_at', 'image_hash', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_index('ix_items_created_at_image_hash_id')
+        batch_op.drop_column('image_hash')
@@ -0,0 +1,52 @@
+"""add reward_mismatches and reward_daily_totals tables
+
+Revision ID: b4f1e8a2c6d9
+Revises: 5d9c3b1e7a24
+Create Date: 2026-10-19 15:22:09.481126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f1e8a2c6d9'
+down_revision = '5d9c3b1e7a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reward_mismatches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('run_id', sa.String(length=32), nullable=False),
+    sa.Column('kind', sa.String(length=30), nullable=False),
+    sa.Column('reward_id', sa.Integer(), nullable=True),
+    sa.Column('receipt_number', sa.String(length=100), nullable=True),
+    sa.Column('ledger_amount', sa.Float(), nullable=True),
+    sa.Column('statement_amount', sa.Float(), nullable=True),
+    sa.Column('ledger_status', sa.String(length=20), nullable=True),
+    sa.Column('statement_status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['reward_id'], ['rewards.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reward_mismatches', schema=None) as batch_op:
+        batch_op.create_index('ix_reward_mismatches_run_id_kind', ['run_id', 'kind'], unique=False)
+
+    op.create_table('reward_daily_totals',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+
+
+def downgrade():
+    op.drop_table('reward_daily_totals')
+    with op.batch_alter_table('reward_mismatches', schema=None) as batch_op:
+        batch_op.drop_index('ix_reward_mismatches_run_id_kind')
+
+    op.drop_table('reward_mismatches')
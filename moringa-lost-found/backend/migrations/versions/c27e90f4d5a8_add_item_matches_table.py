@@ -0,0 +1,39 @@
+"""add item_matches table
+
+Revision ID: c27e90f4d5a8
+Revises: 8d41b7e2a9c5
+Create Date: 2026-10-18 13:40:52.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27e90f4d5a8'
+down_revision = '8d41b7e2a9c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('item_matches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('found_item_id', sa.Integer(), nullable=False),
+    sa.Column('lost_item_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['found_item_id'], ['items.id'], ),
+    sa.ForeignKeyConstraint(['lost_item_id'], ['items.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('found_item_id', 'lost_item_id', name='uq_item_matches_found_lost')
+    )
+    with op.batch_alter_table('item_matches', schema=None) as batch_op:
+        batch_op.create_index('ix_item_matches_lost_item_id', ['lost_item_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('item_matches', schema=None) as batch_op:
+        batch_op.drop_index('ix_item_matches_lost_item_id')
+
+    op.drop_table('item_matches')
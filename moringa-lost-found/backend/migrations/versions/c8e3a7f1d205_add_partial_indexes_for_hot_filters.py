@@ -0,0 +1,72 @@
+"""add partial indexes for hot filters
+
+Revision ID: c8e3a7f1d205
+Revises: b4f1e8a2c6d9
+Create Date: 2026-10-19 18:41:27.306915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e3a7f1d205'
+down_revision = 'b4f1e8a2c6d9'
+branch_labels = None
+depends_on = None
+
+
+# (name, columns, postgres predicate, sqlite predicate). SQLite only uses a
+# partial index when the query repeats its predicate, and SQLAlchemy renders
+# a false boolean there as 0.
+PARTIAL_INDEXES = {
+    'notifications': [
+        ('ix_notifications_unread_user_id_created_at', ['user_id', 'created_at'],
+         'is_read = false', 'is_read = 0'),
+    ],
+    'items': [
+        ('ix_items_approved_created_at_id', ['created_at', 'id'],
+         "approval_status = 'approved'", "approval_status = 'approved'"),
+        ('ix_items_pending_created_at', ['created_at'],
+         "approval_status = 'pending'", "approval_status = 'pending'"),
+    ],
+}
+
+# Full indexes the partial ones replace; a user's whole notification list
+# keeps a (user_id, created_at) index so it is still read newest first
+REPLACED = {
+    'notifications': [
+        ('ix_notifications_user_id_is_read_created_at', ['user_id', 'is_read', 'created_at']),
+    ],
+    'items': [
+        ('ix_items_approval_status_created_at_id', ['approval_status', 'created_at', 'id']),
+    ],
+}
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+    for table, indexes in PARTIAL_INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns, postgresql_where, sqlite_where in indexes:
+                batch_op.create_index(
+                    name, columns, unique=False,
+                    postgresql_where=sa.text(postgresql_where),
+                    sqlite_where=sa.text(sqlite_where),
+                )
+            for name, _ in REPLACED[table]:
+                batch_op.drop_index(name)
+
+
+def downgrade():
+    for table, indexes in PARTIAL_INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in REPLACED[table]:
+                batch_op.create_index(name, columns, unique=False)
+            for name, *_ in reversed(indexes):
+                batch_op.drop_index(name)
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_id_created_at')
@@ -0,0 +1,56 @@
+"""add on delete actions to item foreign keys
+
+Revision ID: d3a8f61c2e94
+Revises: 2c7f9a4e8b51
+Create Date: 2026-10-18 19:12:08.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f61c2e94'
+down_revision = '2c7f9a4e8b51'
+branch_labels = None
+depends_on = None
+
+
+# (table, column, referred table, ON DELETE action)
+FOREIGN_KEYS = [
+    ('claims', 'item_id', 'items', 'CASCADE'),
+    ('comments', 'item_id', 'items', 'CASCADE'),
+    ('reports', 'item_id', 'items', 'CASCADE'),
+    ('rewards', 'item_id', 'items', 'CASCADE'),
+    ('rewards', 'report_id', 'reports', 'SET NULL'),
+    ('item_matches', 'found_item_id', 'items', 'CASCADE'),
+    ('item_matches', 'lost_item_id', 'items', 'CASCADE'),
+    ('notifications', 'item_id', 'items', 'SET NULL'),
+]
+
+# The original constraints were created unnamed; this is the name Postgres
+# gave them, and lets batch mode find the reflected ones on SQLite
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def _replace_foreign_keys(with_actions):
+    tables = {}
+    for table, column, referred, ondelete in FOREIGN_KEYS:
+        tables.setdefault(table, []).append((column, referred, ondelete))
+
+    for table, foreign_keys in tables.items():
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, referred, ondelete in foreign_keys:
+                name = f"{table}_{column}_fkey"
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(
+                    name, referred, [column], ['id'], ondelete=ondelete if with_actions else None
+                )
+
+
+def upgrade():
+    _replace_foreign_keys(with_actions=True)
+
+
+def downgrade():
+    _replace_foreign_keys(with_actions=False)
@@ -0,0 +1,44 @@
+"""add payout_jobs table
+
+Revision ID: e2b7c4a91f35
+Revises: a6d2f9c4e871
+Create Date: 2026-10-19 09:26:03.481552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c4a91f35'
+down_revision = 'a6d2f9c4e871'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payout_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reward_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('checkout_request_id', sa.String(length=100), nullable=True),
+    sa.Column('last_error', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['reward_id'], ['rewards.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('checkout_request_id', name='uq_payout_jobs_checkout_request_id')
+    )
+    with op.batch_alter_table('payout_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_payout_jobs_status_run_at', ['status', 'run_at'], unique=False)
+        batch_op.create_index('ix_payout_jobs_reward_id', ['reward_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('payout_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_payout_jobs_reward_id')
+        batch_op.drop_index('ix_payout_jobs_status_run_at')
+
+    op.drop_table('payout_jobs')
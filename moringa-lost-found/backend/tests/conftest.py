@@ -0,0 +1,44 @@
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.services import notification_outbox
+from app.utils.auth import issue_access_token
+
+@pytest.fixture
+def app():
+    app = create_app('config.TestConfig')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    """
+    Create a user directly in the database and return (user, auth headers)
+    """
+    def _make_user(username, role='user'):
+        user = User(username=username, email=f"{username}@example.com", role=role)
+        user.set_password("password123")
+        db.session.add(user)
+        db.session.commit()
+        token = issue_access_token(user)
+        return user, {"Authorization": f"Bearer {token}"}
+    return _make_user
+
+@pytest.fixture
+def send_notification(app):
+    """
+    Stage a notification through the outbox and commit it; returns the Notification
+    """
+    def _send_notification(user_id, title, message, **kwargs):
+        notification = notification_outbox.notify(user_id, title, message, **kwargs)
+        db.session.commit()
+        return notification
+    return _send_notification
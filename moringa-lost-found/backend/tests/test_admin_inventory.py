@@ -0,0 +1,54 @@
+import pytest
+from app.extensions import db
+from app.models.item import Item
+from app.models.report import Claim, Comment
+from app.models.reward import Reward
+from app.utils.query_stats import count_queries
+
+def get_counting_queries(client, url, headers):
+    with count_queries() as stats:
+        res = client.get(url, headers=headers)
+    assert res.status_code == 200
+    return res, stats.count
+
+def seed_inventory(reporter_id, claimant_id, count, status):
+    for i in range(count):
+        item = Item(name=f"Item {i}", status=status, approval_status='approved', reported_by=reporter_id)
+        db.session.add(item)
+        db.session.flush()
+        db.session.add_all([
+            Claim(item_id=item.id, claimant_id=claimant_id, status='approved'),
+            Claim(item_id=item.id, claimant_id=reporter_id, status='rejected'),
+            Comment(item_id=item.id, author_id=claimant_id, comment_text="Mine!"),
+            Reward(item_id=item.id, owner_user_id=claimant_id, finder_user_id=reporter_id, amount=100)
+        ])
+    db.session.commit()
+
+@pytest.mark.parametrize("url,status", [
+    ("/items/admin/found-items", "found"),
+    ("/items/admin/inventory", "found"),
+    ("/items/admin/claimed-items", "claimed"),
+])
+def test_admin_inventory_views_use_constant_query_count(client, make_user, url, status):
+    _, admin_headers = make_user("admin", role='admin')
+    reporter_id = make_user("reporter")[0].id
+    claimant_id = make_user("claimant")[0].id
+
+    seed_inventory(reporter_id, claimant_id, 2, status)
+    db.session.expunge_all()
+    # Warm the token version cache so both measurements see the same auth cost
+    client.get(url, headers=admin_headers)
+    _, small = get_counting_queries(client, url, admin_headers)
+
+    seed_inventory(reporter_id, claimant_id, 20, status)
+    db.session.expunge_all()
+    res, large = get_counting_queries(client, url, admin_headers)
+
+    assert small == large
+    body = res.get_json()
+    assert body["total_count"] == 22
+    item = next(iter(v for k, v in body.items() if k.endswith("items")))[0]
+    assert item["reported_by"]["username"] == "reporter"
+    assert item["total_claims"] == 2 and item["total_rewards"] == 1
+    if status == "claimed":
+        assert item["claimed_by"]["username"] == "claimant"
@@ -0,0 +1,52 @@
+from flask_jwt_extended import create_access_token
+from app.extensions import db
+from app.models.item import Item
+from app.models.user import User
+from app.utils.query_stats import query_budget
+
+def test_login_embeds_role_and_token_version(client, make_user):
+    make_user("admin", role='admin')
+    response = client.post("/auth/admin/login", json={"username": "admin", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+    client.get("/auth/admin/protected", headers=headers)
+    # Once the version is cached, authorizing costs no queries at all
+    with query_budget(0):
+        response = client.get("/auth/admin/protected", headers=headers)
+    assert response.status_code == 200
+
+def test_admin_required_rejects_non_admins(client, make_user):
+    _, headers = make_user("someone")
+    response = client.get("/items/admin/pending-items", headers=headers)
+    assert response.status_code == 403
+    assert response.get_json() == {"error": "Admin access required"}
+    assert client.get("/items/admin/pending-items").status_code == 401
+
+def test_make_admin_revokes_tokens_with_the_old_role(client, make_user):
+    user, old_headers = make_user("promoted")
+    assert client.get("/auth/admin/protected", headers=old_headers).status_code == 403
+
+    assert client.put("/auth/make-admin/promoted").status_code == 200
+    assert client.get("/auth/admin/protected", headers=old_headers).status_code == 401
+
+    response = client.post("/auth/login", json={"email": "promoted@example.com", "password": "password123"})
+    new_headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    assert client.get("/auth/admin/protected", headers=new_headers).status_code == 200
+
+def test_tokens_without_claims_fall_back_to_the_stored_role(client, make_user):
+    admin, _ = make_user("admin", role='admin')
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"}
+    assert client.get("/auth/admin/protected", headers=headers).status_code == 200
+
+def test_owner_can_update_and_delete_their_item(client, make_user):
+    owner, headers = make_user("owner")
+    _, other_headers = make_user("other")
+    item = Item(name="Wallet", approval_status="approved", reported_by=owner.id)
+    db.session.add(item)
+    db.session.commit()
+    item_id = item.id
+
+    assert client.put(f"/items/{item_id}", headers=other_headers, json={"name": "Mine"}).status_code == 403
+    assert client.put(f"/items/{item_id}", headers=headers, json={"name": "Purse"}).status_code == 200
+    assert client.delete(f"/items/{item_id}", headers=headers).status_code == 200
+    assert db.session.get(Item, item_id) is None
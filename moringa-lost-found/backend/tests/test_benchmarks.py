@@ -0,0 +1,51 @@
+import random
+from collections import Counter
+from app.extensions import db
+from app.models.item import Item
+from app.models.notification import Notification
+from app.services import notification_counters
+from benchmarks import dataset, load
+from benchmarks.compare import compare
+
+SCALE = dataset.Scale(users=30, items=120, notifications=600, claims=20, comments=40, rewards=10, admins=2)
+
+def test_seed_is_skewed_and_consistent(app):
+    dataset.seed(SCALE, seed=7)
+
+    assert Item.query.count() == SCALE.items
+    assert Notification.query.count() == SCALE.notifications
+    # The counters table agrees with the seeded notifications
+    assert notification_counters.recount() == 0
+
+    per_user = Counter(user_id for (user_id,) in db.session.query(Notification.user_id))
+    busiest = per_user.most_common(3)
+    assert sum(count for _, count in busiest) > SCALE.notifications * 0.3
+
+def test_run_reports_percentiles_per_endpoint(app):
+    dataset.seed(SCALE, seed=7)
+    ids = dataset.dataset_ids()
+    tokens = load.mint_tokens(ids, random.Random(0))
+
+    results = load.run(lambda: load.InProcessClient(app), ids, tokens, clients=1, duration=0.5)
+
+    assert results['total']['requests'] > 0
+    assert results['total']['errors'] == 0
+    for stats in results['endpoints'].values():
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms'] <= stats['max_ms']
+
+def test_compare_flags_regressions_beyond_tolerance():
+    def result(p95, rps):
+        return {"endpoints": {"items.list": {"requests": 100, "errors": 0, "rps": rps, "p95_ms": p95}}}
+
+    _, regressed = compare(result(10.0, 100.0), result(11.0, 95.0), tolerance=0.2)
+    assert not regressed
+
+    rows, regressed = compare(result(10.0, 100.0), result(15.0, 100.0), tolerance=0.2)
+    assert regressed and rows[0][-1] == ['p95']
+
+    rows, regressed = compare(result(10.0, 100.0), result(10.0, 70.0), tolerance=0.2)
+    assert regressed and rows[0][-1] == ['throughput']
+
+    # Sub-millisecond jitter is not a regression
+    _, regressed = compare(result(0.2, 100.0), result(0.5, 100.0), tolerance=0.2, noise_ms=1.0)
+    assert not regressed
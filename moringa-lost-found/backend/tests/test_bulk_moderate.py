@@ -0,0 +1,64 @@
+import re
+from app.extensions import db
+from app.models.item import Item
+from app.models.notification import Notification
+from app.services import notification_counters
+from app.utils.query_stats import count_queries
+
+URL = "/items/admin/bulk-moderate"
+WRITE_RE = re.compile(r'\s*(UPDATE|INSERT INTO) (\w+)')
+
+def seed_items(reporter_ids, approval_status='pending', status='lost'):
+    items = [Item(name=f"Item {i}", status=status, approval_status=approval_status, reported_by=reporter_id)
+             for i, reporter_id in enumerate(reporter_ids)]
+    db.session.add_all(items)
+    db.session.commit()
+    return [item.id for item in items]
+
+def test_bulk_approve_reports_per_item_results(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    alice = make_user("alice")[0].id
+    bob = make_user("bob")[0].id
+    pending = seed_items([alice, alice, bob])
+    already = seed_items([bob], approval_status='approved')
+
+    res = client.put(URL, json={"action": "approve", "item_ids": pending + already + [9999]}, headers=admin_headers)
+
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["updated_count"] == 3
+    assert body["results"] == (
+        [{"id": item_id, "result": "approved"} for item_id in pending]
+        + [{"id": already[0], "result": "unchanged"}, {"id": 9999, "result": "not_found"}]
+    )
+    assert {item.approval_status for item in Item.query.filter(Item.id.in_(pending))} == {'approved'}
+    # One notification per moderated item, none for the unchanged one
+    assert Notification.query.filter_by(title="Item Approved").count() == 3
+    assert notification_counters.get(alice) == 2
+    assert notification_counters.get(bob) == 1
+
+def test_bulk_reject_is_one_update_and_one_insert(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    reporters = [make_user(f"reporter{i}")[0].id for i in range(20)]
+    item_ids = seed_items(reporters)
+    client.put(URL, json={"action": "reject", "item_ids": [item_ids[0]]}, headers=admin_headers)
+
+    with count_queries() as stats:
+        res = client.put(URL, json={"action": "reject", "item_ids": item_ids[1:], "reason": "Duplicate"},
+                         headers=admin_headers)
+
+    assert res.status_code == 200
+    assert res.get_json()["updated_count"] == 19
+    writes = [match.groups() for match in map(WRITE_RE.match, stats.statements) if match]
+    assert writes == [('UPDATE', 'items'), ('INSERT INTO', 'notifications'), ('INSERT INTO', 'notification_counters')]
+    notification = Notification.query.filter_by(user_id=reporters[5]).one()
+    assert notification.message.endswith("Reason: Duplicate")
+
+def test_bulk_moderate_validates_input(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    _, user_headers = make_user("alice")
+
+    assert client.put(URL, json={"action": "approve", "item_ids": [1]}, headers=user_headers).status_code == 403
+    assert client.put(URL, json={"action": "delete", "item_ids": [1]}, headers=admin_headers).status_code == 400
+    assert client.put(URL, json={"action": "approve", "item_ids": []}, headers=admin_headers).status_code == 400
+    assert client.put(URL, json={"action": "approve", "item_ids": ["1"]}, headers=admin_headers).status_code == 400
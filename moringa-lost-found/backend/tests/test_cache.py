@@ -0,0 +1,82 @@
+import pytest
+from app.extensions import db, cache
+from app.models.item import Item
+from app.models.report import Claim
+from app.utils.cache import MemoryBackend, FileSystemBackend
+
+@pytest.fixture
+def item(make_user):
+    reporter, _ = make_user("reporter")
+    item = Item(name="Wallet", status="found", approval_status="approved", reported_by=reporter.id)
+    db.session.add(item)
+    db.session.commit()
+    return item
+
+def test_repeat_requests_are_served_from_cache(client, item):
+    first = client.get("/items?limit=5")
+    second = client.get("/items?limit=5")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.get_data() == second.get_data()
+    assert client.get("/items?limit=6").headers["X-Cache"] == "MISS"
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.parametrize("write", ["update", "delete", "approve", "reject", "approve_claim"])
+def test_item_writes_invalidate_cached_responses(client, make_user, item, write):
+    _, admin_headers = make_user("admin", role='admin')
+    item_id = item.id
+    for url in ("/items", f"/items/{item_id}", "/user/items"):
+        client.get(url)
+        assert client.get(url).headers["X-Cache"] == "HIT"
+
+    if write == "update":
+        client.put(f"/items/{item_id}", headers=admin_headers, json={"name": "Purse"})
+    elif write == "delete":
+        client.delete(f"/items/{item_id}", headers=admin_headers)
+    elif write == "approve":
+        client.put(f"/items/admin/{item_id}/approve", headers=admin_headers)
+    elif write == "reject":
+        client.put(f"/items/admin/{item_id}/reject", headers=admin_headers, json={"reason": "dup"})
+    else:
+        claim = Claim(item_id=item_id, claimant_id=item.reported_by)
+        db.session.add(claim)
+        db.session.commit()
+        client.put(f"/items/admin/claims/{claim.id}/approve", headers=admin_headers)
+
+    for url in ("/items", f"/items/{item_id}", "/user/items"):
+        assert client.get(url).headers.get("X-Cache") != "HIT"
+
+def test_add_item_invalidates_feed(client, make_user, item):
+    _, headers = make_user("someone")
+    client.get("/user/items")
+    client.post("/items", headers=headers, json={"name": "Keys"})
+
+    res = client.get("/user/items")
+    assert res.headers["X-Cache"] == "MISS"
+    assert {i["name"] for i in res.get_json()} == {"Wallet", "Keys"}
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: MemoryBackend(max_entries=2),
+    lambda tmp_path: FileSystemBackend(str(tmp_path)),
+])
+def test_backends_store_bytes_and_count(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    backend.set("a", b"payload", ttl=60)
+    backend.set("expired", b"old", ttl=-1)
+
+    assert backend.get("a") == b"payload"
+    assert backend.get("expired") is None
+    assert backend.get_counter("generation:items") == 0
+    assert backend.incr("generation:items") == 1
+    assert backend.get_counter("generation:items") == 1
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"2", ttl=60)
+    backend.get("a")
+    backend.set("c", b"3", ttl=60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
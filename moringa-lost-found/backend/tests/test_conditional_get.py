@@ -0,0 +1,76 @@
+from app.extensions import db
+from app.models.item import Item
+from app.utils.query_stats import query_budget
+
+
+def test_item_feed_answers_304_without_queries(client, make_user):
+    reporter, headers = make_user("reporter")
+    db.session.add(Item(name="Wallet", approval_status="approved", reported_by=reporter.id))
+    db.session.commit()
+
+    first = client.get("/items")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "public, no-cache"
+    etag = first.headers["ETag"]
+
+    with query_budget(0):
+        second = client.get("/items", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.get_data() == b""
+
+    # Different query strings are different representations
+    assert client.get("/items?limit=1", headers={"If-None-Match": etag}).status_code == 200
+
+    client.post("/items", headers=headers, json={"name": "Keys"})
+    assert client.get("/items", headers={"If-None-Match": etag}).status_code == 200
+
+def test_comments_etag_changes_when_comment_added(client, make_user):
+    reporter, headers = make_user("reporter")
+    item = Item(name="Wallet", approval_status="approved", reported_by=reporter.id)
+    db.session.add(item)
+    db.session.commit()
+    url = f"/items/{item.id}/comments"
+
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    client.post(url, headers=headers, json={"content": "Is this yours?"})
+    res = client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert len(res.get_json()) == 1
+
+def test_notification_etags_are_per_user_and_follow_writes(client, make_user, send_notification):
+    alice, alice_headers = make_user("alice")
+    bob, bob_headers = make_user("bob")
+    send_notification(alice.id, "Hi", "Hello Alice")
+    send_notification(bob.id, "Hi", "Hello Bob")
+
+    res = client.get("/notifications", headers=alice_headers)
+    etag = res.headers["ETag"]
+    assert res.headers["Cache-Control"] == "private, no-cache"
+    assert client.get("/notifications", headers={**alice_headers, "If-None-Match": etag}).status_code == 304
+    # Same URL and version, different user: must not match
+    assert client.get("/notifications", headers={**bob_headers, "If-None-Match": etag}).status_code == 200
+
+    notification_id = res.get_json()[0]["id"]
+    client.put(f"/notifications/{notification_id}/read", headers=alice_headers)
+    res = client.get("/notifications", headers={**alice_headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.get_json()[0]["is_read"] is True
+
+def test_notification_etags_change_when_an_item_they_mention_is_deleted(client, make_user, send_notification):
+    reporter, reporter_headers = make_user("reporter")
+    alice, alice_headers = make_user("alice")
+    item = Item(name="Wallet", approval_status="approved", reported_by=reporter.id)
+    db.session.add(item)
+    db.session.commit()
+    send_notification(alice.id, "Match", "A wallet was found", item_id=item.id)
+
+    res = client.get("/notifications", headers=alice_headers)
+    etag = res.headers["ETag"]
+    assert res.get_json()[0]["item_id"] == item.id
+
+    assert client.delete(f"/items/{item.id}", headers=reporter_headers).status_code == 200
+    res = client.get("/notifications", headers={**alice_headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.get_json()[0]["item_id"] is None
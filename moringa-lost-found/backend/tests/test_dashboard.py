@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models.item import Item
+from app.models.report import Claim
+from app.models.reward import Reward
+from app.utils.query_stats import count_queries
+
+def seed(reporter_id, now):
+    db.session.add_all([
+        Item(name="Phone", status='lost', approval_status='approved', category='electronics',
+             reported_by=reporter_id, created_at=now),
+        Item(name="Keys", status='found', approval_status='pending', category='keys',
+             reported_by=reporter_id, created_at=now - timedelta(days=1)),
+        Item(name="Bag", status='found', approval_status='approved', category='bags',
+             reported_by=reporter_id, created_at=now - timedelta(days=1)),
+        Item(name="Old", status='claimed', approval_status='approved', category='bags',
+             reported_by=reporter_id, created_at=now - timedelta(days=60)),
+    ])
+    db.session.flush()
+    item_id = Item.query.first().id
+    db.session.add_all([
+        Claim(item_id=item_id, claimant_id=reporter_id, status='pending'),
+        Claim(item_id=item_id, claimant_id=reporter_id, status='pending'),
+        Claim(item_id=item_id, claimant_id=reporter_id, status='rejected'),
+        Reward(item_id=item_id, owner_user_id=reporter_id, amount=100, status='completed'),
+        Reward(item_id=item_id, owner_user_id=reporter_id, amount=250, status='completed'),
+        Reward(item_id=item_id, owner_user_id=reporter_id, amount=50, status='pending'),
+    ])
+    db.session.commit()
+
+def test_dashboard_totals(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    reporter = make_user("reporter")[0]
+    now = datetime.utcnow()
+    seed(reporter.id, now)
+
+    res = client.get("/admin/dashboard?days=7", headers=admin_headers)
+
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["items"]["total"] == 4
+    assert body["items"]["by_status"] == {"lost": 1, "found": 2, "claimed": 1}
+    assert body["items"]["by_approval_status"] == {"approved": 3, "pending": 1}
+    assert body["items"]["by_category"] == {"electronics": 1, "keys": 1, "bags": 2}
+    assert body["claims"]["pending"] == 2 and body["claims"]["total"] == 3
+    assert body["rewards"]["by_status"]["completed"] == {"count": 2, "amount": 350.0}
+    assert body["rewards"]["total_amount"] == 400.0
+
+    per_day = body["items_per_day"]
+    assert len(per_day) == 7
+    assert per_day[-1] == {"date": now.date().isoformat(), "count": 1}
+    assert per_day[-2]["count"] == 2
+    assert sum(day["count"] for day in per_day) == 3
+
+def test_dashboard_is_a_fixed_number_of_grouped_queries(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    reporter = make_user("reporter")[0]
+    client.get("/admin/dashboard?days=1", headers=admin_headers)
+
+    counts = []
+    for days in (7, 8):
+        seed(reporter.id, datetime.utcnow())
+        with count_queries() as stats:
+            assert client.get(f"/admin/dashboard?days={days}", headers=admin_headers).status_code == 200
+        counts.append(stats.count)
+
+    assert counts == [4, 4]
+    # Served from the cache until it expires
+    with count_queries() as stats:
+        assert client.get("/admin/dashboard?days=8", headers=admin_headers).status_code == 200
+    assert stats.count == 0
+
+def test_dashboard_requires_admin_and_valid_days(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    _, user_headers = make_user("alice")
+
+    assert client.get("/admin/dashboard", headers=user_headers).status_code == 403
+    assert client.get("/admin/dashboard?days=0", headers=admin_headers).status_code == 400
+    assert client.get("/admin/dashboard?days=366", headers=admin_headers).status_code == 400
@@ -0,0 +1,109 @@
+import io
+import random
+from PIL import Image, ImageDraw
+from app.extensions import db, images
+from app.models.item import Item
+from app.services import duplicates
+from app.services.duplicates import ImageHashIndex, MAX_DUPLICATE_DISTANCE
+from app.utils.images import difference_hash, hamming_distance
+from app.utils.query_stats import query_budget
+
+def make_photo(seed, size=(800, 600)):
+    rng = random.Random(seed)
+    image = Image.new('RGB', size, (128, 128, 128))
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.ellipse((x, y, x + rng.randrange(40, 300), y + rng.randrange(40, 300)),
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+def recompress(data, size=(400, 300)):
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(data)).resize(size).save(buffer, 'JPEG', quality=50)
+    return buffer.getvalue()
+
+def upload(client, item_id, data, headers):
+    return client.post(f"/items/{item_id}/image", headers=headers,
+                       data={'image': (io.BytesIO(data), 'photo.jpg')}, content_type='multipart/form-data')
+
+def test_difference_hash_survives_resizing_and_recompression():
+    photo = make_photo(1)
+
+    assert hamming_distance(difference_hash(photo), difference_hash(recompress(photo))) <= 2
+    assert hamming_distance(difference_hash(photo), difference_hash(make_photo(2))) > MAX_DUPLICATE_DISTANCE
+
+def test_hash_index_search_matches_a_linear_scan():
+    rng = random.Random(0)
+    hashes = {item_id: rng.getrandbits(64) - (1 << 63) for item_id in range(2000)}
+    # Plant near copies of the first few hashes at every distance up to the limit
+    for distance in range(MAX_DUPLICATE_DISTANCE + 2):
+        hashes[10000 + distance] = hashes[distance] ^ sum(1 << bit for bit in rng.sample(range(64), distance))
+    index = ImageHashIndex()
+    index.update(hashes.items())
+
+    # Hashes that change or leave the window are dropped from the index
+    del hashes[1]
+    hashes[2] = hashes[3]
+    index.update(hashes.items())
+
+    for query in [hashes[0], hashes[10001], hashes[3], hashes[10009]]:
+        expected = {item_id: hamming_distance(query, value) for item_id, value in hashes.items()
+                    if hamming_distance(query, value) <= MAX_DUPLICATE_DISTANCE}
+        assert index.search(query) == expected
+    assert len(index) == len(hashes)
+
+def test_pending_items_flag_suspected_duplicates(client, make_user, tmp_path):
+    images.root = str(tmp_path)
+    _, admin_headers = make_user("admin", role='admin')
+    alice, alice_headers = make_user("alice")
+    bob, bob_headers = make_user("bob")
+    items = [Item(name=name, status='found', approval_status=approval, reported_by=user.id)
+             for name, approval, user in [("Black umbrella", 'approved', alice), ("Umbrella", 'pending', bob),
+                                          ("Water bottle", 'pending', bob)]]
+    db.session.add_all(items)
+    db.session.commit()
+    original, copy, other = items
+
+    photo = make_photo(7)
+    upload(client, original.id, photo, alice_headers)
+    upload(client, copy.id, recompress(photo), bob_headers)
+    upload(client, other.id, make_photo(8), bob_headers)
+
+    client.get("/items/admin/pending-items", headers=admin_headers)
+    with query_budget(5):
+        res = client.get("/items/admin/pending-items", headers=admin_headers)
+
+    assert res.status_code == 200
+    body = res.get_json()
+    flagged = {item["id"]: item["suspected_duplicates"] for item in body["pending_items"]}
+    assert [duplicate["id"] for duplicate in flagged[copy.id]] == [original.id]
+    assert flagged[copy.id][0]["reported_by"] == alice.id
+    assert flagged[other.id] == []
+    assert body["suspected_duplicate_count"] == 1
+
+    # Replacing the photo with an external URL clears its hash
+    client.put(f"/items/{copy.id}", json={"image_url": "https://example.com/umbrella.jpg"}, headers=bob_headers)
+    body = client.get("/items/admin/pending-items", headers=admin_headers).get_json()
+    assert body["suspected_duplicate_count"] == 0
+
+def test_duplicate_search_holds_the_index_lock(app, make_user, monkeypatch):
+    reporter, _ = make_user("reporter")
+    first = Item(name="Wallet", status="found", reported_by=reporter.id, image_hash=0b1011)
+    second = Item(name="Wallet", status="found", reported_by=reporter.id, image_hash=0b1010)
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    # update() changes the index's sets in place, so searches must not run alongside it
+    held = []
+    search = ImageHashIndex.search
+    def checked_search(self, *args, **kwargs):
+        held.append(duplicates._index_lock.locked())
+        return search(self, *args, **kwargs)
+    monkeypatch.setattr(ImageHashIndex, 'search', checked_search)
+
+    found = duplicates.find_duplicates([first, second])
+    assert held == [True, True]
+    assert [other["id"] for other in found[first.id]] == [second.id]
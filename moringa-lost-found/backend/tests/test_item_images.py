@@ -0,0 +1,174 @@
+import io
+import os
+import pytest
+from PIL import Image
+from app.extensions import db, images
+from app.models.item import Item
+from app.utils.images import BytesLRU
+
+def make_image(color=(200, 30, 30), size=(1600, 1200), image_format='JPEG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    return buffer.getvalue()
+
+def upload(client, item_id, data, headers, filename='photo.jpg'):
+    return client.post(f"/items/{item_id}/image", headers=headers,
+                       data={'image': (io.BytesIO(data), filename)}, content_type='multipart/form-data')
+
+@pytest.fixture
+def store(app, tmp_path):
+    images.root = str(tmp_path)
+    yield images
+    images.shutdown()
+
+@pytest.fixture
+def item_with_owner(make_user):
+    user, headers = make_user("owner")
+    item = Item(name="Blue bag", status='found', approval_status='approved', reported_by=user.id)
+    db.session.add(item)
+    db.session.commit()
+    return item, headers
+
+def stored_files(root):
+    return sorted(os.path.relpath(os.path.join(directory, name), root)
+                  for directory, _, names in os.walk(root) for name in names)
+
+def test_upload_stores_original_and_variants(client, store, item_with_owner):
+    item, headers = item_with_owner
+
+    res = upload(client, item.id, make_image(), headers)
+
+    assert res.status_code == 201
+    urls = res.get_json()["item"]["images"]
+    assert set(urls) == {"original", "thumb", "thumb_webp", "medium_webp"}
+    assert client.get(f"/items/{item.id}").get_json()["images"] == urls
+
+    original = client.get(urls["original"])
+    assert original.status_code == 200 and original.mimetype == 'image/jpeg'
+    thumb = Image.open(io.BytesIO(client.get(urls["thumb_webp"]).data))
+    assert thumb.format == 'WEBP' and max(thumb.size) == 256
+    assert max(Image.open(io.BytesIO(client.get(urls["medium_webp"]).data)).size) == 1024
+
+def test_admin_setting_an_external_url_drops_the_upload(client, store, item_with_owner, make_user):
+    item, headers = item_with_owner
+    _, admin_headers = make_user("admin", role='admin')
+    upload(client, item.id, make_image(), headers)
+    item_id = item.id
+
+    res = client.put(f"/items/admin/{item_id}/update", headers=admin_headers,
+                     json={"image_url": "https://example.com/bag.jpg"})
+
+    assert res.status_code == 200
+    shown = client.get(f"/items/{item_id}").get_json()
+    assert shown["image_url"] == "https://example.com/bag.jpg"
+    assert not shown.get("images")
+    item = db.session.get(Item, item_id)
+    assert (item.image_key, item.image_hash) == (None, None)
+
+def test_identical_uploads_are_stored_once(client, store, item_with_owner, make_user):
+    item, headers = item_with_owner
+    other = Item(name="Blue bag", status='lost', reported_by=item.reported_by)
+    db.session.add(other)
+    db.session.commit()
+    data = make_image()
+
+    first = upload(client, item.id, data, headers).get_json()["item"]["images"]
+    second = upload(client, other.id, data, headers).get_json()["item"]["images"]
+
+    assert first == second
+    assert len([path for path in stored_files(store.root) if path.startswith('originals')]) == 1
+
+def test_variants_render_in_the_process_pool(client, store, item_with_owner):
+    item, headers = item_with_owner
+    store.workers = 2
+    digest = upload(client, item.id, make_image(color=(10, 90, 200)), headers).get_json()["item"]["images"]["original"]
+    digest = digest.rsplit('/', 1)[1].split('.')[0]
+
+    store.shutdown(wait=True)
+    assert store.variants_ready(digest)
+    assert client.get(f"/images/{digest}/thumb.jpg").status_code == 200
+
+def test_upload_rejects_bad_input(client, store, item_with_owner, make_user, app):
+    item, headers = item_with_owner
+    _, stranger = make_user("stranger")
+
+    assert upload(client, item.id, make_image(), stranger).status_code == 403
+    assert upload(client, item.id, b"not an image", headers).status_code == 400
+    assert client.post(f"/items/{item.id}/image", headers=headers).status_code == 400
+
+    store.max_bytes = 1000
+    assert upload(client, item.id, make_image(), headers).status_code == 413
+    assert stored_files(store.root) == []
+
+def test_variant_urls_redirect_to_the_original_until_rendered(client, store):
+    image_key = store.save(make_image())
+    digest = image_key.split('.')[0]
+
+    res = client.get(f"/images/{digest}/thumb.webp")
+
+    assert res.status_code == 307
+    assert res.headers["Location"].endswith(f"/images/{image_key}")
+
+def test_unknown_images_are_not_found(client, store):
+    assert client.get(f"/images/{'0' * 64}.jpg").status_code == 404
+    assert client.get(f"/images/{'0' * 64}/thumb.jpg").status_code == 404
+    assert client.get("/images/../../config.py").status_code == 404
+
+@pytest.fixture
+def thumb(client, store, item_with_owner):
+    item, headers = item_with_owner
+    urls = upload(client, item.id, make_image(), headers).get_json()["item"]["images"]
+    return urls["thumb"]
+
+def test_images_are_served_with_immutable_hash_etags(client, thumb):
+    res = client.get(thumb)
+
+    assert res.status_code == 200
+    assert res.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    etag = res.headers["ETag"]
+    assert thumb.split('/')[2] in etag
+
+    again = client.get(thumb, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+
+@pytest.mark.parametrize("cache_bytes", [0, 1024 * 1024])
+def test_range_requests(client, thumb, store, cache_bytes):
+    store.hot = BytesLRU(cache_bytes, 256 * 1024) if cache_bytes else None
+    full = client.get(thumb).data
+
+    res = client.get(thumb, headers={"Range": "bytes=10-19"})
+
+    assert res.status_code == 206
+    assert res.data == full[10:20]
+    assert res.headers["Content-Range"] == f"bytes 10-19/{len(full)}"
+
+def test_hot_thumbnails_are_served_from_memory(client, thumb, store):
+    store.hot = BytesLRU(1024 * 1024, 256 * 1024)
+    first = client.get(thumb).data
+
+    # Served from memory even once the file is gone
+    digest, file_name = thumb.split('/')[2:]
+    os.remove(store.variant_path(digest, file_name))
+    assert client.get(thumb).data == first
+
+def test_bytes_lru_evicts_least_recently_used_by_size():
+    lru = BytesLRU(max_bytes=10, max_entry_bytes=6)
+    lru.put('a', b'aaaa')
+    lru.put('b', b'bbbb')
+    lru.get('a')
+    lru.put('c', b'cccc')
+    lru.put('big', b'x' * 7)
+
+    assert lru.get('b') is None and lru.get('big') is None
+    assert lru.get('a') == b'aaaa' and lru.get('c') == b'cccc'
+    assert lru.size == 8
+
+def test_accel_redirect_leaves_the_body_to_nginx(client, thumb, store):
+    store.accel_redirect = '/protected-images/'
+
+    res = client.get(thumb)
+
+    digest, file_name = thumb.split('/')[2:]
+    assert res.status_code == 200 and res.data == b""
+    assert res.headers["X-Accel-Redirect"] == f"/protected-images/variants/{digest[:2]}/{digest}/{file_name}"
+    assert client.get(thumb, headers={"If-None-Match": res.headers["ETag"]}).status_code == 304
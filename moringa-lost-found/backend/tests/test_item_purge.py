@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models.item import Item
+from app.models.item_match import ItemMatch
+from app.models.notification import Notification
+from app.models.report import Report, Claim, Comment
+from app.models.reward import Reward
+from app.services import notification_counters, notification_outbox
+from app.utils.query_stats import count_queries
+
+URL = "/items/admin/purge"
+
+def seed_items(reporter_id, other_id, count, **fields):
+    """
+    Items with one of every kind of child row, plus an unread and a read
+    notification for `other_id` about each
+    """
+    item_ids = []
+    for i in range(count):
+        item = Item(name=f"Item {i}", status='found', approval_status='approved', reported_by=reporter_id, **fields)
+        db.session.add(item)
+        db.session.flush()
+        report = Report(user_id=reporter_id, item_id=item.id)
+        db.session.add_all([
+            report,
+            Claim(item_id=item.id, claimant_id=other_id),
+            Comment(item_id=item.id, author_id=other_id, comment_text="Mine"),
+        ])
+        db.session.flush()
+        db.session.add(Reward(item_id=item.id, report_id=report.id, owner_user_id=other_id, amount=100))
+        notification_outbox.notify(other_id, "Update", f"About item {i}", item_id=item.id)
+        notification_outbox.notify(other_id, "Seen", f"About item {i}", item_id=item.id)
+        item_ids.append(item.id)
+    db.session.commit()
+    Notification.query.filter_by(title="Seen").update({'is_read': True})
+    notification_counters.recount()
+    return item_ids
+
+def child_counts():
+    return [model.query.count() for model in (Report, Claim, Comment, Reward, ItemMatch, Notification)]
+
+def test_purge_removes_items_and_everything_attached(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    reporter = make_user("reporter")[0].id
+    other = make_user("other")[0].id
+    purged = seed_items(reporter, other, 3)
+    kept = seed_items(reporter, other, 2)
+    db.session.add(ItemMatch(found_item_id=kept[0], lost_item_id=purged[0], score=0.9))
+    # A reward on a kept item that points at a purged item's report
+    db.session.add(Reward(item_id=kept[1], report_id=Report.query.filter_by(item_id=purged[1]).one().id,
+                          owner_user_id=other, amount=50))
+    db.session.commit()
+
+    res = client.post(URL, json={"item_ids": purged + [9999]}, headers=admin_headers)
+
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["purged_ids"] == purged and body["not_found"] == [9999]
+    assert Item.query.count() == 2
+    assert child_counts() == [2, 2, 2, 3, 0, 4]
+    assert Reward.query.filter_by(amount=50).one().report_id is None
+    # Only the purged items' unread notifications left the counter
+    assert notification_counters.get(other) == 2
+    assert notification_counters.recount() == 0
+
+def test_purge_statement_count_does_not_grow_with_items(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    reporter = make_user("reporter")[0].id
+    other = make_user("other")[0].id
+    client.post(URL, json={"item_ids": [9999]}, headers=admin_headers)
+
+    counts = []
+    for size in (2, 20):
+        item_ids = seed_items(reporter, other, size)
+        db.session.expunge_all()
+        with count_queries() as stats:
+            res = client.post(URL, json={"item_ids": item_ids}, headers=admin_headers)
+        assert res.get_json()["purged_count"] == size
+        counts.append(stats.count)
+
+    assert counts[0] == counts[1]
+    assert child_counts() == [0] * 6
+
+def test_purge_by_age_and_approval_status(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    reporter = make_user("reporter")[0].id
+    old = datetime.utcnow() - timedelta(days=120)
+    stale = seed_items(reporter, reporter, 2, created_at=old)
+    Item.query.filter(Item.id == stale[0]).update({'approval_status': 'rejected'})
+    seed_items(reporter, reporter, 1)
+    db.session.commit()
+
+    res = client.post(URL, json={"older_than_days": 90, "approval_status": "rejected"}, headers=admin_headers)
+
+    assert res.get_json()["purged_ids"] == [stale[0]]
+    assert Item.query.count() == 2
+
+def test_purge_validates_input(client, make_user):
+    _, admin_headers = make_user("admin", role='admin')
+    _, user_headers = make_user("alice")
+
+    assert client.post(URL, json={"item_ids": [1]}, headers=user_headers).status_code == 403
+    assert client.post(URL, json={}, headers=admin_headers).status_code == 400
+    assert client.post(URL, json={"item_ids": []}, headers=admin_headers).status_code == 400
+    assert client.post(URL, json={"older_than_days": 0}, headers=admin_headers).status_code == 400
+
+def test_deleting_an_item_cascades_in_the_database(client, make_user):
+    reporter, headers = make_user("reporter")
+    other = make_user("other")[0].id
+    item_id = seed_items(reporter.id, other, 1)[0]
+    db.session.expunge_all()
+
+    assert client.delete(f"/items/{item_id}", headers=headers).status_code == 200
+    assert child_counts()[:5] == [0, 0, 0, 0, 0]
+    # Notifications outlive the item they were about
+    assert {n.item_id for n in Notification.query} == {None}
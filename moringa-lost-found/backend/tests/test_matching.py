@@ -0,0 +1,95 @@
+from collections import namedtuple
+from app.extensions import db
+from app.models.item import Item
+from app.models.item_match import ItemMatch
+from app.models.notification import Notification
+from app.services import matching
+from app.services.matching import LostItemIndex
+
+Row = namedtuple('Row', ['id', 'name', 'description', 'category', 'location_found', 'reported_by'])
+
+LOST = [
+    Row(1, "Black Samsung phone", "Galaxy S21 with a cracked screen", "electronics", "Library", 10),
+    Row(2, "Blue water bottle", "Steel bottle with stickers", "other", "Gym", 11),
+    Row(3, "Student ID card", "Moringa ID for Jane", "documents", "Cafeteria", 12),
+    Row(4, "Phone charger", "USB-C charger", "electronics", "Library", 13),
+]
+
+def test_index_ranks_text_category_and_location_agreement():
+    index = LostItemIndex(LOST)
+    found = [
+        Row(100, "Samsung phone", "black, screen cracked", "electronics", "Main library", 20),
+        Row(101, "Water bottle", "blue steel", "other", "Gym", 21),
+    ]
+
+    phone_matches, bottle_matches = index.top_matches(found, k=2)
+
+    assert [index.ids[row] for row, _ in phone_matches][0] == 1
+    assert [index.ids[row] for row, _ in bottle_matches] == [2]
+    assert phone_matches[0][1] > 0.5
+
+def test_index_never_matches_the_finders_own_items():
+    index = LostItemIndex(LOST)
+    own = Row(100, "Black Samsung phone", "Galaxy S21 with a cracked screen", "electronics", "Library", 10)
+
+    (matches,) = index.top_matches([own])
+    assert 1 not in [index.ids[row] for row, _ in matches]
+
+def test_approving_found_item_stores_matches_and_notifies_owner(client, make_user):
+    owner, _ = make_user("owner")
+    finder, _ = make_user("finder")
+    _, admin_headers = make_user("admin", role='admin')
+
+    lost = Item(name="Black Samsung phone", description="cracked screen", category="electronics",
+                location_found="Library", status="lost", approval_status="approved", reported_by=owner.id)
+    unrelated = Item(name="Umbrella", description="green", status="lost", approval_status="approved",
+                     reported_by=owner.id)
+    found = Item(name="Samsung phone", description="black with a cracked screen", category="electronics",
+                 location_found="Library", status="found", reported_by=finder.id)
+    db.session.add_all([lost, unrelated, found])
+    db.session.commit()
+
+    res = client.put(f"/items/admin/{found.id}/approve", headers=admin_headers)
+    assert res.status_code == 200
+
+    matches = ItemMatch.query.all()
+    assert [(m.found_item_id, m.lost_item_id) for m in matches] == [(found.id, lost.id)]
+    assert Notification.query.filter_by(user_id=owner.id, item_id=found.id).count() == 1
+
+    # Approving again must not duplicate matches or notifications
+    client.put(f"/items/admin/{found.id}/approve", headers=admin_headers)
+    assert ItemMatch.query.count() == 1
+    assert Notification.query.filter_by(user_id=owner.id, item_id=found.id).count() == 1
+
+def test_index_grows_incrementally_and_masks_closed_items():
+    index = LostItemIndex(LOST[:2])
+    index.add(LOST[2:])
+    found = [Row(100, "Phone charger", "usb-c", "electronics", "Library", 20)]
+
+    (matches,) = index.top_matches(found)
+    assert index.ids[matches[0][0]] == 4
+
+    index.set_open([1, 2, 3])
+    (matches,) = index.top_matches(found)
+    assert 4 not in [index.ids[row] for row, _ in matches]
+
+def test_matching_scores_while_holding_the_index_lock(client, make_user, monkeypatch):
+    owner, _ = make_user("owner")
+    finder, _ = make_user("finder")
+    _, admin_headers = make_user("admin", role='admin')
+    db.session.add(Item(name="Black Samsung phone", status="lost", approval_status="approved", reported_by=owner.id))
+    found = Item(name="Samsung phone", status="found", reported_by=finder.id)
+    db.session.add(found)
+    db.session.commit()
+
+    # A concurrent refresh replaces the index's arrays, so nothing may read them unlocked
+    held = []
+    top_matches = LostItemIndex.top_matches
+    def checked_top_matches(self, *args, **kwargs):
+        held.append(matching._index_lock.locked())
+        return top_matches(self, *args, **kwargs)
+    monkeypatch.setattr(LostItemIndex, 'top_matches', checked_top_matches)
+
+    assert client.put(f"/items/admin/{found.id}/approve", headers=admin_headers).status_code == 200
+    assert held == [True]
+    assert ItemMatch.query.count() == 1
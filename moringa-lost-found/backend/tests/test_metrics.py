@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+from prometheus_client import REGISTRY
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRAPE_HEADERS = {"Authorization": "Bearer test-metrics-token"}
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_requests_are_recorded_by_endpoint(client):
+    labels = {"endpoint": "items.get_all_items", "method": "GET"}
+    before = sample("http_requests_total", status="200", **labels)
+    observed = sample("http_request_duration_seconds_count", **labels)
+
+    client.get("/items")
+    client.get("/items")
+
+    assert sample("http_requests_total", status="200", **labels) == before + 2
+    assert sample("http_request_duration_seconds_count", **labels) == observed + 2
+    assert sample("http_request_db_queries_total", endpoint="items.get_all_items") >= 1
+    assert sample("http_requests_in_progress", endpoint="items.get_all_items") == 0
+
+def test_unknown_urls_share_one_label(client):
+    before = sample("http_requests_total", endpoint="unmatched", method="GET", status="404")
+    client.get("/no-such-page-1")
+    client.get("/no-such-page-2")
+    assert sample("http_requests_total", endpoint="unmatched", method="GET", status="404") == before + 2
+
+def test_metrics_endpoint_serves_prometheus_text(client):
+    client.get("/notifications/unread-count")
+    response = client.get("/metrics", headers=SCRAPE_HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'http_requests_total{endpoint="notification_bp.get_unread_count",method="GET",status="401"}' in body
+    assert "# TYPE http_request_duration_seconds histogram" in body
+
+def test_metrics_need_the_scrape_token(client):
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer guessed"}).status_code == 403
+    assert client.get("/metrics?token=test-metrics-token").status_code == 403
+
+def test_metrics_are_refused_until_a_token_is_set(app, client):
+    app.config["METRICS_TOKEN"] = None
+    response = client.get("/metrics", headers={"Authorization": "Bearer "})
+    assert response.status_code == 403
+    assert "METRICS_TOKEN" in response.get_json()["error"]
+
+WORKER = """
+from app import create_app
+from app.extensions import db
+app = create_app('config.TestConfig')
+with app.app_context():
+    db.create_all()
+    client = app.test_client()
+    for _ in range({requests}):
+        client.get('/items')
+    if {scrape}:
+        print(client.get('/metrics', headers={{'Authorization': 'Bearer test-metrics-token'}}).get_data(as_text=True))
+"""
+
+def run_worker(metrics_dir, requests, scrape=False):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir))
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER.format(requests=requests, scrape=scrape)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120, check=True
+    )
+    return result.stdout
+
+def test_metrics_are_aggregated_across_worker_processes(tmp_path):
+    run_worker(tmp_path, 3)
+    run_worker(tmp_path, 4)
+    body = run_worker(tmp_path, 0, scrape=True)
+    assert 'http_requests_total{endpoint="items.get_all_items",method="GET",status="200"} 7.0' in body
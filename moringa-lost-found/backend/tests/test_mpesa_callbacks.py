@@ -0,0 +1,118 @@
+import pytest
+from app.extensions import db
+from app.models.item import Item
+from app.models.mpesa_callback import MpesaCallback
+from app.models.payout_job import PayoutJob
+from app.models.report import Report
+from app.models.reward import Reward
+from app.services import payouts
+from app.utils.query_stats import query_budget
+from benchmarks.daraja_stub import callback_payload
+
+URL = "/api/rewards/mpesa/callback"
+
+@pytest.fixture
+def sent_reward(make_user):
+    """
+    A reward whose STK push Daraja accepted as ws_CO_1, with its report
+    """
+    owner, _ = make_user("owner")
+    finder, _ = make_user("finder")
+    item = Item(name="Wallet", status='found', approval_status='approved', reported_by=owner.id)
+    db.session.add(item)
+    db.session.flush()
+    report = Report(user_id=owner.id, item_id=item.id, reward_status='initiated')
+    db.session.add(report)
+    db.session.flush()
+    reward = Reward(item_id=item.id, report_id=report.id, owner_user_id=owner.id, finder_user_id=finder.id,
+                    amount=500, mpesa_phone_number='254708374149', status='initiated')
+    db.session.add(reward)
+    db.session.flush()
+    db.session.add(PayoutJob(reward_id=reward.id, status='sent', attempts=1, checkout_request_id='ws_CO_1'))
+    db.session.commit()
+    return reward
+
+def test_success_callback_completes_the_reward_once(client, sent_reward):
+    body = callback_payload('ws_CO_1', 0, 500, '254708374149', receipt_number='NLJ7RT61SV')
+
+    with query_budget(3):
+        res = client.post(URL, json=body)
+
+    assert res.status_code == 200
+    assert res.get_json() == {'ResultCode': 0, 'ResultDesc': 'Accepted', 'outcome': 'applied'}
+    reward = db.session.get(Reward, sent_reward.id)
+    assert (reward.status, reward.mpesa_transaction_id) == ('completed', 'NLJ7RT61SV')
+    assert db.session.get(Report, sent_reward.report_id).reward_status == 'completed'
+    updated_at = reward.updated_at
+
+    # Safaricom's retries are acknowledged without writing anything
+    for _ in range(3):
+        with query_budget(1):
+            res = client.post(URL, json=body)
+        assert res.status_code == 200 and res.get_json()['outcome'] == 'duplicate'
+    assert MpesaCallback.query.count() == 1
+    db.session.expire_all()
+    assert db.session.get(Reward, sent_reward.id).updated_at == updated_at
+
+def test_late_failure_never_regresses_a_completed_reward(client, sent_reward):
+    sent_reward.status = 'completed'
+    db.session.commit()
+
+    res = client.post(URL, json=callback_payload('ws_CO_1', 1032))
+
+    assert res.get_json()['outcome'] == 'ignored'
+    assert db.session.get(Reward, sent_reward.id).status == 'completed'
+    assert MpesaCallback.query.one().result_code == 1032
+
+def test_failure_callback_fails_the_reward(client, sent_reward):
+    res = client.post(URL, json=callback_payload('ws_CO_1', 1032))
+
+    assert res.get_json()['outcome'] == 'applied'
+    reward = db.session.get(Reward, sent_reward.id)
+    assert (reward.status, reward.mpesa_transaction_id) == ('failed', None)
+
+def test_callback_ahead_of_the_worker_is_applied_when_it_records_the_request(app, client, sent_reward):
+    job = PayoutJob(reward_id=sent_reward.id)
+    db.session.add(job)
+    db.session.execute(db.update(PayoutJob).where(PayoutJob.checkout_request_id == 'ws_CO_1')
+                       .values(status='failed', checkout_request_id=None))
+    db.session.commit()
+
+    res = client.post(URL, json=callback_payload('ws_CO_early', 0, 500, '254708374149'))
+    assert res.get_json()['outcome'] == 'ignored'
+
+    leased, = payouts.lease_jobs(10, lease_seconds=300)
+    payouts.record_results([(leased, payouts.SendResult('ws_CO_early', None, False))], app.config)
+
+    assert db.session.get(Reward, sent_reward.id).status == 'completed'
+
+def test_malformed_and_unauthorized_callbacks_are_rejected(app, client, sent_reward):
+    assert client.post(URL, json={"status": "completed"}).status_code == 400
+    assert client.post(URL, data="not json", content_type='application/json').status_code == 400
+    success_without_receipt = callback_payload('ws_CO_1', 0, 500, '254708374149')
+    success_without_receipt['Body']['stkCallback']['CallbackMetadata']['Item'].pop(1)
+    assert client.post(URL, json=success_without_receipt).status_code == 400
+
+    app.config['MPESA_CALLBACK_TOKEN'] = 's3cret'
+    body = callback_payload('ws_CO_1', 0, 500, '254708374149')
+    assert client.post(URL, json=body).status_code == 403
+    assert client.post(f"{URL}?token=s3cret", json=body).status_code == 200
+    assert db.session.get(Reward, sent_reward.id).status == 'completed'
+
+def test_success_for_the_wrong_amount_is_rejected_and_not_kept(client, sent_reward):
+    res = client.post(URL, json=callback_payload('ws_CO_1', 0, 1, '254708374149', receipt_number='FAKE000001'))
+
+    assert res.status_code == 400
+    assert MpesaCallback.query.count() == 0
+    assert db.session.get(Reward, sent_reward.id).status == 'initiated'
+
+    # Safaricom's real callback still settles the reward
+    res = client.post(URL, json=callback_payload('ws_CO_1', 0, 500, '254708374149', receipt_number='NLJ7RT61SV'))
+    assert res.get_json()['outcome'] == 'applied'
+    assert db.session.get(Reward, sent_reward.id).status == 'completed'
+
+def test_callbacks_are_refused_without_a_token_outside_tests(app, client, sent_reward):
+    app.config['TESTING'] = False
+    res = client.post(URL, json=callback_payload('ws_CO_1', 0, 500, '254708374149'))
+    assert res.status_code == 403
+    assert db.session.get(Reward, sent_reward.id).status == 'initiated'
@@ -0,0 +1,112 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import socket
+import pytest
+import requests
+from app.extensions import mpesa
+from app.utils.mpesa import MpesaError, MpesaUnknownOutcome, TokenCache
+from benchmarks.daraja_stub import DarajaStub
+
+@pytest.fixture
+def stub(app):
+    with DarajaStub(seed=1) as stub:
+        mpesa.base_url = stub.url
+        yield stub
+
+def payload(i=0):
+    return mpesa.stk_push_payload(100 + i, '254708374149', f'REWARD-{i}', 'Reward')
+
+def test_concurrent_requests_share_one_token_and_the_pool(stub):
+    with ThreadPoolExecutor(max_workers=mpesa.pool_size) as executor:
+        responses = list(executor.map(lambda i: mpesa.stk_push(payload(i)), range(100)))
+
+    assert [status for status, _ in responses] == [200] * 100
+    assert stub.counts["tokens"] == 1
+    assert stub.counts["connections"] <= mpesa.pool_size
+
+def test_rejected_token_is_replaced_once(stub):
+    mpesa.stk_push(payload())
+    stub.revoke_tokens()
+
+    status, body = mpesa.stk_push(payload())
+
+    assert status == 200 and body["ResponseCode"] == '0'
+    assert stub.counts["tokens"] == 2
+
+def test_timeouts_are_raised_as_mpesa_errors(stub):
+    mpesa.stk_push(payload())
+    stub.latency = 1.0
+    mpesa.timeout = (1, 0.1)
+
+    with pytest.raises(MpesaUnknownOutcome):
+        mpesa.stk_push(payload())
+
+def test_requests_that_never_left_are_plain_errors(app):
+    # A port nothing listens on refuses the connection before anything is sent
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    mpesa.base_url = f"http://127.0.0.1:{port}"
+    mpesa.tokens.get = lambda: 'token'
+
+    with pytest.raises(MpesaError) as error:
+        mpesa.stk_push(payload())
+    assert not isinstance(error.value, MpesaUnknownOutcome)
+
+@pytest.mark.parametrize('content', [b'<html>Gateway error</html>', b'{"expires_in": "3599"}', b'[]'])
+def test_unusable_oauth_responses_are_mpesa_errors(app, monkeypatch, content):
+    response = requests.Response()
+    response.status_code, response._content = 200, content
+    monkeypatch.setattr(requests.Session, 'get', lambda self, *args, **kwargs: response)
+
+    with pytest.raises(MpesaError):
+        mpesa.tokens.get()
+
+def test_token_is_refreshed_ahead_of_expiry_by_one_thread():
+    now = [0.0]
+    fetched = []
+    release = threading.Event()
+
+    def fetch():
+        fetched.append(now[0])
+        if len(fetched) == 2:
+            # Hold the refresh so other callers arrive while it is in flight
+            release.wait(5)
+        return f"token-{len(fetched)}", 100
+
+    tokens = TokenCache(fetch, refresh_margin=10, clock=lambda: now[0])
+    assert tokens.get() == "token-1"
+    now[0] = 50
+    assert tokens.get() == "token-1" and len(fetched) == 1
+
+    now[0] = 95
+    refresher = threading.Thread(target=tokens.get)
+    refresher.start()
+    while len(fetched) < 2:
+        pass
+    # The current token is still valid, so nobody waits for the refresh
+    assert [tokens.get() for _ in range(10)] == ["token-1"] * 10
+    release.set()
+    refresher.join()
+
+    assert tokens.get() == "token-2" and fetched == [0.0, 95]
+    now[0] = 200
+    assert tokens.get() == "token-3"
+
+def test_expired_token_is_fetched_once_for_concurrent_callers():
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return "token", 3600
+
+    tokens = TokenCache(fetch)
+    barrier = threading.Barrier(16)
+
+    def get():
+        barrier.wait()
+        return tokens.get()
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        assert set(executor.map(lambda _: get(), range(16))) == {"token"}
+    assert len(fetches) == 1
@@ -0,0 +1,77 @@
+from app.extensions import db
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+from app.services import notification_counters
+from app.utils.query_stats import count_queries
+
+def unread(client, headers):
+    response = client.get("/notifications/unread-count", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["unread_count"]
+
+def test_counter_follows_notification_writes(client, make_user, send_notification):
+    user, headers = make_user("owner")
+    assert unread(client, headers) == 0
+
+    first, second, third = (send_notification(user.id, f"N{i}", "message").id for i in range(3))
+    assert unread(client, headers) == 3
+
+    assert client.put(f"/notifications/{first}/read", headers=headers).status_code == 200
+    # Marking twice must not decrement twice
+    assert client.put(f"/notifications/{first}/read", headers=headers).status_code == 200
+    assert unread(client, headers) == 2
+
+    # Deleting a read notification leaves the count alone; an unread one lowers it
+    assert client.delete(f"/notifications/{first}", headers=headers).status_code == 200
+    assert unread(client, headers) == 2
+    assert client.delete(f"/notifications/{second}", headers=headers).status_code == 200
+    assert unread(client, headers) == 1
+    assert client.delete(f"/notifications/{second}", headers=headers).status_code == 404
+
+    send_notification(user.id, "N4", "message")
+    assert client.put("/notifications/mark-all-read", headers=headers).status_code == 200
+    assert unread(client, headers) == 0
+
+def test_counters_are_per_user(client, make_user, send_notification):
+    owner, owner_headers = make_user("owner")
+    other, other_headers = make_user("other")
+    notification = send_notification(owner.id, "Mine", "message")
+    send_notification(other.id, "Theirs", "message")
+
+    # Another user's notification cannot be marked or deleted
+    assert client.put(f"/notifications/{notification.id}/read", headers=other_headers).status_code == 404
+    assert client.delete(f"/notifications/{notification.id}", headers=other_headers).status_code == 404
+    assert unread(client, owner_headers) == 1
+    assert unread(client, other_headers) == 1
+
+def test_unread_count_is_a_primary_key_lookup(client, make_user, send_notification):
+    user, headers = make_user("owner")
+    send_notification(user.id, "N", "message")
+    # Warm the token version cache
+    unread(client, headers)
+
+    with count_queries() as stats:
+        assert unread(client, headers) == 1
+
+    assert stats.count == 1
+    assert "notification_counters" in stats.statements[0]
+    assert "FROM notifications" not in stats.statements[0]
+
+def test_recount_repairs_drift(app, make_user, send_notification):
+    owner, _ = make_user("owner")
+    other, _ = make_user("other")
+    send_notification(owner.id, "N1", "message")
+    send_notification(owner.id, "N2", "message")
+    # Rows written behind the counter's back, and a counter for a user with nothing unread
+    db.session.add(Notification(user_id=owner.id, title="Raw", message="message"))
+    db.session.add(NotificationCounter(user_id=other.id, unread_count=5))
+    db.session.commit()
+
+    assert notification_counters.recount(owner.id) == 1
+    assert notification_counters.get(owner.id) == 3
+    assert notification_counters.get(other.id) == 5
+
+    result = app.test_cli_runner().invoke(args=["notifications", "recount"])
+    assert "Repaired 1 unread counter(s)" in result.output
+    assert notification_counters.get(other.id) == 0
+    assert notification_counters.recount() == 0
@@ -0,0 +1,105 @@
+from sqlalchemy import event
+from app.extensions import db
+from app.models.item import Item
+from app.models.report import Claim
+from app.models.user import User
+from app.models.notification import Notification
+from app.services import notification_counters, notification_outbox
+
+def record_statements(fn):
+    """
+    Run fn and return the SQL statements it executed, with "COMMIT" for each commit
+    """
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    def commit(conn):
+        statements.append("COMMIT")
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(db.engine, 'commit', commit)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        event.remove(db.engine, 'commit', commit)
+    return statements
+
+def inserts_into(statements, table):
+    return [s for s in statements if s.lstrip().upper().startswith(f"INSERT INTO {table.upper()}")]
+
+def test_staged_notifications_are_written_in_one_insert_at_commit(app, make_user):
+    users = [make_user(f"user{i}")[0] for i in range(3)]
+    staged = [notification_outbox.notify(user.id, "Hello", f"Message {user.id}") for user in users]
+    staged.append(notification_outbox.notify(users[0].id, "Again", "Second message"))
+    assert Notification.query.count() == 0
+
+    statements = record_statements(db.session.commit)
+
+    assert len(inserts_into(statements, "notifications")) == 1
+    assert len(inserts_into(statements, "notification_counters")) == 1
+    assert all(n.id is not None for n in staged)
+    assert {n.id for n in staged} == {n.id for n in Notification.query}
+    assert notification_counters.get(users[0].id) == 2
+    assert notification_counters.get(users[1].id) == 1
+
+def test_fan_out_to_thousands_is_one_statement(app, make_user):
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"bulk{i}", "email": f"bulk{i}@example.com", "password_hash": "x", "role": "user"}
+        for i in range(3000)
+    ])
+    db.session.commit()
+    user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+
+    # Unknown and repeated recipients are ignored
+    notification_outbox.notify_many(user_ids + user_ids[:10] + [999999], "Announcement", "Campus office moved")
+    statements = record_statements(db.session.commit)
+
+    assert len(inserts_into(statements, "notifications")) == 1
+    assert len(inserts_into(statements, "notification_counters")) == 1
+    assert Notification.query.count() == 3000
+    assert notification_counters.get(user_ids[-1]) == 1
+
+def test_rollback_discards_staged_notifications(app, make_user):
+    user, _ = make_user("owner")
+    notification_outbox.notify(user.id, "Never sent", "rolled back")
+    db.session.rollback()
+    db.session.commit()
+
+    assert Notification.query.count() == 0
+    assert notification_counters.get(user.id) == 0
+
+def test_notification_may_reference_item_added_in_same_transaction(app, make_user):
+    user, _ = make_user("owner")
+    item = Item(name="Wallet", reported_by=user.id)
+    db.session.add(item)
+    db.session.flush()
+    notification_outbox.notify(user.id, "Item received", "We got your report", item_id=item.id)
+    db.session.commit()
+
+    assert Notification.query.one().item_id == item.id
+
+def test_approving_claim_notifies_every_claimant_in_one_commit(client, make_user):
+    finder, _ = make_user("finder")
+    winner, winner_headers = make_user("winner")
+    _, admin_headers = make_user("admin", role='admin')
+    losers = [make_user(f"loser{i}")[0] for i in range(3)]
+    item = Item(name="Wallet", status="found", approval_status="approved", reported_by=finder.id)
+    db.session.add(item)
+    db.session.flush()
+    claim = Claim(item_id=item.id, claimant_id=winner.id)
+    db.session.add_all([claim] + [Claim(item_id=item.id, claimant_id=loser.id) for loser in losers])
+    db.session.commit()
+    claim_id, winner_id = claim.id, winner.id
+    loser_ids = [loser.id for loser in losers]
+
+    statements = record_statements(
+        lambda: client.put(f"/items/admin/claims/{claim_id}/approve", headers=admin_headers)
+    )
+
+    assert statements.count("COMMIT") == 1
+    # The approved claimant's notification, plus one fan-out to everyone else
+    assert len(inserts_into(statements, "notifications")) == 2
+    titles = dict(db.session.query(Notification.user_id, Notification.title))
+    assert titles[winner_id] == "Claim Approved"
+    assert all(titles[loser_id] == "Claim Rejected" for loser_id in loser_ids)
+    assert client.get("/notifications/unread-count", headers=winner_headers).get_json() == {"unread_count": 1}
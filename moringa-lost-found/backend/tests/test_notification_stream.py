@@ -0,0 +1,138 @@
+import json
+from app.extensions import pubsub
+from app.services.notification_events import user_channel
+from app.utils.pubsub import InProcessBroker, UnixSocketBroker
+
+def read_event(chunks):
+    """
+    Next SSE event from the response body, skipping keep-alive comments
+    and the retry interval
+    """
+    while True:
+        chunk = next(chunks).decode()
+        if chunk.startswith((':', 'retry:')):
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        return fields['event'], json.loads(fields['data']), fields.get('id')
+
+def stream_token(client, token_headers):
+    response = client.post("/notifications/stream-token", headers=token_headers)
+    assert response.status_code == 200
+    return response.get_json()["token"]
+
+def open_stream(client, token_headers, **kwargs):
+    token = stream_token(client, token_headers)
+    response = client.get(f"/notifications/stream?jwt={token}", buffered=False, **kwargs)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    return response, iter(response.response)
+
+def test_stream_pushes_notifications_and_unread_counts(client, make_user, send_notification):
+    user, headers = make_user("owner")
+    response, chunks = open_stream(client, headers)
+    try:
+        assert read_event(chunks) == ("unread_count", {"unread_count": 0}, None)
+
+        notification = send_notification(user.id, "Claim approved", "Your claim was approved")
+        event, data, event_id = read_event(chunks)
+        assert event == "notification"
+        assert data["title"] == "Claim approved"
+        assert event_id == str(notification.id)
+        assert read_event(chunks)[:2] == ("unread_count", {"unread_count": 1})
+
+        client.put(f"/notifications/{notification.id}/read", headers=headers)
+        assert read_event(chunks)[:2] == ("unread_count", {"unread_count": 0})
+    finally:
+        response.close()
+
+    # Closing the stream drops the subscription
+    assert not pubsub.broker._subscriptions.get(user_channel(user.id))
+
+def test_stream_replays_missed_notifications(client, make_user, send_notification):
+    user, headers = make_user("owner")
+    first = send_notification(user.id, "First", "one")
+    send_notification(user.id, "Second", "two")
+
+    first_id = first.id
+
+    response, chunks = open_stream(client, headers, headers={"Last-Event-ID": str(first_id)})
+    try:
+        event, data, second_id = read_event(chunks)
+        assert (event, data["title"]) == ("notification", "Second")
+        assert read_event(chunks) == ("unread_count", {"unread_count": 2}, second_id)
+    finally:
+        response.close()
+
+    # A new EventSource passes the id in the URL instead
+    token = stream_token(client, headers)
+    response = client.get(f"/notifications/stream?jwt={token}&last_event_id={first_id}", buffered=False)
+    try:
+        event, data, _ = read_event(iter(response.response))
+        assert (event, data["title"]) == ("notification", "Second")
+    finally:
+        response.close()
+
+def test_stream_ends_after_its_lifetime_and_resumes_from_the_newest_id(app, client, make_user,
+                                                                         send_notification):
+    app.config.update(STREAM_MAX_SECONDS=0.2, STREAM_RETRY_MS=1500)
+    user, headers = make_user("owner")
+    user_id, notification_id = user.id, send_notification(user.id, "First", "one").id
+
+    response, chunks = open_stream(client, headers)
+    try:
+        body = b"".join(chunks).decode()
+    finally:
+        response.close()
+    assert body.startswith("retry: 1500\n\n")
+    # Even with no notification sent on this stream, the reconnect resumes after the newest one
+    assert f"id: {notification_id}\n" in body
+    assert not pubsub.broker._subscriptions.get(user_channel(user_id))
+
+def test_streams_per_process_are_capped(app, client, make_user):
+    app.config['STREAM_MAX_CONNECTIONS'] = 1
+    _, headers = make_user("owner")
+    token = stream_token(client, headers)
+
+    first, _ = open_stream(client, headers)
+    try:
+        refused = client.get(f"/notifications/stream?jwt={token}")
+        assert refused.status_code == 503
+        assert refused.headers["Retry-After"]
+    finally:
+        first.close()
+
+    # Closing a stream frees its slot
+    second, _ = open_stream(client, headers)
+    second.close()
+
+def test_stream_requires_token(client):
+    assert client.get("/notifications/stream").status_code == 401
+
+def test_only_stream_tokens_go_in_the_url_and_they_open_nothing_else(client, make_user):
+    _, headers = make_user("owner")
+    access_token = headers["Authorization"].split()[1]
+    assert client.get(f"/notifications/stream?jwt={access_token}").status_code == 401
+
+    token = stream_token(client, headers)
+    assert client.get("/notifications", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert client.post("/notifications/stream-token",
+                       headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+def test_brokers_deliver_only_to_channel_subscribers(tmp_path):
+    for broker in (InProcessBroker(), UnixSocketBroker(str(tmp_path))):
+        mine = broker.subscribe("user:1")
+        other = broker.subscribe("user:2")
+        broker.publish("user:1", {"event": "ping", "data": {}})
+        assert mine.get(timeout=2) == {"event": "ping", "data": {}}
+        assert other.get(timeout=0.1) is None
+
+        broker.unsubscribe(mine)
+        broker.publish("user:1", {"event": "ping", "data": {}})
+        assert mine.get(timeout=0.1) is None
+
+def test_unix_broker_delivers_messages_larger_than_64k(tmp_path):
+    broker = UnixSocketBroker(str(tmp_path))
+    subscription = broker.subscribe("user:1")
+    message = {"event": "notification", "data": {"message": "x" * 100000}}
+    broker.publish("user:1", message)
+    assert subscription.get(timeout=2) == message
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models.item import Item
+
+def seed_items(user, count, approval_status='approved'):
+    base = datetime(2025, 8, 1)
+    items = [Item(
+        name=f"Item {i}",
+        status='lost',
+        approval_status=approval_status,
+        reported_by=user.id,
+        # Pairs of items share a timestamp so the id tie-breaker is exercised
+        created_at=base + timedelta(minutes=i // 2)
+    ) for i in range(count)]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+def walk_pages(client, url, headers=None, limit=3):
+    seen, cursor = [], None
+    while True:
+        query = f"{url}?limit={limit}" + (f"&after={cursor}" if cursor else "")
+        res = client.get(query, headers=headers)
+        assert res.status_code == 200
+        body = res.get_json()
+        assert len(body["items"]) <= limit
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return seen
+
+def test_get_all_items_keyset_pages_cover_feed_once(client, make_user):
+    user, _ = make_user("reporter")
+    items = seed_items(user, 10)
+    seed_items(user, 2, approval_status='pending')
+
+    seen = walk_pages(client, "/items")
+
+    expected = [item.id for item in sorted(items, key=lambda i: (i.created_at, i.id), reverse=True)]
+    assert seen == expected
+
+def test_get_all_items_without_paging_params_returns_list(client, make_user):
+    user, _ = make_user("reporter")
+    seed_items(user, 3)
+
+    res = client.get("/items")
+    assert res.status_code == 200
+    assert isinstance(res.get_json(), list)
+    assert len(res.get_json()) == 3
+
+def test_get_my_items_shares_paging_contract(client, make_user):
+    user, headers = make_user("owner")
+    other, _ = make_user("other")
+    mine = seed_items(user, 5, approval_status='pending')
+    seed_items(other, 4)
+
+    seen = walk_pages(client, "/items/my-items", headers=headers, limit=2)
+    assert sorted(seen) == sorted(item.id for item in mine)
+
+def test_user_items_shares_paging_contract(client, make_user):
+    user, _ = make_user("reporter")
+    items = seed_items(user, 7, approval_status='pending')
+
+    seen = walk_pages(client, "/user/items", limit=4)
+    assert sorted(seen) == sorted(item.id for item in items)
+
+def test_invalid_cursor_is_rejected(client):
+    res = client.get("/items?limit=5&after=not-a-cursor")
+    assert res.status_code == 400
+    assert res.get_json()["error"] == "Invalid cursor"
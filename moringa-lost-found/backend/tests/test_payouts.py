@@ -0,0 +1,300 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+from app.extensions import db, mpesa
+from app.models.item import Item
+from app.models.payout_job import PayoutJob
+from app.models.report import Report
+from app.models.reward import Reward
+from app.services import payouts
+from benchmarks.daraja_stub import DarajaStub, callback_payload
+
+@pytest.fixture
+def stub(app):
+    with DarajaStub(seed=1) as stub:
+        mpesa.base_url = stub.url
+        yield stub
+
+@pytest.fixture
+def owner_and_finder(make_user):
+    owner, owner_headers = make_user("owner")
+    finder, finder_headers = make_user("finder")
+    return owner, owner_headers, finder, finder_headers
+
+def make_rewards(owner, finder, count, phone='254708374149'):
+    item = Item(name="Wallet", status='found', approval_status='approved', reported_by=owner.id)
+    db.session.add(item)
+    db.session.flush()
+    rewards = [Reward(item_id=item.id, owner_user_id=owner.id, finder_user_id=finder.id, amount=100 + i,
+                      mpesa_phone_number=phone) for i in range(count)]
+    db.session.add_all(rewards)
+    db.session.commit()
+    return rewards
+
+def enqueue_all(rewards):
+    jobs = [payouts.enqueue(reward.id) for reward in rewards]
+    db.session.commit()
+    return jobs
+
+def test_pay_queues_a_job_and_returns_at_once(client, stub, owner_and_finder):
+    owner, owner_headers, finder, finder_headers = owner_and_finder
+    reward, = make_rewards(owner, finder, 1)
+
+    res = client.post(f"/api/rewards/{reward.id}/pay", headers=owner_headers)
+
+    assert res.status_code == 202
+    job_id = res.get_json()["job_id"]
+    assert stub.counts["stk_pushes"] == 0
+    assert client.post(f"/api/rewards/{reward.id}/pay", headers=owner_headers).status_code == 400
+    job = client.get(f"/api/rewards/payout-jobs/{job_id}", headers=finder_headers).get_json()
+    assert job["job"]["status"] == "queued" and job["reward_status"] == "initiated"
+
+    payouts.work(once=True)
+
+    job = client.get(f"/api/rewards/payout-jobs/{job_id}", headers=owner_headers).get_json()["job"]
+    assert job["status"] == "sent" and job["attempts"] == 1
+    assert "checkout_request_id" not in job
+    checkout_request_id = db.session.get(PayoutJob, job_id).checkout_request_id
+    assert stub.accepted[checkout_request_id]["AccountReference"] == f"REWARD-{reward.id}"
+
+def test_report_reward_payment_is_queued(client, stub, owner_and_finder):
+    owner, owner_headers, finder, _ = owner_and_finder
+    reward, = make_rewards(owner, finder, 1)
+    report = Report(user_id=owner.id, item_id=reward.item_id)
+    db.session.add(report)
+    db.session.flush()
+    reward.report_id = report.id
+    db.session.commit()
+
+    res = client.post(f"/api/reports/{report.id}/initiate-payment", headers=owner_headers)
+
+    assert res.status_code == 202
+    assert db.session.get(PayoutJob, res.get_json()["job_id"]).reward_id == reward.id
+    assert db.session.get(Report, report.id).reward_status == 'initiated'
+
+def test_only_the_owner_or_an_admin_can_pay(client, stub, owner_and_finder, make_user):
+    owner, _, finder, finder_headers = owner_and_finder
+    _, stranger_headers = make_user("stranger")
+    _, admin_headers = make_user("admin", role='admin')
+    first, second = make_rewards(owner, finder, 2)
+    report = Report(user_id=owner.id, item_id=second.item_id)
+    db.session.add(report)
+    db.session.flush()
+    second.report_id = report.id
+    db.session.commit()
+
+    for headers in (stranger_headers, finder_headers):
+        assert client.post(f"/api/rewards/{first.id}/pay", headers=headers).status_code == 403
+        assert client.post(f"/api/reports/{report.id}/initiate-payment", headers=headers).status_code == 403
+    assert PayoutJob.query.count() == 0
+    assert db.session.get(Reward, first.id).status == 'pending'
+
+    assert client.post(f"/api/rewards/{first.id}/pay", headers=admin_headers).status_code == 202
+
+def test_worker_sends_in_batches_with_a_cached_token(app, stub, owner_and_finder):
+    owner, _, finder, _ = owner_and_finder
+    app.config['PAYOUT_BATCH_SIZE'] = 10
+    jobs = enqueue_all(make_rewards(owner, finder, 25))
+
+    assert payouts.work(once=True) == 25
+
+    sent = PayoutJob.query.filter(PayoutJob.id.in_([job.id for job in jobs])).all()
+    assert {job.status for job in sent} == {'sent'}
+    assert {job.checkout_request_id for job in sent} == set(stub.accepted)
+    assert stub.counts["tokens"] == 1
+    assert stub.counts["connections"] <= app.config['PAYOUT_CONCURRENCY']
+
+def test_transient_failures_are_retried(app, stub, owner_and_finder):
+    owner, _, finder, _ = owner_and_finder
+    stub.failure_rate = 0.5
+    app.config['PAYOUT_MAX_ATTEMPTS'] = 20
+    enqueue_all(make_rewards(owner, finder, 20))
+
+    attempts = payouts.work(once=True)
+
+    assert {job.status for job in PayoutJob.query} == {'sent'}
+    assert attempts == 20 + stub.counts["failed"] > 20
+    assert stub.counts["accepted"] == 20
+
+def test_payouts_fail_after_the_last_attempt(app, stub, owner_and_finder):
+    owner, _, finder, _ = owner_and_finder
+    stub.failure_rate = 1.0
+    app.config['PAYOUT_MAX_ATTEMPTS'] = 3
+    reward, = make_rewards(owner, finder, 1)
+    enqueue_all([reward])
+
+    assert payouts.work(once=True) == 3
+
+    job = PayoutJob.query.one()
+    assert (job.status, job.attempts, job.last_error) == ('failed', 3, 'Service is currently unavailable')
+    assert db.session.get(Reward, reward.id).status == 'failed'
+
+def test_rejected_requests_are_not_retried(app, stub, owner_and_finder):
+    owner, _, finder, _ = owner_and_finder
+    enqueue_all(make_rewards(owner, finder, 1, phone=None))
+
+    payouts.work(once=True)
+
+    job = PayoutJob.query.one()
+    assert (job.status, job.attempts) == ('failed', 1)
+    assert stub.counts["stk_pushes"] == 0
+
+def time_out_one_push(app, stub, owner, finder):
+    """
+    Enqueue one reward and send it with a read timeout shorter than Daraja's answer
+    """
+    reward, = make_rewards(owner, finder, 1)
+    enqueue_all([reward])
+    stub.latency = 0.5
+    mpesa.timeout = (1, 0.1)
+
+    assert payouts.work(once=True) == 1
+    # Daraja still accepts the request after the client gave up
+    for _ in range(50):
+        if stub.accepted:
+            break
+        time.sleep(0.1)
+    stub.latency = 0
+    return reward
+
+def test_timed_out_pushes_are_not_resent_but_matched_to_their_callback(client, app, stub, owner_and_finder):
+    owner, _, finder, _ = owner_and_finder
+    reward = time_out_one_push(app, stub, owner, finder)
+    reward_id, phone = reward.id, reward.mpesa_phone_number
+
+    job = PayoutJob.query.one()
+    assert (job.status, job.checkout_request_id) == ('unknown', None)
+    assert db.session.get(Reward, reward_id).status == 'initiated'
+    assert payouts.work(once=True) == 0
+    assert stub.counts["stk_pushes"] == 1
+
+    checkout_request_id, = stub.accepted
+    body = callback_payload(checkout_request_id, 0, 100, phone, receipt_number='NLJ7RT61SV')
+    assert client.post("/api/rewards/mpesa/callback", json=body).status_code == 200
+    payouts.work(once=True)
+
+    job = PayoutJob.query.one()
+    assert (job.status, job.checkout_request_id) == ('sent', checkout_request_id)
+    reward = db.session.get(Reward, reward_id)
+    assert (reward.status, reward.mpesa_transaction_id) == ('completed', 'NLJ7RT61SV')
+    assert stub.counts["stk_pushes"] == 1
+
+def test_unknown_jobs_without_a_callback_are_retried_later(app, stub, owner_and_finder):
+    owner, _, finder, _ = owner_and_finder
+    time_out_one_push(app, stub, owner, finder)
+    app.config['PAYOUT_UNKNOWN_SECONDS'] = 0
+
+    assert payouts.work(once=True) == 1
+
+    job = PayoutJob.query.one()
+    assert (job.status, job.attempts) == ('sent', 2)
+    assert stub.counts["stk_pushes"] == 2
+
+def test_jobs_of_a_dead_worker_are_leased_again(app, stub, owner_and_finder):
+    owner, _, finder, _ = owner_and_finder
+    job, = enqueue_all(make_rewards(owner, finder, 1))
+    assert [leased.id for leased in payouts.lease_jobs(10, lease_seconds=300)] == [job.id]
+    assert payouts.lease_jobs(10, lease_seconds=300) == []
+
+    # The worker holding the lease never reports back
+    db.session.execute(db.update(PayoutJob).values(run_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    payouts.work(once=True)
+
+    job = db.session.get(PayoutJob, job.id)
+    assert (job.status, job.attempts) == ('sent', 2)
+
+def test_rewards_are_created_and_shown_only_to_their_parties(client, owner_and_finder, make_user):
+    owner, owner_headers, finder, finder_headers = owner_and_finder
+    _, stranger_headers = make_user("stranger")
+    item = Item(name="Wallet", status='found', approval_status='approved', reported_by=owner.id)
+    db.session.add(item)
+    db.session.commit()
+    body = {"item_id": item.id, "finder_user_id": finder.id, "amount": 500, "phone_number": "254708374149"}
+
+    assert client.post("/api/rewards/", json=body, headers=stranger_headers).status_code == 403
+    assert client.post("/api/rewards/", json={**body, "finder_user_id": owner.id},
+                       headers=owner_headers).status_code == 400
+    res = client.post("/api/rewards/", json=body, headers=owner_headers)
+    assert res.status_code == 201
+    reward_id = res.get_json()["reward"]["id"]
+    assert db.session.get(Reward, reward_id).owner_user_id == owner.id
+
+    shown = client.get(f"/api/rewards/{reward_id}", headers=owner_headers).get_json()
+    assert shown["owner"] == {"id": owner.id, "username": "owner"}
+    assert shown["finder"] == {"id": finder.id, "username": "finder"}
+    assert shown["mpesa_phone_number"] == "254708374149"
+    assert "mpesa_phone_number" not in client.get(f"/api/rewards/{reward_id}", headers=finder_headers).get_json()
+    assert client.get(f"/api/rewards/{reward_id}", headers=stranger_headers).status_code == 403
+
+def test_report_rewards_are_shown_only_to_their_parties(client, owner_and_finder, make_user):
+    owner, owner_headers, finder, finder_headers = owner_and_finder
+    _, stranger_headers = make_user("stranger")
+    _, admin_headers = make_user("admin", role='admin')
+    reward, = make_rewards(owner, finder, 1)
+    report = Report(user_id=owner.id, item_id=reward.item_id, reward_status='offered')
+    db.session.add(report)
+    db.session.flush()
+    reward.report_id = report.id
+    db.session.commit()
+    url = f"/api/reports/{report.id}"
+
+    for headers in (owner_headers, admin_headers):
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200
+        shown = res.get_json()["report"]
+        assert shown["reward_status"] == "offered"
+        assert shown["reward"]["mpesa_phone_number"] == "254708374149"
+    res = client.get(url, headers=finder_headers)
+    assert res.status_code == 200
+    assert "mpesa_phone_number" not in res.get_json()["report"]["reward"]
+    assert client.get(url, headers=stranger_headers).status_code == 403
+
+@pytest.mark.parametrize("amount", [0, -50, "lots", None, True])
+def test_rewards_need_a_positive_amount(client, owner_and_finder, amount):
+    owner, owner_headers, finder, _ = owner_and_finder
+    item = Item(name="Wallet", status='found', approval_status='approved', reported_by=owner.id)
+    db.session.add(item)
+    db.session.flush()
+    report = Report(user_id=owner.id, item_id=item.id)
+    db.session.add(report)
+    db.session.commit()
+
+    body = {"item_id": item.id, "finder_user_id": finder.id, "amount": amount, "phone_number": "254708374149"}
+    assert client.post("/api/rewards/", json=body, headers=owner_headers).status_code == 400
+    body = {"finder_user_id": finder.id, "amount": amount, "mpesa_phone_number": "254708374149"}
+    assert client.post(f"/api/reports/{report.id}/rewards", json=body, headers=owner_headers).status_code == 400
+    assert Reward.query.count() == 0
+
+def test_creating_a_reward_without_a_body_is_a_bad_request(client, owner_and_finder):
+    _, owner_headers, _, _ = owner_and_finder
+    for url in ("/api/rewards/", "/api/reports/1/rewards"):
+        assert client.post(url, headers=owner_headers).status_code == 400
+        assert client.post(url, data="not json", content_type="application/json",
+                           headers=owner_headers).status_code == 400
+
+def test_callback_racing_the_worker_is_applied_on_its_next_pass(client, app, stub, owner_and_finder, monkeypatch):
+    owner, _, finder, _ = owner_and_finder
+    reward, = make_rewards(owner, finder, 1)
+    reward_id = reward.id
+    enqueue_all([reward])
+    jobs = payouts.lease_jobs(10, lease_seconds=300)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = payouts.send_batch(jobs, executor)
+    checkout_request_id = results[0][1].checkout_request_id
+
+    # The callback commits while the worker's recording transaction is open: it can't see
+    # the job yet, and the worker's check for early callbacks can't see it
+    body = callback_payload(checkout_request_id, 0, 100, '254708374149', receipt_number='NLJ7RT61SV')
+    assert client.post("/api/rewards/mpesa/callback", json=body).status_code == 200
+    assert db.session.get(Reward, reward_id).status == 'initiated'
+    with monkeypatch.context() as patched:
+        patched.setattr(payouts.mpesa_callbacks, 'apply_stored', lambda checkout_request_ids: 0)
+        payouts.record_results(results, app.config)
+    assert db.session.get(Reward, reward_id).status == 'initiated'
+
+    payouts.work(once=True)
+
+    reward = db.session.get(Reward, reward_id)
+    assert (reward.status, reward.mpesa_transaction_id) == ('completed', 'NLJ7RT61SV')
@@ -0,0 +1,137 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import or_, select, text, update
+from app.extensions import db
+from app.models.item import Item
+from app.models.user import User
+from app.models.report import Claim, Comment, Report
+from app.models.reward import Reward
+from app.models.notification import Notification
+from app.models.payout_job import PayoutJob
+from app.services import reward_history
+
+# EXPLAIN the hot-path queries over a seeded dataset and fail if any of them
+# has to read a whole table. On Postgres sequential scans are disabled for
+# the check, so a "Seq Scan" left in the plan means no usable index exists.
+
+def seed():
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x") for i in range(20)]
+    db.session.add_all(users)
+    db.session.flush()
+    items = [
+        Item(name=f"Item {i}", status=("lost", "found", "claimed")[i % 3],
+             approval_status=("approved", "approved", "approved", "pending", "rejected")[i % 5],
+             reported_by=users[i % 20].id)
+        for i in range(500)
+    ]
+    db.session.add_all(items)
+    db.session.flush()
+    for i, item in enumerate(items):
+        db.session.add_all([
+            Claim(item_id=item.id, claimant_id=users[(i + 1) % 20].id, status=("pending", "approved", "rejected")[i % 3]),
+            Comment(item_id=item.id, author_id=users[(i + 2) % 20].id, comment_text="Seen it"),
+            Reward(item_id=item.id, owner_user_id=users[i % 20].id, finder_user_id=users[(i + 3) % 20].id, amount=100),
+            Report(item_id=item.id, user_id=users[i % 20].id),
+            Notification(user_id=users[i % 20].id, title="Update", message="Item update", is_read=i % 3 == 0),
+        ])
+    db.session.commit()
+    db.session.execute(text("ANALYZE"))
+
+HOT_QUERIES = {
+    "public feed page": select(Item).where(Item.approval_status == 'approved')
+        .order_by(Item.created_at.desc(), Item.id.desc()).limit(21),
+    "my items": select(Item).where(Item.reported_by == 1),
+    "pending items": select(Item).where(Item.approval_status == 'pending'),
+    "admin items by status": select(Item).where(Item.status == 'found'),
+    "open lost items": select(Item.id).where(
+        Item.status == 'lost', or_(Item.approval_status.is_(None), Item.approval_status != 'rejected')
+    ),
+    "recent image hashes": select(Item.id, Item.image_hash).where(
+        Item.created_at >= datetime(2026, 1, 1), Item.image_hash.isnot(None)
+    ),
+    "claims of items": select(Claim).where(Claim.item_id.in_([1, 2, 3])),
+    "other claims of item": select(Claim).where(Claim.item_id == 1, Claim.id != 1),
+    "pending claims": select(Claim).where(Claim.status == 'pending'),
+    "claims by user": select(Claim).where(Claim.claimant_id == 1),
+    "comments of item": select(Comment).where(Comment.item_id == 1).order_by(Comment.created_at),
+    "rewards of item": select(Reward).where(Reward.item_id == 1),
+    "rewards given": select(Reward).where(Reward.owner_user_id == 1).order_by(Reward.created_at.desc()),
+    "rewards received": select(Reward).where(Reward.finder_user_id == 1).order_by(Reward.created_at.desc()),
+    "reports of item": select(Report).where(Report.item_id == 1),
+    "notifications": select(Notification).where(Notification.user_id == 1)
+        .order_by(Notification.created_at.desc()),
+    "unread notifications": select(Notification).where(Notification.user_id == 1, Notification.is_read == False)
+        .order_by(Notification.created_at.desc()),
+    "due payout jobs": select(PayoutJob.id).where(
+        PayoutJob.status.in_(('queued', 'sending')), PayoutJob.run_at <= datetime(2026, 1, 1)
+    ).order_by(PayoutJob.run_at).limit(50),
+    "mark all read": update(Notification).where(Notification.user_id == 1, Notification.is_read == False)
+        .values(is_read=True),
+}
+
+def full_scans(statement):
+    """
+    Tables the plan for `statement` reads in full
+    """
+    sql = str(statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        nodes, scans = [plan[0]["Plan"]], []
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                scans.append(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+        return scans
+
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    # "SCAN t" reads the table; "SEARCH t USING INDEX" does not, and neither
+    # does a scan of a partial index, which only holds the matching rows
+    partial = {index.name for table in db.metadata.tables.values() for index in table.indexes
+               if index.dialect_options['sqlite']['where'] is not None}
+    return [
+        row[3] for row in rows
+        if row[3].startswith("SCAN ") and "CONSTANT ROW" not in row[3]
+        and not any(row[3].endswith(f" INDEX {name}") for name in partial)
+    ]
+
+@pytest.fixture
+def seeded(app):
+    seed()
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_queries_use_indexes(seeded, name):
+    assert full_scans(HOT_QUERIES[name]) == []
+
+def test_reward_history_uses_indexes(seeded):
+    # Built with the session, so it can't sit in HOT_QUERIES
+    for direction in (None, 'given', 'received'):
+        query = reward_history.history_query(1, direction)
+        assert full_scans(query.order_by(Reward.created_at.desc(), Reward.id.desc()).limit(21).statement) == []
+
+def test_dashboard_item_counts_read_only_the_index(seeded):
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip("SQLite plan wording")
+    sql = "SELECT status, approval_status, category, count(*) FROM items GROUP BY status, approval_status, category"
+    plan = [row[3] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    assert plan == ["SCAN items USING COVERING INDEX ix_items_status_approval_status_category"]
+
+def test_recent_image_hashes_read_only_the_index(seeded):
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip("SQLite plan wording")
+    sql = "SELECT id, image_hash FROM items WHERE created_at >= '2026-01-01' AND image_hash IS NOT NULL"
+    plan = [row[3] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    assert plan == ["SEARCH items USING COVERING INDEX ix_items_created_at_image_hash_id (created_at>?)"]
+
+@pytest.mark.parametrize("statement, index", [
+    (HOT_QUERIES["unread notifications"], "ix_notifications_unread_user_id_created_at"),
+    (HOT_QUERIES["public feed page"], "ix_items_approved_created_at_id"),
+    (HOT_QUERIES["pending items"], "ix_items_pending_created_at"),
+])
+def test_hot_filters_use_partial_indexes(seeded, statement, index):
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip("SQLite plan wording")
+    sql = str(statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[3] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert index in plan
@@ -0,0 +1,57 @@
+import logging
+import pytest
+from app.extensions import db
+from app.models.item import Item
+from app.models.report import Claim
+from app.models.user import User
+from app.utils.query_stats import query_budget, statement_shape
+
+def test_statement_shape_folds_whitespace_and_parameter_lists():
+    assert statement_shape("SELECT *\n  FROM items WHERE id IN (?, ?, ?)") == "SELECT * FROM items WHERE id IN (...)"
+    assert statement_shape("SELECT * FROM items WHERE id IN (%(id_1)s)") == "SELECT * FROM items WHERE id IN (...)"
+
+def test_responses_report_query_count_and_time(client):
+    response = client.get("/items")
+    assert response.headers["X-DB-Queries"] == "1"
+    assert response.headers["X-DB-Time"].endswith("ms")
+
+def test_headers_are_off_unless_enabled(app, client):
+    app.config["DB_QUERY_HEADERS"] = False
+    assert "X-DB-Queries" not in client.get("/items").headers
+
+def test_repeated_statements_are_logged_as_n_plus_one(app, client, make_user, caplog):
+    user_ids = [make_user(f"user{i}")[0].id for i in range(6)]
+
+    @app.route("/test-loop")
+    def loop():
+        return {"names": [db.session.get(User, user_id).username for user_id in user_ids]}
+
+    db.session.expunge_all()
+    with caplog.at_level(logging.WARNING):
+        assert client.get("/test-loop").status_code == 200
+    assert "Possible N+1 query in GET /test-loop: 6 x SELECT" in caplog.text
+
+def test_query_budget_fails_when_exceeded(app, make_user):
+    make_user("someone")
+    with pytest.raises(AssertionError, match="2 queries executed, budget was 1"):
+        with query_budget(1):
+            User.query.all()
+            Item.query.all()
+
+@pytest.mark.parametrize("url", ["/items/admin/pending-claims", "/items/admin/pending-items"])
+def test_admin_pending_views_have_a_fixed_query_budget(client, make_user, url):
+    _, admin_headers = make_user("admin", role='admin')
+    claimants = [make_user(f"claimant{i}")[0] for i in range(10)]
+    for claimant in claimants:
+        item = Item(name="Phone", status="found", approval_status="pending", reported_by=claimant.id)
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Claim(item_id=item.id, claimant_id=claimant.id))
+    db.session.commit()
+    db.session.expunge_all()
+    client.get(url, headers=admin_headers)
+
+    # Main query plus one IN-query per loaded relationship, however many rows
+    with query_budget(3):
+        response = client.get(url, headers=admin_headers)
+    assert response.get_json()["total_count"] == 10
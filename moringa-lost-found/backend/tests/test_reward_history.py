@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+import pytest
+from app.extensions import db
+from app.models.item import Item
+from app.models.reward import Reward
+from app.utils.query_stats import count_queries
+
+@pytest.fixture
+def history(make_user):
+    """
+    'me' gave 6 rewards to two finders (one still unassigned) and received 4
+    """
+    me, headers = make_user("me")
+    alice, _ = make_user("alice")
+    bob, _ = make_user("bob")
+    now = datetime.utcnow()
+    rewards = []
+    for i in range(10):
+        given = i % 5 < 3
+        owner = me if given else (alice, bob)[i % 2]
+        item = Item(name=f"Item {i}", status='found', approval_status='approved', reported_by=owner.id)
+        db.session.add(item)
+        db.session.flush()
+        finder = me if not given else (None, alice, bob)[i % 3]
+        rewards.append(Reward(item_id=item.id, owner_user_id=owner.id, finder_user_id=finder and finder.id,
+                              amount=100 + i, created_at=now - timedelta(hours=i)))
+    db.session.add_all(rewards)
+    db.session.commit()
+    return me, headers, rewards
+
+@pytest.mark.parametrize("url", ["/api/rewards/my-rewards", "/api/reports/my-rewards"])
+def test_history_is_one_statement_with_items_and_counterparts(client, history, url):
+    me, headers, rewards = history
+    with count_queries() as stats:
+        res = client.get(url, headers=headers)
+    assert res.status_code == 200
+    # The token check and the history itself, however many rewards there are
+    assert stats.count <= 2
+
+    body = res.get_json()
+    given, received = body["rewards_given"], body["rewards_received"]
+    assert (len(given), len(received)) == (6, 4)
+    assert [r["created_at"] for r in given] == sorted((r["created_at"] for r in given), reverse=True)
+    newest = given[0]
+    assert newest == {
+        "id": rewards[0].id, "direction": "given", "item_id": rewards[0].item_id, "item_name": "Item 0",
+        "amount": 100, "status": "pending", "mpesa_transaction_id": None, "mpesa_phone_number": None,
+        "created_at": newest["created_at"], "other_party": None,
+    }
+    assert {r["other_party"]["username"] for r in given if r["other_party"]} == {"alice", "bob"}
+    assert {r["other_party"]["username"] for r in received} == {"alice", "bob"}
+    assert all(r["direction"] == "received" for r in received)
+
+def test_history_pages_follow_the_cursor(client, history):
+    me, headers, rewards = history
+    seen, after = [], None
+    while True:
+        url = "/api/rewards/my-rewards?limit=4" + (f"&after={after}" if after else "")
+        with count_queries() as stats:
+            body = client.get(url, headers=headers).get_json()
+        assert stats.count <= 2
+        seen.extend(r["id"] for r in body["rewards"])
+        after = body["next_cursor"]
+        if not after:
+            break
+    assert seen == [reward.id for reward in rewards]
+
+    received = client.get("/api/rewards/my-rewards?limit=10&direction=received", headers=headers).get_json()
+    assert [r["id"] for r in received["rewards"]] == [r.id for r in rewards if r.finder_user_id == me.id]
+    given = client.get("/api/rewards/my-rewards?direction=given", headers=headers).get_json()
+    assert (len(given["rewards_given"]), given["rewards_received"]) == (6, [])
+
+    assert client.get("/api/rewards/my-rewards?limit=4&direction=sideways", headers=headers).status_code == 400
+    assert client.get("/api/rewards/my-rewards?after=garbage", headers=headers).status_code == 400
+
+def test_finders_do_not_see_the_owners_phone_number(client, make_user):
+    owner, owner_headers = make_user("owner")
+    finder, finder_headers = make_user("finder")
+    item = Item(name="Wallet", status='found', approval_status='approved', reported_by=owner.id)
+    db.session.add(item)
+    db.session.flush()
+    db.session.add(Reward(item_id=item.id, owner_user_id=owner.id, finder_user_id=finder.id, amount=100,
+                          mpesa_phone_number='254708374149'))
+    db.session.commit()
+
+    given = client.get("/api/rewards/my-rewards", headers=owner_headers).get_json()["rewards_given"]
+    assert given[0]["mpesa_phone_number"] == '254708374149'
+    for url in ("/api/rewards/my-rewards", "/api/rewards/my-rewards?limit=10"):
+        body = client.get(url, headers=finder_headers).get_json()
+        received = body.get("rewards_received") or body["rewards"]
+        assert received[0]["direction"] == "received"
+        assert "mpesa_phone_number" not in received[0]
@@ -0,0 +1,105 @@
+import io
+from datetime import datetime, timedelta
+import pytest
+from app.extensions import db
+from app.models.item import Item
+from app.models.reward import Reward
+from app.models.reward_ledger import RewardMismatch
+from app.services import payouts, reconciliation
+from app.utils.query_stats import query_budget
+
+STATEMENT = """Receipt No.,Completion Time,Details,Transaction Status,Paid In,Withdrawn,Balance
+RC001,01-10-2026 10:00:00,Reward 1,Completed,"1,000.00",,
+RC002,01-10-2026 10:05:00,Reward 2,Completed,250.00,,
+RC003,01-10-2026 10:06:00,Reward 3,Failed,300.00,,
+rc004 ,01-10-2026 10:07:00,Reward 4,Completed,,-400.00,
+RC004,01-10-2026 10:07:00,Reward 4,Completed,,-400.00,
+RC099,01-10-2026 11:00:00,Unknown,Completed,75.00,,
+RC098,01-10-2026 11:00:00,Unknown,Cancelled,75.00,,
+"""
+
+@pytest.fixture
+def rewards(make_user):
+    owner, _ = make_user("owner")
+    finder, _ = make_user("finder")
+    item = Item(name="Wallet", status='found', approval_status='approved', reported_by=owner.id)
+    db.session.add(item)
+    db.session.flush()
+    now = datetime.utcnow()
+
+    def reward(amount, status, receipt=None, days_ago=0):
+        return Reward(item_id=item.id, owner_user_id=owner.id, finder_user_id=finder.id, amount=amount,
+                      status=status, mpesa_transaction_id=receipt, created_at=now - timedelta(days=days_ago))
+
+    rewards = {
+        'matched': reward(1000, 'completed', 'RC001'),
+        'amount': reward(200, 'completed', 'RC002'),
+        'status': reward(300, 'completed', 'RC003', days_ago=1),
+        'duplicated': reward(400, 'completed', 'RC004', days_ago=1),
+        'unpaid': reward(500, 'completed', 'RC005', days_ago=2),
+        'no_receipt': reward(600, 'completed'),
+        'pending': reward(700, 'pending', days_ago=2),
+    }
+    db.session.add_all(rewards.values())
+    db.session.commit()
+    return rewards
+
+def test_reconcile_stores_every_kind_of_mismatch(rewards):
+    result = reconciliation.reconcile(io.StringIO(STATEMENT), partitions=3, batch_size=2)
+
+    assert (result['rewards'], result['statement_rows'], result['matched']) == (7, 7, 2)
+    assert result['mismatches'] == {'amount_mismatch': 1, 'status_mismatch': 1, 'duplicate_in_statement': 1,
+                                    'missing_from_statement': 1, 'missing_receipt': 1, 'missing_from_ledger': 1}
+    stored = {mismatch.kind: mismatch for mismatch in RewardMismatch.query.filter_by(run_id=result['run_id'])}
+    assert len(stored) == 6
+    amount = stored['amount_mismatch']
+    assert (amount.reward_id, amount.ledger_amount, amount.statement_amount) == (rewards['amount'].id, 200, 250)
+    assert stored['status_mismatch'].statement_status == 'Failed'
+    assert stored['missing_from_statement'].reward_id == rewards['unpaid'].id
+    assert stored['missing_receipt'].reward_id == rewards['no_receipt'].id
+    assert (stored['missing_from_ledger'].receipt_number, stored['missing_from_ledger'].reward_id) == ('RC099', None)
+
+def test_statement_without_required_columns_is_rejected(app, rewards, tmp_path):
+    with pytest.raises(reconciliation.StatementError):
+        reconciliation.reconcile(io.StringIO("Receipt,Amount\nRC001,1000\n"))
+    assert RewardMismatch.query.count() == 0
+
+    statement = tmp_path / 'statement.csv'
+    statement.write_text(STATEMENT)
+    result = app.test_cli_runner().invoke(args=['rewards', 'reconcile', str(statement)])
+    assert result.exit_code == 0 and "2 matched" in result.output
+
+def test_summary_serves_the_precomputed_daily_totals(client, make_user, rewards):
+    _, admin_headers = make_user("admin", role='admin')
+    _, user_headers = make_user("someone")
+    assert reconciliation.refresh_daily_totals() == 4
+
+    with query_budget(3):
+        res = client.get("/admin/rewards/summary?days=2", headers=admin_headers)
+
+    assert res.status_code == 200
+    summary = res.get_json()
+    assert (summary['total_count'], summary['total_amount']) == (7, 3700)
+    assert summary['by_status']['pending'] == {'count': 1, 'amount': 700}
+    # The last two days, newest first
+    assert [day['count'] for day in summary['by_day']] == [3, 2]
+    assert summary['by_day'][1]['by_status'] == {'completed': {'count': 2, 'amount': 700}}
+    assert summary['refreshed_at'] is not None
+
+    # Totals only move when they are rebuilt
+    Reward.query.filter_by(status='pending').delete()
+    db.session.commit()
+    assert client.get("/admin/rewards/summary", headers=admin_headers).get_json()['total_count'] == 7
+
+    assert client.get("/admin/rewards/summary", headers=user_headers).status_code == 403
+    assert client.get("/admin/rewards/summary?days=0", headers=admin_headers).status_code == 400
+
+def test_payout_worker_refreshes_the_totals_when_idle(app, client, make_user, rewards):
+    _, admin_headers = make_user("admin", role='admin')
+    assert client.get("/admin/rewards/summary", headers=admin_headers).get_json()['refreshed_at'] is None
+
+    app.config['REWARD_TOTALS_REFRESH_SECONDS'] = 60
+    payouts.work(once=True)
+
+    summary = client.get("/admin/rewards/summary", headers=admin_headers).get_json()
+    assert summary['total_count'] == 7 and summary['refreshed_at'] is not None
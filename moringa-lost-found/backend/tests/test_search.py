@@ -0,0 +1,54 @@
+from app.extensions import db
+from app.models.item import Item
+
+def add_item(client, headers, **fields):
+    res = client.post("/items", headers=headers, json=fields)
+    assert res.status_code == 201
+    return Item.query.order_by(Item.id.desc()).first()
+
+def approve(item):
+    item.approval_status = 'approved'
+    db.session.commit()
+
+def search_ids(client, query):
+    res = client.get(f"/items/search?{query}")
+    assert res.status_code == 200
+    return [item["id"] for item in res.get_json()["items"]]
+
+def test_search_ranks_prefix_matches_and_filters(client, make_user):
+    _, headers = make_user("reporter")
+    phone = add_item(client, headers, name="Black phone", description="Samsung with cracked screen",
+                     location_found="Library", status="found", category="electronics")
+    charger = add_item(client, headers, name="Charger", description="Left next to a phone booth",
+                       location_found="Cafeteria", status="lost", category="electronics")
+    pending = add_item(client, headers, name="Phone case", description="Blue")
+    approve(phone)
+    approve(charger)
+
+    assert search_ids(client, "q=phon") == [phone.id, charger.id]
+    assert search_ids(client, "q=phone&status=lost") == [charger.id]
+    assert search_ids(client, "q=library") == [phone.id]
+    assert search_ids(client, "q=phone&category=books") == []
+    assert pending.id not in search_ids(client, "q=case")
+
+def test_search_index_follows_updates_and_deletes(client, make_user):
+    _, headers = make_user("reporter")
+    _, admin_headers = make_user("admin", role='admin')
+    item = add_item(client, headers, name="Umbrella", description="Green")
+    approve(item)
+    item_id = item.id
+
+    assert search_ids(client, "q=umbrella") == [item_id]
+
+    client.put(f"/items/{item_id}", headers=admin_headers, json={"name": "Water bottle"})
+    assert search_ids(client, "q=umbrella") == []
+    assert search_ids(client, "q=bottle") == [item_id]
+
+    client.put(f"/items/admin/{item_id}/update", headers=admin_headers, json={"description": "Steel flask"})
+    assert search_ids(client, "q=flask") == [item_id]
+
+    client.delete(f"/items/{item_id}", headers=admin_headers)
+    assert search_ids(client, "q=bottle") == []
+
+def test_search_requires_query(client):
+    assert client.get("/items/search").status_code == 400